@@ -0,0 +1,634 @@
+"""
+The animation engine for characters made of several sprites (body, legs, head and arms).
+
+An animation is a Clip: a list of frames, how many updates each frame is shown for, whether it
+loops, and events (such as footsteps) that happen when certain frames start. Clips and frames
+are referred to by integer ids, so updating an animation is just counting and indexing lists.
+An Animator plays clips, and a Character uses one to advance its whole rig in one update.
+
+Example usage.
+    class Zombie(an.Character):
+        character_folder = 'zombie'
+
+Import this as 'an' for consistency.
+"""
+
+import math
+import arcade
+from arcade.texture import Matrix3x3
+import PIL.Image
+import game_constants as c
+import game_functions as f
+import game_rig as rg
+import game_transforms as tf
+
+# Clip ids. These index the list of clips a character has.
+CLIP_IDLE = 0
+CLIP_WALK = 1
+CLIP_RUN = 2
+CLIP_JUMP = 3
+CLIP_CLIMB = 4
+CLIP_FIRE_ONE_HANDED = 5
+
+# The body part folders every character has, each holding the frames of the clips.
+PART_FOLDERS = ['body', 'legs', 'front_arms', 'back_arms']
+
+# Textures for each character folder, so they're only looked up once however many characters there are.
+rig_textures = {}
+
+# Composite textures of the legs, back arm and body in each pose, for each character folder.
+pose_textures = {}
+
+
+class Clip:
+    """One animation. The offsets are, for each frame, where the head and the arms go
+        relative to the body, in the unscaled pixels of the frame image."""
+
+    def __init__(self, frame_names, ticks_per_frame, loop=True, events=None,
+                 head_offsets=None, arm_offsets=None, aimed=False):
+        # The image file names, without the '.png', in each body part folder.
+        self.frame_names = frame_names
+        self.frame_count = len(frame_names)
+
+        # How many updates each frame is shown for, and so how many updates the whole clip takes.
+        self.ticks_per_frame = ticks_per_frame
+        self.length = self.frame_count * ticks_per_frame
+
+        # Whether the clip starts again at the end, or stays on the last frame.
+        self.loop = loop
+
+        # Aimed clips are for parts that rotate towards the mouse, so they're flipped vertically to face left.
+        self.aimed = aimed
+
+        # For each update of the clip, its frame, and the event that happens on it (or None).
+        self.tick_frames = [tick // ticks_per_frame for tick in range(self.length)]
+        self.tick_events = [None] * self.length
+        for frame, event in (events or {}).items():
+            self.tick_events[frame * ticks_per_frame] = event
+
+        # Offsets are scaled up front, since they're used every update.
+        self.head_offsets = [(x * c.PIXEL_SCALING, y * c.PIXEL_SCALING) for x, y in head_offsets or []]
+        self.arm_offsets = [(x * c.PIXEL_SCALING, y * c.PIXEL_SCALING) for x, y in arm_offsets or []]
+
+
+class Animator:
+    """Plays clips from a list of clips, one at a time."""
+
+    def __init__(self, clips, clip_id=CLIP_IDLE):
+        self.clips = clips
+        self.clip_id = clip_id
+        self.clip = clips[clip_id]
+
+        # How many updates into the clip, and the frame that is on.
+        self.tick = 0
+        self.frame = 0
+
+        # Whether a clip that doesn't loop has got to its end.
+        self.finished = False
+
+    def start(self, clip_id):
+        """Plays a clip from its first frame. Returns the event on that frame, if there is one."""
+        self.clip_id = clip_id
+        self.clip = self.clips[clip_id]
+        self.tick = 0
+        self.frame = 0
+        self.finished = False
+        return self.clip.tick_events[0]
+
+    def play(self, clip_id, advance=True):
+        """Carries on playing a clip, switching to it if another one was playing.
+            Returns the event that happened this update, if there is one."""
+        if clip_id != self.clip_id:
+            # Switching clips keeps the same tick, the same way walking turns into running mid-stride,
+            # unless the new clip is too short for it.
+            self.clip_id = clip_id
+            self.clip = self.clips[clip_id]
+            self.finished = False
+            if self.tick >= self.clip.length:
+                self.tick = 0
+            self.frame = self.clip.tick_frames[self.tick]
+
+        if advance:
+            return self.advance()
+        return None
+
+    def advance(self):
+        """Moves the current clip on by one update. Returns the event that happened, if there is one."""
+        if self.finished:
+            return None
+
+        clip = self.clip
+        self.tick += 1
+        if self.tick >= clip.length:
+            if clip.loop:
+                self.tick = 0
+            else:
+                self.tick = clip.length - 1
+                self.finished = True
+                return None
+
+        self.frame = clip.tick_frames[self.tick]
+        return clip.tick_events[self.tick]
+
+
+# x, y co-ordinates of the centre of the head for each frame of the body's animations.
+head_positions_idle = [[1, 23]]
+
+head_positions_idle_to_jump = [[1, 24], [2, 25], [3, 20], [3, 16], [3, 17], [2, 24], [2, 30], [1, 26],
+                               [1, 24], [0, 25], [-1, 26], [-1, 26], [1, 25], [-1, 23], [-1, 22], [-1, 22]]
+
+head_positions_run = [[9, 23], [10, 20], [16, 23], [8, 24], [8, 22]]
+
+head_positions_walk = [[-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 23]]
+
+# x, y co-ordinates of the arms for each frame of the body's animations.
+arms_positions_idle = [[1, 23]]
+
+arms_positions_idle_to_jump = [[1, 24], [2, 25], [3, 20], [3, 16], [3, 17], [2, 24], [2, 30], [1, 26],
+                               [1, 24], [0, 25], [-1, 26], [-1, 26], [1, 25], [-1, 23], [-1, 22], [-1, 22]]
+
+arms_positions_run = [[9, 23], [10, 20], [16, 23], [8, 24], [8, 22]]
+
+arms_positions_walk = [[-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 23]]
+
+# The clips of a human character, in clip id order. Footsteps are the sound names without their number.
+HUMAN_CLIPS = [Clip(['idle_to_walk_0'], ticks_per_frame=1,
+                    head_offsets=head_positions_idle, arm_offsets=arms_positions_idle),
+               Clip([f'walk_{i}' for i in range(9)], ticks_per_frame=c.UPDATES_PER_FRAME,
+                    events={0: 'walk_grass', 4: 'walk_grass'},
+                    head_offsets=head_positions_walk, arm_offsets=arms_positions_walk),
+               Clip([f'run_{i}' for i in range(5)], ticks_per_frame=c.UPDATES_PER_FRAME,
+                    events={0: 'run_grass', 2: 'run_grass'},
+                    head_offsets=head_positions_run, arm_offsets=arms_positions_run),
+               Clip([f'idle_to_jump_{i}' for i in range(16)], ticks_per_frame=c.UPDATES_PER_FRAME,
+                    head_offsets=head_positions_idle_to_jump, arm_offsets=arms_positions_idle_to_jump),
+               Clip(['idle_to_walk_0', 'idle_to_walk_0'], ticks_per_frame=c.CLIMB_UPDATES_PER_FRAME,
+                    head_offsets=head_positions_idle * 2, arm_offsets=arms_positions_idle * 2),
+               Clip([f'one_handed_firing_{i}' for i in range(5)], ticks_per_frame=c.GUN_UPDATES_PER_FRAME,
+                    loop=False, aimed=True)]
+
+
+def load_rig_textures(character_folder, clips):
+    """Returns, for each body part folder, a list with the texture pairs of every frame of each clip.
+        Aimed clips are only loaded for the front arms, since that's the only part that aims."""
+    key = (character_folder, id(clips))
+    textures = rig_textures.get(key)
+    if textures is not None:
+        return textures
+
+    textures = {}
+    for part in PART_FOLDERS:
+        part_textures = []
+        for clip in clips:
+            if clip.aimed and part != 'front_arms':
+                part_textures.append(None)
+                continue
+            load_pair = f.load_texture_pair_vertical_flip if clip.aimed else f.load_texture_pair
+            part_textures.append([load_pair(f'resources/images/characters/{character_folder}/{part}/{name}.png')
+                                  for name in clip.frame_names])
+        textures[part] = part_textures
+    textures['head'] = f.load_texture_pair_vertical_flip(f'resources/images/characters/{character_folder}/head/head.png')
+
+    rig_textures[key] = textures
+    return textures
+
+
+def load_pose_textures(character_folder, clips):
+    """Returns, for each clip, a list with the texture pair of every frame made from the legs,
+        back arm and body drawn over each other, in the order they're drawn. The three are the same
+        size and drawn in the same place, so one sprite with this texture looks the same as the three.
+        Aimed clips don't have a body to draw, so are None. Made the first time they're asked for,
+        and put in the characters atlas group, so preloading it packs them with the rest."""
+    key = (character_folder, id(clips))
+    textures = pose_textures.get(key)
+    if textures is not None:
+        return textures
+
+    part_textures = load_rig_textures(character_folder, clips)
+    textures = []
+    for clip_id, clip in enumerate(clips):
+        if clip.aimed:
+            textures.append(None)
+            continue
+        frames = []
+        for frame in range(clip.frame_count):
+            pair = []
+            for direction in (c.RIGHT_FACING, c.LEFT_FACING):
+                parts = [part_textures[part][clip_id][frame][direction] for part in ('legs', 'back_arms', 'body')]
+                image = parts[0].image
+                for part in parts[1:]:
+                    image = PIL.Image.alpha_composite(image, part.image)
+                # Named after its parts, so frames that look the same (e.g. climbing) share a texture.
+                name = 'pose-' + '-'.join(part.name for part in parts)
+                pair.append(f.add_texture(name, image, 'characters'))
+            frames.append(pair)
+        textures.append(frames)
+
+    pose_textures[key] = textures
+    return textures
+
+
+class RigPart:
+    """One of the sprites that make up a character, other than the body. Its texture and position
+        are set by the character it belongs to, and it's only ever drawn, never collided with.
+
+        Rather than an arcade.Sprite, this is a slim sprite with only what a sprite list needs to
+        draw it: a position, angle, size, colour and texture. It has no hit box, and setting any
+        of those writes the new value straight into the buffers of the sprite lists it's in.
+        It can't go in a sprite list with a spatial hash, which needs hit boxes. Colour and alpha
+        are only read when the sprite list builds its buffers."""
+
+    __slots__ = ('sprite_lists', '_position', '_angle', '_texture', '_width', '_height',
+                 'scale', 'color', 'alpha', 'character_face_direction')
+
+    # Sprite lists read this off their first sprite. Parts never transform their textures.
+    texture_transform = Matrix3x3()
+
+    def __init__(self):
+        # The sprite lists this is in, as for arcade.Sprite.
+        self.sprite_lists = []
+
+        self._position = (0.0, 0.0)
+        self._angle = 0.0
+        self._texture = None
+        self._width = 0.0
+        self._height = 0.0
+
+        self.scale = c.PIXEL_SCALING
+        self.color = (255, 255, 255)
+        self.alpha = 255
+
+        # Default to face-right.
+        self.character_face_direction = c.RIGHT_FACING
+
+    def _get_position(self):
+        return self._position
+
+    def _set_position(self, new_value):
+        if new_value[0] != self._position[0] or new_value[1] != self._position[1]:
+            self._position = new_value
+            for sprite_list in self.sprite_lists:
+                sprite_list.update_location(self)
+
+    position = property(_get_position, _set_position)
+
+    def _get_center_x(self):
+        return self._position[0]
+
+    def _set_center_x(self, new_value):
+        self._set_position((new_value, self._position[1]))
+
+    center_x = property(_get_center_x, _set_center_x)
+
+    def _get_center_y(self):
+        return self._position[1]
+
+    def _set_center_y(self, new_value):
+        self._set_position((self._position[0], new_value))
+
+    center_y = property(_get_center_y, _set_center_y)
+
+    def _get_angle(self):
+        return self._angle
+
+    def _set_angle(self, new_value):
+        if new_value != self._angle:
+            self._angle = new_value
+            for sprite_list in self.sprite_lists:
+                sprite_list.update_angle(self)
+
+    angle = property(_get_angle, _set_angle)
+
+    def _get_texture(self):
+        return self._texture
+
+    def _set_texture(self, texture):
+        if texture is self._texture:
+            return
+        self._texture = texture
+        width = texture.width * self.scale
+        height = texture.height * self.scale
+        resized = width != self._width or height != self._height
+        self._width = width
+        self._height = height
+        for sprite_list in self.sprite_lists:
+            sprite_list.update_texture(self)
+            if resized:
+                sprite_list.update_size(self)
+
+    texture = property(_get_texture, _set_texture)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    def register_sprite_list(self, sprite_list):
+        """Called by a sprite list when this is added to it."""
+        self.sprite_lists.append(sprite_list)
+
+    def remove_from_sprite_lists(self):
+        """Takes this out of every sprite list it's in."""
+        for sprite_list in list(self.sprite_lists):
+            sprite_list.remove(self)
+
+    # Sprite lists call these on everything in them. A part is only moved by its character.
+    def update(self):
+        pass
+
+    def on_update(self, delta_time=1 / 60):
+        pass
+
+    def update_animation(self, delta_time=1 / 60):
+        pass
+
+
+class Character(arcade.Sprite):
+    """A character's body, which animates and positions its legs, head and arms along with it.
+        Subclasses set the folder in 'resources/images/characters' their frames are in.
+
+        With composite poses, the body's texture has the legs and back arm drawn into it, and only the
+        body, head and front arm are drawn. The legs and back arm sprites are then left alone."""
+
+    character_folder = None
+    clips = HUMAN_CLIPS
+    composite_poses = False
+
+    def __init__(self, composite_poses=None):
+        # Set up parent class.
+        super().__init__()
+
+        # Whether to draw with composite poses, if not the default for the class.
+        if composite_poses is not None:
+            self.composite_poses = composite_poses
+
+        # Default to face-right.
+        self.character_face_direction = c.RIGHT_FACING
+
+        self.scale = c.PIXEL_SCALING
+
+        # Track our state.
+        self.jumping = False
+        self.climbing = False
+        self.is_on_ladder = False
+        self.idling = False
+        self.can_jump = False
+        self.sprinting = False
+        self.firing = False
+
+        # Whether the character is armed in any sort of way.
+        self.equipped_any = False
+
+        # Whether the character has a one-handed gun or not.
+        self.equipped_one_handed = False
+
+        # Whether the character has a two-handed gun or not.
+        self.equipped_two_handed = False
+
+        # One animator for the whole body, and one for the front arm firing over the top of it.
+        self.animator = Animator(self.clips)
+        self.fire_animator = Animator(self.clips, CLIP_FIRE_ONE_HANDED)
+        self.fire_animator.finished = True
+
+        # Texture pairs, by part, then clip id, then frame.
+        self.textures_by_part = load_rig_textures(self.character_folder, self.clips)
+        self.body_textures = self.textures_by_part['body']
+        self.legs_textures = self.textures_by_part['legs']
+        self.front_arm_textures = self.textures_by_part['front_arms']
+        self.back_arm_textures = self.textures_by_part['back_arms']
+        self.head_textures = self.textures_by_part['head']
+        self.pose_textures = load_pose_textures(self.character_folder, self.clips) if self.composite_poses else None
+
+        # Where the parts go on the body, for every frame and every way they can face.
+        self.rig_table = rg.get_rig_table(self.clips, CLIP_IDLE)
+
+        # Events from the clips, such as footsteps, since the owner last cleared them.
+        self.animation_events = []
+
+        # Mouse position.
+        self.mouse_pos_x = 0
+        self.mouse_pos_y = 0
+
+        # The angle, in degrees, from the middle of the gun arm to the mouse pointer, and which side of
+        # the character it's on, as of the last update_appendages(). Shared by the head, the front arm
+        # and the bullets the character fires, so it's only worked out once an update.
+        self.aim_angle = 0.0
+        self.aim_facing = c.RIGHT_FACING
+
+        # Set up the legs, the two arms sprites, and the head.
+        self.legs = RigPart()
+        self.head = RigPart()
+        self.front_arm = RigPart()
+        self.back_arm = RigPart()
+
+        # Where each part is, attached to the body, and the muzzle of the gun, attached to the front arm.
+        # Parts are only moved when their transforms change.
+        self.transform = tf.Transform()
+        self.legs_transform = tf.Transform(self.transform)
+        self.head_transform = tf.Transform(self.transform)
+        self.front_arm_transform = tf.Transform(self.transform)
+        self.back_arm_transform = tf.Transform(self.transform)
+        self.muzzle_transform = tf.Transform(self.front_arm_transform, x=c.GUN_MUZZLE_DISTANCE)
+
+        # Everything besides the body's position the parts were last positioned from, or None if positioning
+        # them again might move them, so update_appendages() can tell when there's nothing to do.
+        self.rig_pose = None
+
+        # The sprites to draw, back to front, and the parts that are drawn with their transforms.
+        if self.composite_poses:
+            self.parts = (self, self.head, self.front_arm)
+            self.rig_parts = ((self.head, self.head_transform), (self.front_arm, self.front_arm_transform))
+        else:
+            self.parts = (self.legs, self.back_arm, self, self.head, self.front_arm)
+            self.rig_parts = ((self.legs, self.legs_transform), (self.back_arm, self.back_arm_transform),
+                              (self.head, self.head_transform), (self.front_arm, self.front_arm_transform))
+
+        # Set the initial textures.
+        self.update_textures()
+        self.head.texture = self.head_textures[self.head.character_face_direction]
+
+        # Hit box will be set based on the first image used. If you want to specify
+        # a different hit box, you can do it like the code below.
+        self.set_hit_box([[-10, -31], [-7, 32], [7, 32], [10, -31]])
+
+    def acquire_mouse_position(self, x, y):
+        """Get the mouse x and y from the Game class."""
+        self.mouse_pos_x = x
+        self.mouse_pos_y = y
+
+    def on_animation_event(self, event):
+        """Called when a clip gets to a frame with an event on it. Events are kept
+            for whoever owns the character to deal with, e.g. playing footstep sounds."""
+        self.animation_events.append(event)
+
+    def update_textures(self):
+        """Sets the texture of every part from the frame the animators are on."""
+        clip_id = self.animator.clip_id
+        frame = self.animator.frame
+        direction = self.character_face_direction
+
+        if self.composite_poses:
+            self.texture = self.pose_textures[clip_id][frame][direction]
+        else:
+            self.texture = self.body_textures[clip_id][frame][direction]
+            self.legs.texture = self.legs_textures[clip_id][frame][direction]
+            self.back_arm.texture = self.back_arm_textures[clip_id][frame][direction]
+
+        # The front arm fires over the top of the body's animation, and holds the gun still when it isn't.
+        if self.firing:
+            fire_clip_id = self.fire_animator.clip_id
+            self.front_arm.texture = self.front_arm_textures[fire_clip_id][self.fire_animator.frame][direction]
+        elif self.equipped_one_handed:
+            self.front_arm.texture = self.front_arm_textures[CLIP_FIRE_ONE_HANDED][0][direction]
+        else:
+            self.front_arm.texture = self.front_arm_textures[clip_id][frame][direction]
+
+    def update_appendages(self):
+        """Positions the legs, head and arms on the body, reading the offsets for the frame
+            the body is on and the way everything faces from the rig table.
+
+            Does nothing if the body hasn't moved, and the frame, the way it faces, what it's holding
+            and the mouse pointer are the same as when the parts were last put in place."""
+        body = self.transform
+        body.set_local(self.center_x, self.center_y)
+        armed = self.equipped_one_handed or self.equipped_two_handed
+
+        # If the body has moved, every part moves with it, so there's no need to compare the rest.
+        pose = None
+        if not body.dirty:
+            pose = (self.animator.clip_id, self.animator.frame, self.character_face_direction, self.sprinting,
+                    armed, self.mouse_pos_x, self.mouse_pos_y)
+            if pose == self.rig_pose:
+                return
+        body.update()
+
+        table = self.rig_table
+        index = table.clip_starts[self.animator.clip_id] + self.animator.frame
+        facing_index = index * 2 + self.character_face_direction
+
+        # Legs, unless they're drawn as part of the body.
+        composite_poses = self.composite_poses
+        if not composite_poses:
+            self.legs_transform.set_local(table.legs_x[facing_index], table.legs_y[facing_index])
+
+        # Aim from the middle of the gun arm, where it was across given which way it pointed last update.
+        # Bullets come out of the muzzle along the same line, so they go through the mouse pointer.
+        # If that turns it to the other side, the arm moves across, so aim again from there.
+        last_look = rg.get_look(self.aim_angle)
+        aim_x = body.world_x + table.aimed_arm_x[(facing_index * 2 + last_look) * 2 + self.sprinting]
+        aim_y = body.world_y + table.aimed_arm_y[index]
+        aim_angle = self.solve_aim(aim_x, aim_y)
+        look = rg.get_look(aim_angle)
+        if look != last_look:
+            aim_x = body.world_x + table.aimed_arm_x[(facing_index * 2 + look) * 2 + self.sprinting]
+            aim_angle = self.solve_aim(aim_x, aim_y)
+            look = rg.get_look(aim_angle)
+
+        # Head, turned to look towards the mouse pointer.
+        head = self.head
+        head.character_face_direction = self.aim_facing
+        self.head_transform.set_local(table.head_x[facing_index * 2 + look], table.head_y[index], aim_angle)
+        head.texture = self.head_textures[head.character_face_direction]
+
+        # Front arm. Holding a gun, it points it at the mouse pointer.
+        if armed:
+            self.front_arm.character_face_direction = self.aim_facing
+            self.front_arm_transform.set_local(table.aimed_arm_x[(facing_index * 2 + look) * 2 + self.sprinting],
+                                               table.aimed_arm_y[index], aim_angle)
+        else:
+            self.front_arm_transform.set_local(table.arm_x[facing_index], table.arm_y[index])
+
+        # Back arm, unless it's drawn as part of the body.
+        if not composite_poses:
+            self.back_arm_transform.set_local(table.back_arm_x[facing_index], table.back_arm_y[facing_index])
+
+        # Move the parts whose transforms changed. Each part's position is set in one go, since arcade updates the
+        # sprite lists for every change. If none have, the parts are settled, and doing this again with
+        # the same pose would leave them where they are.
+        moved = False
+        for part, transform in self.rig_parts:
+            if transform.update():
+                part.position = (transform.world_x, transform.world_y)
+                part.angle = transform.world_angle
+                moved = True
+        self.rig_pose = None if moved else pose
+
+    def solve_aim(self, x, y):
+        """Works out the angle, in degrees, from a position to the mouse pointer, and which side of it
+            the pointer is on. The angle is rounded to a step of c.AIM_ANGLE_STEP, if angles are stepped."""
+        dest_x = self.mouse_pos_x
+        if dest_x > x:
+            self.aim_facing = c.RIGHT_FACING
+        elif dest_x < x:
+            self.aim_facing = c.LEFT_FACING
+
+        self.aim_angle = tf.step_angle(math.degrees(math.atan2(self.mouse_pos_y - y, dest_x - x)))
+        return self.aim_angle
+
+    def get_aim_direction(self):
+        """The cosine and sine of the angle the character aims at, as of the last update_appendages()."""
+        return tf.get_direction(self.aim_angle)
+
+    def get_legs_hit_box(self):
+        """The outline of the legs' art where they are, as of the last update_appendages(). Parts have
+            no hit boxes of their own, so this is worked out from the frame the legs are drawn with."""
+        legs = self.legs
+        x, y = legs.position
+        scale = legs.scale
+        return [(x + point_x * scale, y + point_y * scale) for point_x, point_y in legs.texture.hit_box_points]
+
+    def get_muzzle_position(self):
+        """Where the muzzle of the gun in the front arm is, as of the last update_appendages()."""
+        muzzle = self.muzzle_transform
+        muzzle.update()
+        return muzzle.world_x, muzzle.world_y
+
+    def update_animation(self, delta_time: float = 1 / 60):
+        """Advances the animation of the whole character, then puts its parts in place."""
+        # Figure out if we need to flip face left or right.
+        if self.change_x < 0 and self.character_face_direction == c.RIGHT_FACING:
+            self.character_face_direction = c.LEFT_FACING
+        elif self.change_x > 0 and self.character_face_direction == c.LEFT_FACING:
+            self.character_face_direction = c.RIGHT_FACING
+
+        # CLIMBING animation, which only moves on while climbing up or down.
+        self.climbing = self.is_on_ladder
+        self.jumping = False
+        self.idling = False
+        if self.climbing:
+            event = self.animator.play(CLIP_CLIMB, advance=abs(self.change_y) > 1)
+
+        # JUMPING animation, going up or coming down.
+        elif self.change_y != 0:
+            self.jumping = True
+            event = self.animator.play(CLIP_JUMP)
+
+        # IDLE animation.
+        elif self.change_x == 0:
+            self.idling = True
+            event = self.animator.play(CLIP_IDLE, advance=False)
+
+        # RUNNING and WALKING animations.
+        elif self.sprinting:
+            event = self.animator.play(CLIP_RUN)
+        else:
+            event = self.animator.play(CLIP_WALK)
+
+        if event is not None:
+            self.on_animation_event(event)
+
+        # Fire one-handed weapon. Each shot plays the firing clip through once.
+        if self.firing:
+            if self.fire_animator.finished:
+                self.fire_animator.start(CLIP_FIRE_ONE_HANDED)
+            else:
+                self.fire_animator.advance()
+
+        self.update_textures()
+        if self.fire_animator.finished:
+            self.firing = False
+
+        self.update_appendages()
@@ -2,12 +2,19 @@
 For all of the game's audio files, these are all loaded
 into the game using the load_audio function.
 
+Sounds during play go through a Mixer, so however much is going on, only so many play at once.
+
 Import this as 'a' for consistency.
 """
-import arcade
+import time
+from pyglet import media
+import game_constants as c
+import game_pack as pk
 
 # Example usage.
 # arcade.play_sound(a.sound[f'jump_1'])
+# Or during play, with mixer = a.Mixer():
+# mixer.play('jump_1')
 
 # Contains the names of all the audio files in the game
 # once the 'add_audio_to_list()' is called.
@@ -20,6 +27,9 @@ sound = {}
 
 def add_audio_to_list():
     """Loads all the names of the audio files and puts them into audio_list."""
+    # Only needs doing once, no matter how many times the game is started.
+    if audio_list:
+        return audio_list
     audio_list.append('ak_47_fire')
     audio_list.append('ak_47_reload')
     audio_list.append('clip_load')
@@ -55,7 +65,179 @@ def add_audio_to_list():
     return audio_list
 
 
+def load_sound(name):
+    """Loads a single sound into the dictionary, if it isn't loaded already.
+        Comes from the asset pack if it has been built. Safe to call from the background loader."""
+    if name not in sound:
+        sound[name] = pk.load_sound(f'resources/audio/{name}.wav')
+
+
 def load_audio():
     for i in audio_list:
         # Load the audio into the dictionary.
-        sound[f'{i}'.format(i)] = arcade.load_sound(f'resources/audio/{i}.wav')
+        load_sound(i)
+
+
+# -- MIXER -- #
+
+
+# Kinds of sound, with how many voices each may have at once and how important it is.
+# A sound can take over a voice playing a sound of the same or a lower priority.
+CATEGORIES = {'footsteps': (c.MIXER_FOOTSTEP_VOICES, 0),
+              'weapons': (c.MIXER_WEAPON_VOICES, 1),
+              'explosions': (c.MIXER_EXPLOSION_VOICES, 2)}
+
+# The kind of each sound, worked out from its name the first time it's played.
+sound_categories = {}
+
+
+def get_category(name):
+    """Which kind of sound a sound is. Footsteps, landings and jumps count as footsteps,
+        and anything to do with guns as weapons."""
+    category = sound_categories.get(name)
+    if category is None:
+        if name.startswith(('walk_', 'run_', 'landing_', 'jump_')):
+            category = 'footsteps'
+        elif name.startswith('explosion'):
+            category = 'explosions'
+        else:
+            category = 'weapons'
+        sound_categories[name] = category
+    return category
+
+
+class VoicePlayer(media.Player):
+    """A pyglet player that stays on its sound once it ends, rather than moving on, finding nothing
+        queued and deleting its driver player. The next sound is swapped in on the same driver player."""
+
+    def on_eos(self):
+        self.pause()
+
+
+class Voice:
+    """One of the mixer's voices, and what it's playing. A voice has a player for each audio format
+        it has played, as pyglet makes a new driver player whenever a player's format changes.
+        Those players, and their driver players, last as long as the voice."""
+
+    def __init__(self):
+        # The voice's players, by audio format, and the one playing the current or last sound.
+        self.players = {}
+        self.player = None
+
+        self.name = None
+        self.category = None
+        self.priority = 0
+
+        # When the sound started and when it will have finished, from time.perf_counter().
+        self.started = 0.0
+        self.ends = 0.0
+
+    def get_player(self, source):
+        """The voice's player for a sound's audio format, made the first time that format is played."""
+        audio_format = source.audio_format
+        key = (audio_format.channels, audio_format.sample_size, audio_format.sample_rate)
+        player = self.players.get(key)
+        if player is None:
+            player = VoicePlayer()
+            self.players[key] = player
+        return player
+
+    def start(self, name, category, priority, now):
+        """Plays a sound, cutting off whatever was playing."""
+        self.stop()
+        sound_file = sound[name]
+        self.player = self.get_player(sound_file.source)
+
+        # A player that has played before still has its last sound. Moving on to the new sound,
+        # of the same format, only clears the driver player's buffers.
+        had_sound = self.player.source is not None
+        self.player.queue(sound_file.source)
+        if had_sound:
+            self.player.next_source()
+        self.player.play()
+
+        self.name = name
+        self.category = category
+        self.priority = priority
+        self.started = now
+        self.ends = now + sound_file.get_length()
+
+    def stop(self):
+        if self.player is not None:
+            self.player.pause()
+        self.name = None
+        self.ends = 0.0
+
+
+class Mixer:
+    """Plays sounds on a fixed set of voices, made once and reused, rather than a new player for
+        every sound. Each kind of sound has a limit on how many voices it can use. Once a kind has
+        used up its voices, or every voice is in use, a new sound takes over the oldest voice that
+        is playing something no more important, or isn't played if there isn't one.
+
+        The same sound is only played once a frame, however many times it's asked for."""
+
+    def __init__(self, voices=c.MIXER_VOICES):
+        self.voices = [Voice() for _ in range(voices)]
+
+        # Names of the sounds played since update() was last called.
+        self.frame_sounds = set()
+
+        # How many sounds were played, how many of those took over a playing voice, and how many
+        # weren't played at all, since update() was last called.
+        self.played_count = 0
+        self.stolen_count = 0
+        self.dropped_count = 0
+
+    def update(self):
+        """Starts a new frame. Call it once a frame, before playing that frame's sounds."""
+        self.frame_sounds.clear()
+        self.played_count = 0
+        self.stolen_count = 0
+        self.dropped_count = 0
+
+    def find_voice(self, category, priority, now):
+        """The voice a new sound of a kind should play on, or None if it shouldn't play."""
+        playing = [voice for voice in self.voices if voice.ends > now]
+
+        limit = CATEGORIES[category][0]
+        same_category = [voice for voice in playing if voice.category == category]
+        if len(same_category) >= limit:
+            return min(same_category, key=lambda voice: voice.started)
+
+        if len(playing) < len(self.voices):
+            for voice in self.voices:
+                if voice.ends <= now:
+                    return voice
+
+        voice = min(playing, key=lambda voice: (voice.priority, voice.started))
+        if voice.priority <= priority:
+            return voice
+        return None
+
+    def play(self, name):
+        """Plays a sound from the sound dictionary, if there's a voice for it.
+            Returns the voice it's playing on, or None."""
+        if name in self.frame_sounds:
+            self.dropped_count += 1
+            return None
+        self.frame_sounds.add(name)
+
+        category = get_category(name)
+        priority = CATEGORIES[category][1]
+        now = time.perf_counter()
+        voice = self.find_voice(category, priority, now)
+        if voice is None:
+            self.dropped_count += 1
+            return None
+
+        if voice.ends > now:
+            self.stolen_count += 1
+        voice.start(name, category, priority, now)
+        self.played_count += 1
+        return voice
+
+    def stop(self):
+        """Stops every sound."""
+        for voice in self.voices:
+            voice.stop()
@@ -5,6 +5,7 @@ Import this as 'b' for consistency.
 """
 import arcade
 import game_constants as c
+import game_functions as f
 
 
 class Background(arcade.Sprite):
@@ -18,8 +19,8 @@ class Background(arcade.Sprite):
         self.scale = c.PIXEL_SCALING
 
         # Sprite texture.
-        self.mountains_texture = arcade.load_texture('resources/images/backgrounds/test.png')
-        self.close_texture = arcade.load_texture('resources/images/backgrounds/close.png')
+        self.mountains_texture = f.load_texture('resources/images/backgrounds/test.png')
+        self.close_texture = f.load_texture('resources/images/backgrounds/close.png')
 
         self.texture_type = texture_type
 
@@ -0,0 +1,1097 @@
+"""
+Benchmarks for the game's loading and update code.
+
+Run one with, for example:
+
+    python game_benchmarks.py startup
+
+Anything after the name is passed to the benchmark in the order of its parameters, e.g. a recording
+for the replay benchmark, or a level and a number of steps for the simulation. Lists of numbers are
+separated by commas:
+
+    python game_benchmarks.py replay session.replay
+    python game_benchmarks.py simulation 2 1200
+    python game_benchmarks.py enemies 100,1000
+
+See 'python game_benchmarks.py <benchmark> -h' for each benchmark's arguments.
+
+The suite times synthetic scenes built from the game's own classes, and saves the results as JSON.
+Give it the results from another commit to compare against them:
+
+    python game_benchmarks.py suite results.json baseline.json
+
+Import this as 'bm' for consistency.
+"""
+
+import os
+import sys
+import subprocess
+import timeit
+
+# Benchmarks are run from the game folder, so the relative resource paths work.
+GAME_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+
+# -- STARTUP -- #
+
+
+def load_startup_assets():
+    """Loads everything the game loads between launching and the first frame of gameplay:
+        the menu and intro images, all the audio, and every character and effect frame."""
+    import game_functions as f
+    import game_audio as a
+    import game_player as p
+    import game_entities as e
+
+    f.load_texture('resources/images/ui/main_menu.png')
+    f.load_texture('resources/images/ui/new_game_regular.png')
+    f.load_texture('resources/images/ui/new_game_hover.png')
+    f.load_texture('resources/images/ui/instructions_text.png')
+    for i in range(12):
+        f.load_texture(f'resources/images/cutscene/auckland_{i}.png')
+
+    a.add_audio_to_list()
+    a.load_audio()
+
+    p.PlayerCharacter()
+    e.Enemy()
+
+    for i in range(8):
+        f.load_texture(f'resources/images/effects/dirt_{i}.png')
+    for i in range(5):
+        f.load_texture(f'resources/images/effects/barrel_{i}.png')
+    for i in range(20):
+        f.load_texture(f'resources/images/effects/barrel_explosion/{i}.png')
+
+
+def startup_child(use_pack):
+    """Runs in a fresh process. Times the imports and the asset loading, and prints the results."""
+    start_time = timeit.default_timer()
+
+    import game_pack as pk
+    if not use_pack:
+        pk.pack = None
+    import main
+
+    import_time = timeit.default_timer() - start_time
+
+    load_startup_assets()
+
+    total_time = timeit.default_timer() - start_time
+    print(f'{import_time} {total_time - import_time}')
+
+
+def benchmark_startup(runs=3):
+    """Compares cold start up, in fresh processes, with and without the asset pack."""
+    import game_pack as pk
+
+    if pk.pack is None:
+        print(f"No asset pack at '{pk.PACK_FILE}', build it with 'python game_pack.py' first.")
+        return
+
+    for use_pack in [False, True]:
+        import_times = []
+        asset_times = []
+        for run in range(runs):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), 'startup-child', str(int(use_pack))],
+                                    cwd=GAME_FOLDER, capture_output=True, text=True, check=True).stdout
+            import_time, asset_time = output.split()[-2:]
+            import_times.append(float(import_time))
+            asset_times.append(float(asset_time))
+
+        name = 'asset pack' if use_pack else 'loose files'
+        print(f'{name:>12}: imports {min(import_times):.3f}s, assets {min(asset_times):.3f}s, '
+              f'total {min(import_times) + min(asset_times):.3f}s (best of {runs})')
+
+
+# -- RESPAWN -- #
+
+
+def benchmark_respawn(level=1, runs=10):
+    """Compares loading a level's layers on respawn by parsing the tiled map every time,
+        as setup() used to, with filling them from the compiled level."""
+    import arcade
+    import game_constants as c
+    import game_levels as lv
+
+    map_name = f'resources/maps/{level}.tmx'
+
+    def parse_map():
+        my_map = arcade.tilemap.read_tmx(map_name)
+        for layer_name in lv.LAYER_NAMES:
+            # Not every map has every layer, and arcade warns about each one that's missing.
+            if arcade.tilemap.get_tilemap_layer(my_map, layer_name) is not None:
+                arcade.tilemap.process_layer(my_map, layer_name, c.PIXEL_SCALING, use_spatial_hash=True)
+
+    def build_compiled_level():
+        compiled_level = lv.get_level(map_name)
+        for layer_name in lv.LAYER_NAMES:
+            lv.build_layer(compiled_level, layer_name)
+
+    # Both warmed up once, so the compile and the texture loading aren't counted.
+    parse_map()
+    build_compiled_level()
+
+    for name, function in [('parsed map', parse_map), ('compiled level', build_compiled_level)]:
+        times = timeit.repeat(function, number=1, repeat=runs)
+        print(f'{name:>14}: {min(times) * 1000:.1f}ms (best of {runs})')
+
+
+# -- BULLETS -- #
+
+
+def make_bullets(count, left, right, bottom, top, seed=0):
+    """Makes bullets scattered at random over an area, flying in random directions."""
+    import math
+    import random
+    import arcade
+    import game_constants as c
+    import game_functions as f
+    import game_projectiles as pj
+
+    generator = random.Random(seed)
+    texture = f.load_texture('resources/images/effects/bullet_projectile.png')
+    bullets = []
+    for _ in range(count):
+        bullet = arcade.Sprite()
+        bullet.texture = texture
+        bullet.scale = c.PIXEL_SCALING
+        bullet.set_hit_box(pj.BULLET_HIT_BOX)
+        bullet.center_x = generator.uniform(left, right)
+        bullet.center_y = generator.uniform(bottom, top)
+        bullet.angle = generator.uniform(-180, 180)
+        bullet.change_x = math.cos(math.radians(bullet.angle)) * c.BULLET_SPEED
+        bullet.change_y = math.sin(math.radians(bullet.angle)) * c.BULLET_SPEED
+        bullets.append(bullet)
+    return bullets
+
+
+def benchmark_bullets(level=1, counts=(10, 100, 500, 1000), runs=5):
+    """Compares checking bullets one at a time against the wall and barrel sprite lists,
+        as on_update used to, with one batched pass over the projectile grids."""
+    import arcade
+    import game_levels as lv
+    import game_projectiles as pj
+
+    compiled_level = lv.get_level(f'resources/maps/{level}.tmx')
+    wall_list = lv.build_layer(compiled_level, 'Walls')
+    barrel_list = lv.build_layer(compiled_level, 'Barrels')
+    wall_grid = pj.TileGrid(wall_list)
+    barrel_grid = pj.TileGrid(barrel_list)
+
+    for count in counts:
+        # Spread over the part of the map with walls in it, so plenty of them hit something.
+        bullets = make_bullets(count, wall_grid.origin_x, wall_grid.origin_x + wall_grid.columns * wall_grid.cell_size,
+                               wall_grid.origin_y, wall_grid.origin_y + wall_grid.rows * wall_grid.cell_size)
+
+        def check_one_at_a_time():
+            hits = 0
+            for bullet in bullets:
+                hits += len(arcade.check_for_collision_with_list(bullet, barrel_list))
+                hits += len(arcade.check_for_collision_with_list(bullet, wall_list))
+            return hits
+
+        def check_batched():
+            batch = pj.BulletBatch(bullets)
+            barrel_hits, _ = barrel_grid.check_for_collisions(batch)
+            wall_hits, _ = wall_grid.check_for_collisions(batch)
+            return len(barrel_hits) + len(wall_hits)
+
+        if check_one_at_a_time() != check_batched():
+            print(f'Warning, the two checks found a different number of hits with {count} bullets.')
+
+        one_at_a_time_time = min(timeit.repeat(check_one_at_a_time, number=1, repeat=runs))
+        batched_time = min(timeit.repeat(check_batched, number=1, repeat=runs))
+        print(f'{count:>5} bullets: one at a time {one_at_a_time_time * 1000:.2f}ms, '
+              f'batched {batched_time * 1000:.2f}ms (best of {runs})')
+
+
+def benchmark_raycast(level=1, counts=(1000, 5000, 10000), speeds=(1, 4), runs=5):
+    """Times casting thousands of bullet paths through the wall grid in one go, at the normal bullet
+        speed and faster. Also counts the hits only checking where bullets end up would miss."""
+    import math
+    import numpy
+    import game_constants as c
+    import game_levels as lv
+    import game_projectiles as pj
+
+    compiled_level = lv.get_level(f'resources/maps/{level}.tmx')
+    wall_grid = pj.TileGrid(lv.build_layer(compiled_level, 'Walls'))
+
+    # Half the size of a bullet's rotated hit box, at 45 degrees, which is the biggest it gets.
+    extent = 2 * c.PIXEL_SCALING * math.sqrt(2)
+
+    generator = numpy.random.default_rng(0)
+    for count in counts:
+        for speed in speeds:
+            length = c.BULLET_SPEED * speed
+            start_x = generator.uniform(wall_grid.origin_x, wall_grid.origin_x + wall_grid.columns * wall_grid.cell_size,
+                                        count)
+            start_y = generator.uniform(wall_grid.origin_y, wall_grid.origin_y + wall_grid.rows * wall_grid.cell_size,
+                                        count)
+            angles = generator.uniform(0, 2 * math.pi, count)
+            end_x = start_x + numpy.cos(angles) * length
+            end_y = start_y + numpy.sin(angles) * length
+
+            def cast():
+                return wall_grid.raycast(start_x, start_y, end_x, end_y, extent, extent)
+
+            hits = len(cast()[0])
+
+            # Hits found only by checking the ends of the paths.
+            ends = pj.get_segment_fractions(end_x[:, None], end_y[:, None], 0, 0,
+                                            wall_grid.left - extent, wall_grid.right + extent,
+                                            wall_grid.bottom - extent, wall_grid.top + extent)
+            end_hits = numpy.isfinite(ends).any(axis=1).sum()
+
+            cast_time = min(timeit.repeat(cast, number=1, repeat=runs))
+            print(f'{count:>6} rays of {length:>4}px: {cast_time * 1000:.2f}ms, '
+                  f'{cast_time / count * 1e6:.2f}us a ray, {hits} hits '
+                  f'({hits - end_hits} missed by only checking the ends) (best of {runs})')
+
+
+# -- RIG -- #
+
+
+def make_characters(count, seed=0, left=0, right=5000, bottom=0, top=3000, moving=False, composite_poses=None):
+    """Makes players and enemies, alternately, each in a random mix of animation frame, facing,
+        sprinting and holding a gun. Moving ones are also walking, running, jumping or climbing,
+        so update_animation keeps them animating. Composite poses are the default for each class if None."""
+    import random
+    import game_animation as an
+    import game_constants as c
+    import game_player as p
+    import game_entities as e
+
+    generator = random.Random(seed)
+    body_clip_ids = [an.CLIP_IDLE, an.CLIP_WALK, an.CLIP_RUN, an.CLIP_JUMP, an.CLIP_CLIMB]
+
+    characters = []
+    for i in range(count):
+        character = p.PlayerCharacter(composite_poses) if i % 2 == 0 else e.Enemy(composite_poses)
+        character.center_x = generator.uniform(left, right)
+        character.center_y = generator.uniform(bottom, top)
+        character.character_face_direction = generator.randint(0, 1)
+        character.sprinting = generator.random() < 0.5
+        character.equipped_one_handed = generator.random() < 0.5
+        character.acquire_mouse_position(generator.uniform(left, right), generator.uniform(bottom, top))
+
+        clip_id = generator.choice(body_clip_ids)
+        character.animator.start(clip_id)
+        character.animator.frame = generator.randrange(an.HUMAN_CLIPS[clip_id].frame_count)
+
+        if moving:
+            # Only the flags update_animation picks a clip from, the characters don't actually move.
+            side = 1 if character.character_face_direction == c.RIGHT_FACING else -1
+            speed = c.PLAYER_RUN_SPEED if character.sprinting else c.PLAYER_WALK_SPEED
+            character.change_x = 0 if clip_id == an.CLIP_IDLE else side * speed
+            character.change_y = c.PLAYER_WALK_SPEED if clip_id in (an.CLIP_JUMP, an.CLIP_CLIMB) else 0
+            character.is_on_ladder = clip_id == an.CLIP_CLIMB
+        characters.append(character)
+    return characters
+
+
+def benchmark_rig(counts=(1, 10, 100, 1000), runs=5, seed=0):
+    """Times positioning the parts of many characters with update_appendages, with each character
+        in a random mix of animation frame, facing, sprinting and holding a gun. Moving characters
+        are moved a pixel each time, settled ones stay still, so their parts don't need moving."""
+    for count in counts:
+        characters = make_characters(count, seed)
+
+        def update_moving():
+            for character in characters:
+                character.center_x += 1
+                character.update_appendages()
+
+        def update_settled():
+            for character in characters:
+                character.update_appendages()
+
+        moving_time = min(timeit.repeat(update_moving, number=1, repeat=runs))
+        update_settled()
+        update_settled()
+        settled_time = min(timeit.repeat(update_settled, number=1, repeat=runs))
+        print(f'{count:>5} characters: moving {moving_time * 1000:.3f}ms, '
+              f'{moving_time / count * 1e6:.2f}us a character, settled {settled_time * 1000:.3f}ms, '
+              f'{settled_time / count * 1e6:.2f}us a character (best of {runs})')
+
+
+# -- ENEMIES -- #
+
+
+def make_enemy_manager(count, seed=0, screens=10):
+    """An enemy manager with enemies scattered over a level that many screens wide,
+        so about one in that many are on the screen at the bottom left."""
+    import numpy
+    import arcade
+    import game_constants as c
+    import game_entities as e
+
+    generator = numpy.random.default_rng(seed)
+    enemies = e.EnemyManager(arcade.SpriteList())
+    enemies.add_enemies(generator.uniform(0, c.SCREEN_WIDTH * screens, count),
+                        generator.uniform(0, c.SCREEN_HEIGHT, count))
+    return enemies
+
+
+def benchmark_enemies(counts=(100, 1000, 5000), runs=5, updates=60):
+    """Times moving enemies on in batches, and only updating the sprites of those on the screen,
+        against every enemy sprite walking and animating itself."""
+    import game_constants as c
+
+    for count in counts:
+        enemies = make_enemy_manager(int(count))
+        player_x, player_y = c.SCREEN_WIDTH / 2, c.SCREEN_HEIGHT / 2
+
+        def update_batched():
+            for _ in range(updates):
+                enemies.update(player_x, player_y)
+                enemies.sync(0, 0)
+
+        def update_sprites():
+            for _ in range(updates):
+                for enemy in enemies.enemies:
+                    enemy.center_x += enemy.change_x
+                    enemy.update_animation()
+                    enemy.animation_events.clear()
+
+        # Walking, so every sprite has a clip to play.
+        for enemy in enemies.enemies:
+            enemy.change_x = c.ENEMY_WALK_SPEED
+
+        batched_time = min(timeit.repeat(update_batched, number=1, repeat=runs)) / updates
+        sprites_time = min(timeit.repeat(update_sprites, number=1, repeat=runs)) / updates
+        print(f'{count:>5} enemies, {enemies.shown.sum()} on screen: batched {batched_time * 1000:.3f}ms, '
+              f'every sprite {sprites_time * 1000:.3f}ms an update (best of {runs})')
+
+
+# -- LEVEL OF DETAIL -- #
+
+
+def update_patrol(sprite, steps):
+    """Moves a sprite on by a number of updates, going back and forth with its centre between its
+        left and right boundaries. Where it ends up is worked out directly, so missing a lot of
+        updates costs no more than missing one."""
+    left = sprite.boundary_left
+    width = sprite.boundary_right - left
+    speed = abs(sprite.change_x)
+
+    # How far along one lap, there and back, the sprite is.
+    distance = sprite.center_x - left if sprite.change_x > 0 else 2 * width - (sprite.center_x - left)
+    distance = (distance + speed * steps) % (2 * width)
+    if distance <= width:
+        sprite.center_x = left + distance
+        sprite.change_x = speed
+    else:
+        sprite.center_x = left + 2 * width - distance
+        sprite.change_x = -speed
+    return True
+
+
+def benchmark_lod(counts=(100, 1000, 10000), runs=5, updates=60, screens=20):
+    """Times sprites patrolling a level that many screens wide, updated by a lod.LodScheduler
+        with the screen at the bottom left, against updating every sprite every update."""
+    import random
+    import arcade
+    import game_constants as c
+    import game_functions as f
+    import game_lod as lod
+
+    texture = f.load_texture('resources/images/effects/bullet_projectile.png')
+    for count in counts:
+        generator = random.Random(0)
+        sprites = []
+        for _ in range(int(count)):
+            sprite = arcade.Sprite()
+            sprite.texture = texture
+            sprite.center_x = generator.uniform(0, c.SCREEN_WIDTH * screens)
+            sprite.center_y = generator.uniform(0, c.SCREEN_HEIGHT * 2)
+            sprite.change_x = generator.uniform(-5, 5)
+            sprite.boundary_left = sprite.center_x - 300
+            sprite.boundary_right = sprite.center_x + 300
+            sprites.append(sprite)
+
+        scheduler = lod.LodScheduler(update_patrol)
+        for sprite in sprites:
+            scheduler.add(sprite, 0)
+        steps = [0]
+
+        def update_scheduled():
+            for _ in range(updates):
+                steps[0] += 1
+                scheduler.update(steps[0], 0, 0)
+
+        def update_every_sprite():
+            for _ in range(updates):
+                for sprite in sprites:
+                    update_patrol(sprite, 1)
+
+        scheduled_time = min(timeit.repeat(update_scheduled, number=1, repeat=runs)) / updates
+        every_time = min(timeit.repeat(update_every_sprite, number=1, repeat=runs)) / updates
+        print(f'{count:>6} patrolling sprites: scheduled {scheduled_time * 1000:.3f}ms, '
+              f'every sprite {every_time * 1000:.3f}ms an update (best of {runs})')
+
+
+# -- AUDIO -- #
+
+
+def benchmark_mixer(counts=(10, 100, 500), runs=5, frames=60):
+    """Times playing that many footsteps, gunshots and explosions a frame, as in a barrel chain
+        during rapid fire, through an a.Mixer against a new player for every sound."""
+    import arcade
+    from pyglet import media
+    import game_audio as a
+
+    a.add_audio_to_list()
+    a.load_audio()
+    names = ['explosion', 'glock_17_fire', 'ak_47_fire'] + [f'walk_grass_{i + 1}' for i in range(8)]
+
+    for count in counts:
+        count = int(count)
+        mixer = a.Mixer()
+
+        def play_mixed():
+            for _ in range(frames):
+                mixer.update()
+                for i in range(count):
+                    mixer.play(names[i % len(names)])
+
+        players = []
+
+        def play_every_sound():
+            for _ in range(frames):
+                for i in range(count):
+                    players.append(arcade.play_sound(a.sound[names[i % len(names)]]))
+
+        def get_driver_players():
+            return [player._audio_player for voice in mixer.voices for player in voice.players.values()]
+
+        # Once every voice has played each format, the driver players are made, and should be reused.
+        play_mixed()
+        driver_players = get_driver_players()
+        mixed_time = min(timeit.repeat(play_mixed, number=1, repeat=runs)) / frames
+        assert [id(player) for player in get_driver_players()] == [id(player) for player in driver_players], \
+            'The mixer made new driver players.'
+        mixer.stop()
+        every_time = min(timeit.repeat(play_every_sound, number=1, repeat=runs)) / frames
+        most_players = len(media.Source._players)
+        for player in players:
+            arcade.stop_sound(player)
+        print(f'{count:>4} sounds a frame: mixer {mixed_time * 1000:.3f}ms with {len(driver_players)} players, '
+              f'every sound {every_time * 1000:.3f}ms with {most_players} players (best of {runs})')
+
+
+# -- DRAW LAYERS -- #
+
+
+def benchmark_draw_layers(counts=(10, 100, 500), runs=5, frames=60):
+    """Times drawing the game's sprite layers, each sprite list on its own and through a dl.DrawLayers.
+        There are that many characters animating, split between an enemy list and a player list drawn
+        one after the other, a pool of hidden bullets none of which are in use, and some empty lists.
+        Drawing waits for the graphics card to finish, so the times include its work."""
+    import arcade
+    from pyglet.gl import GL_NEAREST
+    import game_draw_layers as dl
+    import game_functions as f
+
+    window = make_suite_window()
+    if window is None:
+        print('No display to draw with.')
+        return
+
+    def make_scene(count):
+        """The characters, and the sprite lists, back to front."""
+        characters = make_characters(count, right=window.width, top=window.height, moving=True)
+        enemy_list = arcade.SpriteList()
+        player_list = arcade.SpriteList()
+        for i, character in enumerate(characters):
+            for sprite in character.parts:
+                (player_list if i == 0 else enemy_list).append(sprite)
+
+        bullet_list = arcade.SpriteList()
+        for _ in range(256):
+            bullet = arcade.Sprite()
+            bullet.texture = f.atlas_groups['characters'][0]
+            bullet.alpha = 0
+            bullet_list.append(bullet)
+        return characters, [arcade.SpriteList(), arcade.SpriteList(), enemy_list, player_list, bullet_list]
+
+    def time_drawing(characters, draw):
+        def draw_frames():
+            for _ in range(frames):
+                for character in characters:
+                    character.update_animation()
+                arcade.start_render()
+                draw()
+                window.ctx.finish()
+
+        draw_frames()
+        return min(timeit.repeat(draw_frames, number=1, repeat=runs)) / frames
+
+    for count in counts:
+        count = int(count)
+
+        characters, sprite_lists = make_scene(count)
+        for sprite_list in sprite_lists:
+            f.preload_atlas(sprite_list, 'characters')
+
+        def draw_lists():
+            for sprite_list in sprite_lists:
+                sprite_list.draw(filter=GL_NEAREST)
+
+        lists_time = time_drawing(characters, draw_lists)
+        list_calls = sum(1 for sprite_list in sprite_lists if len(sprite_list))
+
+        characters, (treasure_list, items_list, enemy_list, player_list, bullet_list) = make_scene(count)
+        layers = dl.DrawLayers()
+        layers.add('treasure', treasure_list)
+        layers.add('items', items_list)
+        batch = layers.add_batch('characters', [enemy_list, player_list])
+        f.preload_atlas(batch.sprite_list, 'characters')
+        layers.add('bullets', bullet_list, is_empty=lambda: True)
+
+        layers_time = time_drawing(characters, lambda: layers.draw(filter=GL_NEAREST))
+        print(f'{count:>4} characters: sprite lists {lists_time * 1000:.3f}ms, {list_calls} draw calls, '
+              f'layers {layers_time * 1000:.3f}ms, {layers.draw_calls} draw calls, {layers.sprite_count} sprites, '
+              f'{layers.texture_binds} texture binds (best of {runs}, a frame)')
+
+
+# -- SIMULATION -- #
+
+
+def scripted_inputs(step, inputs):
+    """Plays the game the same way every run: runs right with the pistol, jumping now and then and
+        firing at the ground ahead."""
+    inputs.clear_presses()
+    inputs.equip_one_handed = step == 0
+    inputs.right = True
+    inputs.sprint = step % 240 < 120
+    inputs.up = step % 90 < 5
+    inputs.mouse_x = 1500
+    inputs.mouse_y = 300 + step % 200
+    inputs.fire = step % 10 == 0
+
+
+def benchmark_simulation(level=1, steps=600, runs=3, seed=0):
+    """Times stepping the simulation on its own, with nothing drawn, and no window needed."""
+    import game_simulation as sim
+
+    def run():
+        simulation = sim.Simulation(level=level, seed=seed)
+        inputs = sim.Inputs()
+        start_time = timeit.default_timer()
+        for step in range(steps):
+            scripted_inputs(step, inputs)
+            simulation.step(inputs)
+        return timeit.default_timer() - start_time
+
+    # Warmed up once, so the level compile and the texture loading aren't counted.
+    run()
+
+    step_time = min(run() for _ in range(runs))
+    print(f'{steps} steps: {step_time * 1000:.1f}ms, {steps / step_time:.0f} steps a second, '
+          f'{step_time / steps * 1000:.3f}ms a step (best of {runs})')
+
+
+def record_scripted_session(path, level=1, steps=600, seed=0):
+    """Records the scripted inputs being played, as a replay file."""
+    import game_replay as rp
+    import game_simulation as sim
+
+    simulation = sim.Simulation(level=level, seed=seed)
+    inputs = sim.Inputs()
+    recorder = rp.Recorder(path, level, seed)
+    for step in range(steps):
+        scripted_inputs(step, inputs)
+        recorder.record(simulation.frame, inputs)
+        simulation.step(inputs)
+    recorder.close()
+
+
+def benchmark_replay(path=None, runs=3):
+    """Times playing a recording back with nothing drawn, step by step and phase by phase, so a slow
+        patch of the game shows up. Without a recording, the scripted inputs are recorded and played instead."""
+    import tempfile
+    import game_profiler as pf
+    import game_replay as rp
+
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), 'scripted.replay')
+        record_scripted_session(path)
+    replay = rp.load_replay(path)
+    print(f'{path}: level {replay.level}, seed {replay.seed}, {replay.steps} steps, '
+          f'{len(replay.records)} input changes, {os.path.getsize(path)} bytes')
+
+    best_times = None
+    best_profiler = None
+    for _ in range(runs):
+        profiler = pf.Profiler(history_frames=replay.steps)
+        step_times = []
+        last_time = timeit.default_timer()
+
+        def time_step(simulation):
+            nonlocal last_time
+            now = timeit.default_timer()
+            step_times.append(now - last_time)
+            last_time = now
+
+        simulation = rp.run_replay(replay, on_step=time_step, profiler=profiler)
+        if best_times is None or sum(step_times) < sum(best_times):
+            best_times = step_times
+            best_profiler = profiler
+
+    # Where everything ended up, which is the same every run if the replay is deterministic.
+    player = simulation.player_sprite
+    print(f'ended on level {simulation.level} at ({player.center_x:.1f}, {player.center_y:.1f}), '
+          f'{len(simulation.bullet_pool.in_use)} bullets, {len(simulation.barrel_list)} barrels')
+
+    ordered = sorted(best_times)
+    total = sum(best_times)
+    slowest = max(range(len(best_times)), key=best_times.__getitem__)
+    print(f'{total * 1000:.1f}ms, {len(best_times) / total:.0f} steps a second (best of {runs})')
+    print(f'step times: median {ordered[len(ordered) // 2] * 1000:.3f}ms, '
+          f'95th percentile {ordered[int(len(ordered) * 0.95)] * 1000:.3f}ms, '
+          f'slowest {ordered[-1] * 1000:.3f}ms at step {slowest}')
+    print('\n'.join(best_profiler.get_lines()))
+
+
+# -- SUITE -- #
+
+
+def make_rig_scene(count, composite_poses=False):
+    """Characters scattered over the screen, all animating, each drawn as five sprites."""
+    import arcade
+    import game_constants as c
+    import game_functions as f
+
+    characters = make_characters(count, right=c.SCREEN_WIDTH, top=c.SCREEN_HEIGHT, moving=True,
+                                 composite_poses=composite_poses)
+    sprite_list = arcade.SpriteList()
+    for character in characters:
+        for sprite in character.parts:
+            sprite_list.append(sprite)
+    f.preload_atlas(sprite_list, 'characters')
+
+    def update():
+        for character in characters:
+            character.update_animation()
+            character.animation_events.clear()
+
+    return update, [sprite_list]
+
+
+def make_composite_rig_scene(count):
+    """The same characters as make_rig_scene(), drawn with composite poses, as three sprites each."""
+    return make_rig_scene(count, composite_poses=True)
+
+
+def make_bullet_scene(count, level=1):
+    """Bullets flying around level 1's walls, from a pool as in the game. Any that hit a wall or
+        leave go back in the pool, and are fired again from somewhere else."""
+    import math
+    import random
+    import numpy
+    import arcade
+    import game_constants as c
+    import game_functions as f
+    import game_levels as lv
+    import game_projectiles as pj
+
+    compiled_level = lv.get_level(f'resources/maps/{level}.tmx')
+    wall_list = lv.build_layer(compiled_level, 'Walls')
+    wall_grid = pj.TileGrid(wall_list)
+    left, bottom = wall_grid.origin_x, wall_grid.origin_y
+    right = left + wall_grid.columns * wall_grid.cell_size
+    top = bottom + wall_grid.rows * wall_grid.cell_size
+
+    # The pool is filled with the scattered bullets, and starts with all of them flying.
+    bullet_list = arcade.SpriteList()
+    pool = f.SpritePool(iter(make_bullets(count, left, right, bottom, top)).__next__, count, bullet_list)
+    for _ in range(count):
+        pool.acquire()
+    generator = random.Random(0)
+
+    def update():
+        pool.update()
+        bullets = list(pool.in_use)
+        batch = pj.BulletBatch(bullets)
+        finished = (batch.x < left) | (batch.x > right) | (batch.y < bottom) | (batch.y > top)
+        finished[wall_grid.check_paths(batch)[0]] = True
+        for bullet_index in numpy.flatnonzero(finished):
+            pool.release(bullets[bullet_index])
+
+        while pool.free:
+            bullet = pool.acquire()
+            bullet.position = (generator.uniform(left, right), generator.uniform(bottom, top))
+            bullet.angle = generator.uniform(-180, 180)
+            bullet.change_x = math.cos(math.radians(bullet.angle)) * c.BULLET_SPEED
+            bullet.change_y = math.sin(math.radians(bullet.angle)) * c.BULLET_SPEED
+
+    return update, [wall_list, bullet_list]
+
+
+def make_barrel_explosion_scene(count):
+    """Barrel explosions over the screen, each starting again somewhere else when it finishes."""
+    import random
+    import arcade
+    import game_constants as c
+    import game_entities as e
+    import game_functions as f
+
+    textures = [f.load_texture(f'resources/images/effects/barrel_explosion/{i}.png') for i in range(20)]
+
+    def create_explosion():
+        explosion = e.BarrelExplosion(textures)
+        explosion.set_texture(0)
+        explosion.scale = c.PIXEL_SCALING
+        return explosion
+
+    explosion_list = arcade.SpriteList()
+    pool = f.SpritePool(create_explosion, count, explosion_list)
+    generator = random.Random(0)
+
+    def start_explosions():
+        while pool.free:
+            explosion = pool.acquire()
+            explosion.reset()
+            explosion.position = (generator.uniform(0, c.SCREEN_WIDTH), generator.uniform(0, c.SCREEN_HEIGHT))
+            explosion.update()
+
+    # Start them part way through, so they don't all finish on the same frame.
+    start_explosions()
+    for explosion in pool.in_use:
+        explosion.current_texture = generator.randrange(len(textures) * c.EFFECT_UPDATES_PER_FRAME - 1)
+
+    def update():
+        pool.update()
+        start_explosions()
+
+    return update, [explosion_list]
+
+
+def make_enemy_scene(count):
+    """Enemies patrolling a level ten screens wide, with the player in the middle of the first screen."""
+    import game_constants as c
+    import game_functions as f
+
+    enemies = make_enemy_manager(count)
+    enemies.sync(0, 0)
+    f.preload_atlas(enemies.sprite_list, 'characters')
+
+    def update():
+        enemies.update(c.SCREEN_WIDTH / 2, c.SCREEN_HEIGHT / 2)
+        enemies.sync(0, 0)
+
+    return update, [enemies.sprite_list]
+
+
+def make_tile_scene(screens, level=1):
+    """A layer of level 1's wall tiles filling a map that many screens wide, drawn in chunks.
+        Only the first screen is drawn, so the time should be the same however wide the map is."""
+    import arcade
+    import game_constants as c
+    import game_functions as f
+    import game_levels as lv
+
+    compiled_level = lv.get_level(f'resources/maps/{level}.tmx')
+    gids = compiled_level.layers['Walls']['gids']
+    size = c.GRID_PIXEL_SIZE * c.PIXEL_SCALING
+
+    tile_list = arcade.SpriteList()
+    for column in range(c.SCREEN_WIDTH * screens // size):
+        for row in range(c.SCREEN_HEIGHT // size):
+            tile = compiled_level.tiles[gids[(column + row) % len(gids)]]
+            sprite = arcade.Sprite()
+            sprite.texture = f.load_texture(tile['image'], region=tile['region'])
+            sprite.scale = c.PIXEL_SCALING
+            sprite.center_x = column * size + size / 2
+            sprite.center_y = row * size + size / 2
+            tile_list.append(sprite)
+    layer = lv.ChunkedLayer(tile_list)
+
+    def update():
+        pass
+
+    return update, [layer]
+
+
+def make_reload_scene(level):
+    """The whole of a level loaded again, every frame, as when starting it or going on to it."""
+    import game_simulation as sim
+
+    simulation = sim.Simulation(level=level)
+    sprite_lists = []
+
+    def update():
+        simulation.load_level()
+        sprite_lists[:] = [simulation.background_walls_list, simulation.background_decorations_list,
+                           simulation.treasure_list, simulation.items_list, simulation.player_list,
+                           simulation.next_level_list, simulation.bullet_list, simulation.barrel_list,
+                           simulation.explosions_list, simulation.wall_list, simulation.grass_list,
+                           simulation.foreground_decorations_list]
+
+    update()
+    return update, sprite_lists
+
+
+# Scenes in the suite, as (name, function making the scene, what to make it with, frames to time).
+SUITE_SCENES = [('rigs', make_rig_scene, (10, 100, 500), 300),
+                ('composite rigs', make_composite_rig_scene, (10, 100, 500), 300),
+                ('bullets', make_bullet_scene, (100, 1000, 5000), 300),
+                ('barrel explosions', make_barrel_explosion_scene, (16, 64, 256), 300),
+                ('enemies', make_enemy_scene, (100, 1000, 5000), 300),
+                ('static tiles', make_tile_scene, (1, 10, 100), 300),
+                ('level reload', make_reload_scene, (1,), 10)]
+
+# Frames run before timing, e.g. for the sprite lists to build their atlases.
+SUITE_WARM_UP_FRAMES = 5
+
+
+def make_suite_window():
+    """A hidden window for drawing the scenes, or None if there's no display to make one with."""
+    import arcade
+    import game_constants as c
+    try:
+        return arcade.Window(c.SCREEN_WIDTH, c.SCREEN_HEIGHT, c.SCREEN_TITLE, visible=False)
+    except Exception:
+        return None
+
+
+def run_scene(update, sprite_lists, window, frames):
+    """Times updating and drawing a scene, every frame. Draw times are None without a window.
+        Drawing waits for the graphics card to finish, so draw times include its work."""
+    import arcade
+    from pyglet.gl import GL_NEAREST
+
+    update_times = []
+    draw_times = []
+    for frame in range(SUITE_WARM_UP_FRAMES + frames):
+        start_time = timeit.default_timer()
+        update()
+        update_time = timeit.default_timer() - start_time
+
+        if window is not None:
+            start_time = timeit.default_timer()
+            arcade.start_render()
+            for sprite_list in sprite_lists:
+                sprite_list.draw(filter=GL_NEAREST)
+            window.ctx.finish()
+            draw_time = timeit.default_timer() - start_time
+
+        if frame >= SUITE_WARM_UP_FRAMES:
+            update_times.append(update_time)
+            if window is not None:
+                draw_times.append(draw_time)
+    return update_times, draw_times or None
+
+
+def get_scene_pools(sprite_lists):
+    """The sprite pools a scene's sprites come from, found through the sprites' pool attribute."""
+    pools = []
+    for sprite_list in sprite_lists:
+        pool = getattr(sprite_list[0], 'pool', None) if len(sprite_list) else None
+        if pool is not None and pool not in pools:
+            pools.append(pool)
+    return pools
+
+
+def measure_scene_memory(make_scene, argument, frames=30):
+    """Memory, in KB, allocated making a scene and then while updating it. Textures are cached
+        from the timed run, so they aren't counted."""
+    import tracemalloc
+
+    tracemalloc.start()
+    update, _ = make_scene(argument)
+    scene_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    for _ in range(frames):
+        update()
+    frame_memory, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'scene': scene_memory / 1024,
+            'frame_peak': (peak_memory - scene_memory) / 1024,
+            'growth': (frame_memory - scene_memory) / 1024}
+
+
+def startup_menu_child():
+    """Runs in a fresh process. Times the imports and getting the main menu on screen, or if
+        there's no display, loading everything up to the first frame of gameplay."""
+    start_time = timeit.default_timer()
+    import main
+    import_time = timeit.default_timer() - start_time
+
+    window = make_suite_window()
+    if window is not None:
+        menu_view = main.MainMenuView()
+        window.show_view(menu_view)
+        menu_view.on_draw()
+        window.ctx.finish()
+        measured = 'menu'
+    else:
+        load_startup_assets()
+        measured = 'assets'
+    print(f'{import_time} {measured} {timeit.default_timer() - start_time - import_time}')
+
+
+def get_commit():
+    """The git commit being benchmarked, or None if it can't be found."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=GAME_FOLDER,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_suite(results_path=None, baseline_path=None, startup_runs=3):
+    """Times every scene in the suite, and start up, saving the results as JSON. Given the results
+        of an earlier run, e.g. on another commit, shows how much each time has changed.
+        Without a display, nothing is drawn and only update times are measured."""
+    import json
+    import platform
+    import time
+    import game_profiler as pf
+
+    commit = get_commit()
+    window = make_suite_window()
+    results = {'commit': commit,
+               'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+               'python': platform.python_version(),
+               'platform': platform.platform(),
+               'renderer': 'gl' if window is not None else 'null',
+               'scenes': {}}
+    print(f"Commit {commit}, drawing {'with OpenGL' if window is not None else 'nothing, no display'}.")
+
+    for name, make_scene, arguments, frames in SUITE_SCENES:
+        for argument in arguments:
+            scene_name = f'{name} {argument}'
+            update, sprite_lists = make_scene(argument)
+            update_times, draw_times = run_scene(update, sprite_lists, window, frames)
+            scene = {'frames': frames,
+                     'update_ms': {key: value * 1000 for key, value in pf.get_stats(update_times).items()},
+                     'draw_ms': None,
+                     'memory_kb': measure_scene_memory(make_scene, argument)}
+            if draw_times is not None:
+                scene['draw_ms'] = {key: value * 1000 for key, value in pf.get_stats(draw_times).items()}
+            pools = get_scene_pools(sprite_lists)
+            if pools:
+                scene['pools'] = [{'capacity': pool.capacity, 'utilisation': pool.utilisation,
+                                   'peak_in_use': pool.peak_in_use,
+                                   'acquired': pool.acquired_count, 'exhausted': pool.exhausted_count}
+                                  for pool in pools]
+            results['scenes'][scene_name] = scene
+
+            draw_text = f", draw p50 {scene['draw_ms']['p50']:.3f}ms" if draw_times is not None else ''
+            print(f"{scene_name:>24}: update p50 {scene['update_ms']['p50']:.3f}ms "
+                  f"p95 {scene['update_ms']['p95']:.3f}ms{draw_text}, "
+                  f"{scene['memory_kb']['scene']:.0f}KB")
+            for pool in pools:
+                print(f"{'pool':>24}: {pool.get_stats()}")
+
+    # Without a display, loading the assets is timed instead of showing the menu.
+    import_times = []
+    loading_times = []
+    for run in range(startup_runs):
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), 'startup-menu-child'],
+                                cwd=GAME_FOLDER, capture_output=True, text=True, check=True).stdout
+        import_time, measured, loading_time = output.split()[-3:]
+        import_times.append(float(import_time) * 1000)
+        loading_times.append(float(loading_time) * 1000)
+    results['startup_ms'] = {'imports': min(import_times), measured: min(loading_times)}
+    print(f"{'startup':>24}: imports {min(import_times):.0f}ms, then {min(loading_times):.0f}ms "
+          f"{'to show the menu' if measured == 'menu' else 'to load the assets'} (best of {startup_runs})")
+
+    if results_path is None:
+        results_path = f"benchmark_{commit or time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(results_path, 'w') as file:
+        json.dump(results, file, indent=1)
+    print(f'Saved results to {results_path}')
+
+    if baseline_path is not None:
+        with open(baseline_path) as file:
+            compare_suite_results(json.load(file), results)
+
+
+def compare_suite_results(baseline, results):
+    """Prints how much each scene's times changed from the baseline's, as percentages."""
+    print(f"Compared with {baseline['commit']} from {baseline['date']}:")
+    if baseline['renderer'] != results['renderer']:
+        print(f"Warning, the baseline was drawn with '{baseline['renderer']}', not '{results['renderer']}'.")
+
+    def change(old, new):
+        return f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+
+    for scene_name, scene in results['scenes'].items():
+        old_scene = baseline['scenes'].get(scene_name)
+        if old_scene is None:
+            continue
+        line = (f"{scene_name:>24}: update p50 {change(old_scene['update_ms']['p50'], scene['update_ms']['p50'])}, "
+                f"p95 {change(old_scene['update_ms']['p95'], scene['update_ms']['p95'])}")
+        if scene['draw_ms'] is not None and old_scene['draw_ms'] is not None:
+            line += f", draw p50 {change(old_scene['draw_ms']['p50'], scene['draw_ms']['p50'])}"
+        line += f", memory {change(old_scene['memory_kb']['scene'], scene['memory_kb']['scene'])}"
+        print(line)
+
+    for key, time in results['startup_ms'].items():
+        if key in baseline['startup_ms']:
+            print(f"{'startup ' + key:>24}: {change(baseline['startup_ms'][key], time)}")
+
+
+def number_list(number_type):
+    """Makes an argument type for comma separated numbers, e.g. '100,1000' for a benchmark's counts."""
+    def parse(text):
+        return tuple(number_type(number) for number in text.split(','))
+    parse.__name__ = f'{number_type.__name__} list'
+    return parse
+
+
+# Every benchmark that can be run from the command line, with the types of its arguments, in order.
+benchmarks = {'startup': (benchmark_startup, (int,)),
+              'respawn': (benchmark_respawn, (int, int)),
+              'bullets': (benchmark_bullets, (int, number_list(int), int)),
+              'raycast': (benchmark_raycast, (int, number_list(int), number_list(float), int)),
+              'rig': (benchmark_rig, (number_list(int), int, int)),
+              'enemies': (benchmark_enemies, (number_list(int), int, int)),
+              'lod': (benchmark_lod, (number_list(int), int, int, int)),
+              'mixer': (benchmark_mixer, (number_list(int), int, int)),
+              'layers': (benchmark_draw_layers, (number_list(int), int, int)),
+              'simulation': (benchmark_simulation, (int, int, int, int)),
+              'replay': (benchmark_replay, (str, int)),
+              'suite': (benchmark_suite, (str, str, int))}
+
+
+def parse_arguments(arguments):
+    """Reads the name of a benchmark and its arguments from the command line, checking and converting
+        them the same way for every benchmark. Arguments left out keep the benchmark's defaults."""
+    import argparse
+    import inspect
+
+    parser = argparse.ArgumentParser(prog='python game_benchmarks.py',
+                                     description="Benchmarks for the game's loading and update code.")
+    subparsers = parser.add_subparsers(dest='name', required=True, metavar='benchmark')
+    for name, (benchmark, argument_types) in benchmarks.items():
+        subparser = subparsers.add_parser(name, help=' '.join(benchmark.__doc__.split()).split('. ')[0].rstrip('.') + '.')
+        parameters = inspect.signature(benchmark).parameters.values()
+        for parameter, argument_type in zip(parameters, argument_types):
+            subparser.add_argument(parameter.name, type=argument_type, nargs='?', default=parameter.default,
+                                   help=f'default {parameter.default}')
+
+    namespace = vars(parser.parse_args(arguments))
+    return benchmarks[namespace.pop('name')][0], namespace
+
+
+if __name__ == '__main__':
+    os.chdir(GAME_FOLDER)
+    sys.path.insert(0, GAME_FOLDER)
+
+    # Nothing is drawn, so arcade doesn't need the hidden window it otherwise makes on import.
+    # This lets the benchmarks run without a display.
+    import pyglet
+    pyglet.options['shadow_window'] = False
+
+    if len(sys.argv) > 2 and sys.argv[1] == 'startup-child':
+        startup_child(use_pack=sys.argv[2] == '1')
+    elif len(sys.argv) > 1 and sys.argv[1] == 'startup-menu-child':
+        startup_menu_child()
+    else:
+        benchmark, arguments = parse_arguments(sys.argv[1:])
+        benchmark(**arguments)
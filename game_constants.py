@@ -10,6 +10,16 @@ SCREEN_HEIGHT = 1080
 SCREEN_TITLE = 'Unexplored'
 WORLD_BOTTOM = -200
 
+# How many times a second the game logic updates, however often the screen is drawn.
+# Lower it to make the game cheaper to run on slow machines. Speeds and animation
+# lengths below are tuned for 60 updates a second, and are scaled to this rate.
+UPDATES_PER_SECOND = 60
+UPDATE_SCALE = 60 / UPDATES_PER_SECOND
+
+# The most updates run to catch up after a slow frame. Any more time than this is dropped,
+# so that one long pause doesn't leave the game forever trying to catch up.
+MAX_CATCH_UP_UPDATES = 5
+
 # Constants used to scale our sprites from their original size.
 PIXEL_SCALING = 4
 INTRO_SCALING = 3
@@ -25,19 +35,28 @@ MAP_HEIGHT = 256 * PIXEL_SCALING
 CULL_DISTANCE_X = 4000
 CULL_DISTANCE_Y = 2000
 
-# Movement speed of player, in pixels per frame.
-PLAYER_WALK_SPEED = 4.6
-PLAYER_RUN_SPEED = 10.3
-GRAVITY = 0.95
-PLAYER_JUMP_SPEED = 28
-UPDATES_PER_FRAME = 10
-EFFECT_UPDATES_PER_FRAME = 5
+# Movement speed of player, in pixels per update.
+PLAYER_WALK_SPEED = 4.6 * UPDATE_SCALE
+PLAYER_RUN_SPEED = 10.3 * UPDATE_SCALE
+GRAVITY = 0.95 * UPDATE_SCALE ** 2
+PLAYER_JUMP_SPEED = 28 * UPDATE_SCALE
+UPDATES_PER_FRAME = max(1, round(10 / UPDATE_SCALE))
+CLIMB_UPDATES_PER_FRAME = max(1, round(4 / UPDATE_SCALE))
+EFFECT_UPDATES_PER_FRAME = max(1, round(5 / UPDATE_SCALE))
 
 # Cinematic intro constants.
 INTRO_UPDATES_PER_FRAME = 10
 
+# Background asset loading. How many threads decode assets, and how many decoded
+# images are turned into textures on the main thread each frame.
+LOADER_WORKERS = 4
+LOADER_TEXTURES_PER_FRAME = 16
+
 # Updates for the gun shooting animation.
-GUN_UPDATES_PER_FRAME = 4
+GUN_UPDATES_PER_FRAME = max(1, round(4 / UPDATE_SCALE))
+
+# How much the screen darkens each update once the game is won, out of 255.
+GAME_WON_FADE_SPEED = max(1, round(4 * UPDATE_SCALE))
 
 # How many pixels to keep as a minimum margin between
 # the character and the edge of the screen.
@@ -53,8 +72,65 @@ PLAYER_START_Y = 2000
 RIGHT_FACING = 0
 LEFT_FACING = 1
 
-# Bullet speed, in pixels per frame.
-BULLET_SPEED = 55
+# Bullet speed, in pixels per update.
+BULLET_SPEED = 55 * UPDATE_SCALE
+
+# How far along a gun arm, from its middle, the muzzle of the gun is, where bullets come out.
+GUN_MUZZLE_DISTANCE = 36 * PIXEL_SCALING
+
+# Characters can aim in steps of this many degrees, rather than at any angle, so turning their parts
+# and the bullets they fire reads sines and cosines from a table. 0 aims at any angle. Has to divide 360.
+AIM_ANGLE_STEP = 0
+
+# How many bullets and hit effects are made up front, and reused, for each level.
+BULLET_POOL_SIZE = 256
+EXPLOSION_POOL_SIZE = 64
+BARREL_EXPLOSION_POOL_SIZE = 16
+
+# Enemies walk up and down a patrol, in pixels per update, either side of where they start.
+ENEMY_WALK_SPEED = 2.3 * UPDATE_SCALE
+ENEMY_PATROL_DISTANCE = 300
+
+# How near the player has to be, across and up or down, for an enemy to stop and aim at them.
+ENEMY_SIGHT_X = 900
+ENEMY_SIGHT_Y = 300
+
+# How far outside the screen enemies still have their sprites kept up to date, so none pop in.
+ENEMY_VIEW_MARGIN = 200
+
+# Whether enemies draw their legs, back arm and body as one sprite with a composite texture for each
+# pose, rather than three. Only the head and front arm, which aim, are separate.
+COMPOSITE_ENEMY_POSES = True
+
+# Layers of tiles that don't move are drawn in square chunks this many tiles a side, and only the
+# chunks touching the screen, or this many pixels around it, are drawn.
+CHUNK_TILES = 16
+CHUNK_DRAW_MARGIN = 256
+
+# Groups of layers that don't change are cached as images of square tiles of the level, this many
+# pixels across. Small tiles mean less empty space is drawn over, as only tiles with something in them
+# are drawn. Tiles this near the screen are drawn into their images ahead of time, a few a frame.
+# The images are kept in pages up to this many pixels across, at the size of the art.
+RENDER_CACHE_TILE_SIZE = 512
+RENDER_CACHE_PAGE_SIZE = 2048
+RENDER_CACHE_MARGIN = 1024
+RENDER_CACHE_TILES_PER_FRAME = 2
+
+# Sounds are played by a mixer with this many voices, see game_audio.Mixer. Each kind of sound may only
+# have so many of them at once, and when there are none to spare, a new sound takes over the oldest
+# playing one that is no more important.
+MIXER_VOICES = 16
+MIXER_FOOTSTEP_VOICES = 2
+MIXER_WEAPON_VOICES = 6
+MIXER_EXPLOSION_VOICES = 6
+
+# Level of detail for updating effects, see game_lod. The level is split into
+# square cells this many pixels across. Cells within the full margin of the screen are updated every
+# update, cells within the reduced margin every few updates, and cells further away not at all.
+LOD_CELL_SIZE = 1024
+LOD_FULL_MARGIN = 512
+LOD_REDUCED_MARGIN = 2048
+LOD_REDUCED_INTERVAL = 4
 
 # Precalculated random numbers, used instead of random() for performance.
 RANDOM_NUMBERS_8 = []
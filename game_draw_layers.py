@@ -0,0 +1,190 @@
+"""
+Drawing the game's layers, back to front, with as few draw calls as possible.
+
+Every layer is declared once, in the order it's drawn. Sprite lists that are drawn one after another,
+and whose textures all come from the same atlas group, can be put in a batch: one more sprite list
+holding all of their sprites, in the same order, drawn in their place with one draw call and one
+texture bind. Layers with nothing to draw are skipped, and what each frame took is counted: draw
+calls, sprites sent to the graphics card and textures bound. arcade binds a texture before every draw
+call, but binding the one that's already bound changes nothing, so only binds of a different texture
+are counted.
+
+Example usage.
+    layers = dl.DrawLayers(profiler)
+    layers.add('backgrounds', backgrounds_list)
+    characters = layers.add_batch('characters', [enemy_list, player_list])
+    f.preload_atlas(characters.sprite_list, 'characters')
+    layers.add('bullets', bullet_list, is_empty=lambda: not bullet_pool.in_use)
+    # Then in on_draw():
+    layers.draw(filter=GL_NEAREST)
+    print(layers.draw_calls, layers.sprite_count, layers.texture_binds)
+
+Import this as 'dl' for consistency.
+"""
+
+import arcade
+import game_profiler as pf
+
+# What drawing nothing takes: no draw calls, no sprites and no textures bound.
+NO_DRAW_STATS = (0, 0, ())
+
+
+def get_draw_stats(drawable):
+    """Returns the draw calls, sprites and textures, in the order they were bound, the last draw of
+        something took. Anything that draws more than one sprite list, e.g. rc.LayerCache, keeps its own
+        in a draw_stats attribute. A sprite list draws all its sprites with one call, binding its atlas,
+        unless it's empty."""
+    stats = getattr(drawable, 'draw_stats', None)
+    if stats is not None:
+        return stats
+    sprite_count = len(drawable)
+    return (1, sprite_count, (drawable._texture,)) if sprite_count else NO_DRAW_STATS
+
+
+def count_texture_binds(textures, bound=None):
+    """Returns how many of the textures were bound over a different one, starting from the one
+        already bound, and the one bound at the end."""
+    binds = 0
+    for texture in textures:
+        if texture is not bound:
+            binds += 1
+            bound = texture
+    return binds, bound
+
+
+class SpriteBatch:
+    """Sprite lists drawn as one, by keeping all their sprites in one more sprite list, in order.
+        The lists should be drawn one after another, with their textures in one atlas group, so
+        drawing them as one looks the same, and the batch's atlas doesn't have to be rebuilt.
+
+        Sprites added to or taken out of the lists are added to or taken out of the batch before it's
+        drawn. Sprites taken out of a list can be anywhere in it, but usually new sprites are added
+        on the end. If they're not, the batch's sprites from that list are put in again, in order."""
+
+    def __init__(self, sprite_lists):
+        self.sprite_lists = sprite_lists
+        self.sprite_list = arcade.SpriteList(use_spatial_hash=False)
+
+        # The sprites each list had the last time the batch was brought up to date.
+        self.snapshots = [[] for _ in sprite_lists]
+
+        # What the last draw() took, see get_draw_stats().
+        self.draw_stats = NO_DRAW_STATS
+
+    def __len__(self):
+        return sum(len(sprite_list) for sprite_list in self.sprite_lists)
+
+    def sync(self):
+        """Brings the batch up to date with any sprites added to or taken out of the lists."""
+        # A sprite taken out of every list with remove_from_sprite_lists() leaves the batch too, so if one
+        # was put back where it was, only the batch's length shows it.
+        batch = self.sprite_list
+        if len(batch) == len(self) and all(sprite_list.sprite_list == snapshot
+                                           for sprite_list, snapshot in zip(self.sprite_lists, self.snapshots)):
+            return
+
+        # Take out every sprite that has left a list first, so a sprite that has moved from a later list
+        # to an earlier one isn't taken out again once it's been added back.
+        for sprite_list, snapshot in zip(self.sprite_lists, self.snapshots):
+            still_in = set(sprite_list.sprite_list)
+            for sprite in snapshot:
+                if sprite not in still_in and batch in sprite.sprite_lists:
+                    batch.remove(sprite)
+
+        start = 0
+        for index, sprite_list in enumerate(self.sprite_lists):
+            sprites = sprite_list.sprite_list
+            self.add_sprites(start, self.snapshots[index], sprites)
+            self.snapshots[index] = list(sprites)
+            start += len(sprites)
+
+    def add_sprites(self, start, old_sprites, new_sprites):
+        """Adds the sprites new to one list to the batch, where the list's sprites start in it."""
+        batch = self.sprite_list
+        still_in = set(new_sprites)
+        kept = [sprite for sprite in old_sprites if sprite in still_in and batch in sprite.sprite_lists]
+
+        if new_sprites[:len(kept)] != kept:
+            for sprite in kept:
+                batch.remove(sprite)
+            kept = []
+        for index in range(len(kept), len(new_sprites)):
+            batch.insert(start + index, new_sprites[index])
+
+    def draw(self, **kwargs):
+        self.sync()
+        self.sprite_list.draw(**kwargs)
+        self.draw_stats = get_draw_stats(self.sprite_list)
+
+
+class DrawLayer:
+    """Something drawn, with the name it's timed under, and, optionally, a function that says
+        when it has nothing to draw, e.g. a pool of sprites none of which are in use."""
+
+    def __init__(self, name, drawable, is_empty=None):
+        self.name = name
+        self.phase_name = f'draw {name}'
+        self.drawable = drawable
+        self.is_empty = is_empty
+
+
+class DrawLayers:
+    """Layers drawn back to front, in the order they're added. Anything with a draw(**kwargs)
+        can be a layer, such as a sprite list, an rc.LayerCache or an lv.ChunkedLayer.
+
+        Layers are skipped if their is_empty() says so, or, without one, if they have a length
+        and it's 0. Each layer's drawing is timed as a phase of the profiler."""
+
+    def __init__(self, profiler=None):
+        self.layers = []
+        self.profiler = profiler if profiler is not None else pf.Profiler()
+
+        # -- Counters for the last draw() -- #
+
+        # Draw calls made, sprites drawn by them, and textures bound for them over a different one.
+        self.draw_calls = 0
+        self.sprite_count = 0
+        self.texture_binds = 0
+
+        # Layers skipped as they had nothing to draw.
+        self.skipped_count = 0
+
+    def add(self, name, drawable, is_empty=None):
+        """Adds a layer on top of those already added."""
+        self.layers.append(DrawLayer(name, drawable, is_empty))
+
+    def add_batch(self, name, sprite_lists, is_empty=None):
+        """Adds sprite lists on top of those already added, drawn as one. Returns the SpriteBatch, so
+            its sprite list's atlas can be preloaded."""
+        batch = SpriteBatch(sprite_lists)
+        self.add(name, batch, is_empty)
+        return batch
+
+    def draw(self, **kwargs):
+        """Draws every layer that has something to draw, passing on the keyword arguments,
+            e.g. filter=GL_NEAREST."""
+        self.draw_calls = 0
+        self.sprite_count = 0
+        self.texture_binds = 0
+        self.skipped_count = 0
+
+        profiler = self.profiler
+        bound = None
+        for layer in self.layers:
+            drawable = layer.drawable
+            if layer.is_empty is not None:
+                empty = layer.is_empty()
+            else:
+                empty = hasattr(drawable, '__len__') and len(drawable) == 0
+            if empty:
+                self.skipped_count += 1
+                continue
+
+            with profiler.phase(layer.phase_name):
+                drawable.draw(**kwargs)
+
+            draw_calls, sprite_count, textures = get_draw_stats(drawable)
+            texture_binds, bound = count_texture_binds(textures, bound)
+            self.draw_calls += draw_calls
+            self.sprite_count += sprite_count
+            self.texture_binds += texture_binds
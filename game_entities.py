@@ -6,13 +6,11 @@ Import this as 'e' for consistency.
 
 import arcade
 import os
-import random
 from pyglet.gl import GL_NEAREST
-import math
+import numpy
 import game_constants as c
 import game_player as p
-import game_functions as f
-import game_audio as a
+import game_animation as an
 
 
 class Explosion(arcade.Sprite):
@@ -25,14 +23,23 @@ class Explosion(arcade.Sprite):
         self.current_texture = 0
         self.textures = texture_list
 
+        # The f.SpritePool this belongs to, if any.
+        self.pool = None
+
+    def reset(self):
+        """Starts the animation again from the first frame, for reusing this from a pool."""
+        self.current_texture = 0
+
     def update(self):
 
         # Update to the next frame of the animation. If we are at the end
-        # of our frames, then delete this sprite.
+        # of our frames, then give this sprite back to its pool, or delete it.
         self.current_texture += 1
-        if self.current_texture < len(self.textures * c.EFFECT_UPDATES_PER_FRAME):
+        if self.current_texture < len(self.textures) * c.EFFECT_UPDATES_PER_FRAME:
             frame = self.current_texture // c.EFFECT_UPDATES_PER_FRAME
             self.set_texture(frame)
+        elif self.pool is not None:
+            self.pool.release(self)
         else:
             self.remove_from_sprite_lists()
 
@@ -47,736 +54,211 @@ class BarrelExplosion(arcade.Sprite):
         self.current_texture = 0
         self.textures = texture_list
 
+        # The f.SpritePool this belongs to, if any.
+        self.pool = None
+
+    def reset(self):
+        """Starts the animation again from the first frame, for reusing this from a pool."""
+        self.current_texture = 0
+
     def update(self):
 
         # Update to the next frame of the animation. If we are at the end
-        # of our frames, then delete this sprite.
+        # of our frames, then give this sprite back to its pool, or delete it.
         self.current_texture += 1
-        if self.current_texture < len(self.textures * c.EFFECT_UPDATES_PER_FRAME):
+        if self.current_texture < len(self.textures) * c.EFFECT_UPDATES_PER_FRAME:
             frame = self.current_texture // c.EFFECT_UPDATES_PER_FRAME
             self.set_texture(frame)
+        elif self.pool is not None:
+            self.pool.release(self)
         else:
             self.remove_from_sprite_lists()
 
 
-class Enemy(arcade.Sprite):
-    """Base class for the enemy."""
-
-    def __init__(self):
-        # Set up parent class.
-        super().__init__()
-
-        # Default to face-right.
-        self.character_face_direction = c.RIGHT_FACING
-
-        # Used for flipping between image sequences.
-        self.cur_texture = 0
-        self.scale = c.PIXEL_SCALING
-
-        # Track our state.
-        self.jumping = False
-        self.climbing = False
-        self.is_on_ladder = False
-        self.idling = False
-        self.can_jump = False
-        self.sprinting = False
-        self.firing = False
-
-        # Whether the player is armed in any sort of way.
-        self.equipped_any = False
-
-        # Whether the player has a one-handed gun or not.
-        self.equipped_one_handed = False
-
-        # Whether the player has a two-handed gun or not.
-        self.equipped_two_handed = False
-        # --- Load Textures --- # TODO: Automatically add extra frame that is copy of the last frame to every
-        #                         TODO: animation list. This will stop the last frame from flickering when played.
-
-        # The name of the texture we are currently displaying. Used as key for offset dictionaries.
-        self.cur_texture_name = 'idle_to_walk_0'
-
-        # Load textures for IDLE standing.
-        self.idle_texture_pair = f.load_texture_pair(f'resources/images/characters/test/body/idle_to_walk_0.png')
-        self.jump_texture_pair = f.load_texture_pair(f'resources/images/characters/test/body/idle_to_walk_0.png')
-        self.fall_texture_pair = f.load_texture_pair(f'resources/images/characters/test/body/idle_to_walk_0.png')
-
-        # Load textures for WALKING.
-        self.walk_textures = []
-        for i in range(9):
-            texture = f.load_texture_pair(f'resources/images/characters/test/body/walk_{i}.png')
-            self.walk_textures.append(texture)
-
-        # Load textures for RUNNING.
-        self.run_textures = []
-        for i in range(5):
-            texture = f.load_texture_pair(f'resources/images/characters/test/body/run_{i}.png')
-            self.run_textures.append(texture)
-
-        # Load textures for CLIMBING.
-        self.climbing_textures = []
-        texture = arcade.load_texture(f'resources/images/characters/test/body/idle_to_walk_0.png')
-        self.climbing_textures.append(texture)
-        texture = arcade.load_texture(f'resources/images/characters/test/body/idle_to_walk_0.png')
-        self.climbing_textures.append(texture)
-
-        # Load textures for going from IDLE to JUMPING.
-        self.idle_to_jump_textures = []
-        for i in range(16):
-            texture = f.load_texture_pair(f'resources/images/characters/test/body/idle_to_jump_{i}.png')
-            self.idle_to_jump_textures.append(texture)
-
-        # Set the initial texture.
-        self.texture = self.idle_texture_pair[0]
-
-        # Hit box will be set based on the first image used. If you want to specify
-        # a different hit box, you can do it like the code below.
-        self.set_hit_box([[-10, -31], [-7, 32], [7, 32], [10, -31]])
-        # self.set_hit_box(self.texture.hit_box_points)
-
-        # Mouse position.
-        self.mouse_pos_x = 0
-        self.mouse_pos_y = 0
-
-        # Set up the legs, the two arms sprites, and the head.
-        self.legs = self.PlayerCharacterLegs()
-        self.head = self.PlayerCharacterHead()
-        self.front_arm = self.PlayerCharacterFrontArm()
-        self.back_arm = self.PlayerCharacterBackArm()
-
-    def get_head_offset(self):
-        """Gets a number in pixels of how much higher or lower the head should be positioned
-            on each frame of animation, so it doesn't stay still."""
-
-    def acquire_mouse_position(self, x, y):
-        """Get the mouse x and y from the Game class."""
-        self.mouse_pos_x = x
-        self.mouse_pos_y = y
-
-    def update_appendages(self):
-        """Positions the sprites and updates variables such as jumping and idling for the legs.
-            Makes the cur_texture of all the appendages the same as the player sprite's.
-        """
-
-        # Set type of gun equipped.
-        self.front_arm.equipped_one_handed = self.equipped_one_handed
-        self.back_arm.equipped_one_handed = self.equipped_one_handed
-        self.front_arm.equipped_two_handed = self.equipped_two_handed
-        self.back_arm.equipped_two_handed = self.equipped_two_handed
-
-        # Legs.
-        self.legs.center_x = self.center_x
-        self.legs.center_y = self.center_y
-
-        self.legs.jumping = self.jumping
-        self.legs.climbing = self.climbing
-        self.legs.is_on_ladder = self.is_on_ladder
-        self.legs.idling = self.idling
-        self.legs.sprinting = self.sprinting
-        self.legs.cur_texture = self.cur_texture
-
-        self.legs.character_face_direction = self.character_face_direction
-
-        # Position the head using body position and x, y offsets listed in 'game_functions.py'.
-        if self.character_face_direction == c.RIGHT_FACING:
-            if not self.idling:
-                if self.head.angle >= -90 and self.head.angle <= 90:
-                    self.head.center_x = self.center_x + (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) - (
-                                                 0 * c.PIXEL_SCALING)  # Offset for looking the other direction.
-                else:
-                    self.head.center_x = self.center_x + (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) + (
-                                                 2 * c.PIXEL_SCALING)
-            else:
-                if self.head.angle >= -90 and self.head.angle <= 90:
-                    self.head.center_x = self.center_x + (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) - (
-                                                 2 * c.PIXEL_SCALING)  # Offset for looking the other direction.
-                else:
-                    self.head.center_x = self.center_x + (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) + (
-                                                 0 * c.PIXEL_SCALING)
-
-        else:
-            if self.idling:
-                if self.head.angle >= -90 and self.head.angle <= 90:
-                    self.head.center_x = self.center_x - (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) + (
-                                                 0 * c.PIXEL_SCALING)  # Offset for looking the other direction.
-                else:
-                    self.head.center_x = self.center_x - (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) + (
-                                                 2 * c.PIXEL_SCALING)
-            else:
-                if self.head.angle >= -90 and self.head.angle <= 90:
-                    self.head.center_x = self.center_x - (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) - (
-                                                 2 * c.PIXEL_SCALING)  # Offset for looking the other direction.
-                else:
-                    self.head.center_x = self.center_x - (
-                            f.get_head_offset_x(self.cur_texture_name) * c.PIXEL_SCALING) + (
-                                                 0 * c.PIXEL_SCALING)
-
-        self.head.center_y = self.center_y + (f.get_head_offset_y(self.cur_texture_name) * c.PIXEL_SCALING)
-
-        self.head.jumping = self.jumping
-        self.head.climbing = self.climbing
-        self.head.is_on_ladder = self.is_on_ladder
-        self.head.idling = self.idling
-
-        # Rotate the player's head to look towards the mouse pointer.
-        self.head.update_rotation(dest_x=self.mouse_pos_x,
-                                  dest_y=self.mouse_pos_y)
-
-        # Front arm.
-        self.front_arm.jumping = self.jumping
-        self.front_arm.climbing = self.climbing
-        self.front_arm.is_on_ladder = self.is_on_ladder
-        self.front_arm.idling = self.idling
-        self.front_arm.sprinting = self.sprinting
-
-        self.front_arm.character_face_direction = self.character_face_direction
-        self.firing = self.front_arm.firing
-
-        if self.equipped_one_handed:
-            self.front_arm.center_y = self.center_y  # + (17 * c.PIXEL_SCALING)
-            self.front_arm.update_rotation(dest_x=self.mouse_pos_x,
-                                           dest_y=self.mouse_pos_y)
-            if self.character_face_direction == c.RIGHT_FACING:
-                self.front_arm.center_x = self.center_x  # - (4 * c.PIXEL_SCALING)
-            elif self.character_face_direction == c.LEFT_FACING:
-                self.front_arm.center_x = self.center_x  # + (4 * c.PIXEL_SCALING)
-        else:
-            self.front_arm.center_x = self.center_x
-            self.front_arm.center_y = self.center_y
-            self.front_arm.angle = 0
-            self.front_arm.cur_texture = self.cur_texture
-
-        # Back arm.
-        self.back_arm.jumping = self.jumping
-        self.back_arm.climbing = self.climbing
-        self.back_arm.is_on_ladder = self.is_on_ladder
-        self.back_arm.idling = self.idling
-        self.back_arm.sprinting = self.sprinting
-        self.back_arm.cur_texture = self.cur_texture
-
-        self.back_arm.character_face_direction = self.character_face_direction
-
-        self.back_arm.center_x = self.center_x
-        self.back_arm.center_y = self.center_y
-        self.back_arm.angle = 0
-
-    def update_animation(self, delta_time: float = 1 / 60):
-        self.update_appendages()
-        # Figure out if we need to flip face left or right.
-        if self.change_x < 0 and self.character_face_direction == c.RIGHT_FACING:
-            self.character_face_direction = c.LEFT_FACING
-        elif self.change_x > 0 and self.character_face_direction == c.LEFT_FACING:
-            self.character_face_direction = c.RIGHT_FACING
-
-        # CLIMBING animation.
-        if self.is_on_ladder:
-            self.climbing = True
-        if not self.is_on_ladder and self.climbing:
-            self.climbing = False
-        if self.climbing and abs(self.change_y) > 1:
-            self.cur_texture += 1
-            if self.cur_texture > 7:
-                self.cur_texture = 0
-        if self.climbing:
-            self.texture = self.climbing_textures[self.cur_texture // 4]
-            return
-
-        # JUMPING animation.
-        if self.change_y > 0 and not self.is_on_ladder:
-            self.jumping = True
-            self.cur_texture += 1
-            if self.cur_texture > 15 * c.UPDATES_PER_FRAME:  # TODO: Change all these to the actual length of the list.
-                self.cur_texture = 0
-            frame = self.cur_texture // c.UPDATES_PER_FRAME
-            self.cur_texture_name = f'idle_to_jump_{frame}'
-            direction = self.character_face_direction
-            self.texture = self.idle_to_jump_textures[frame][direction]
-            return
-        elif self.change_y < 0 and not self.is_on_ladder:
-            self.jumping = True
-            self.cur_texture += 1
-            if self.cur_texture > 15 * c.UPDATES_PER_FRAME:
-                self.cur_texture = 0
-            frame = self.cur_texture // c.UPDATES_PER_FRAME
-            self.cur_texture_name = f'idle_to_jump_{frame}'
-            direction = self.character_face_direction
-            self.texture = self.idle_to_jump_textures[frame][direction]
+class Enemy(an.Character):
+    """Base class for the enemy. Uses the same animation engine as the player, with its own frames.
+        There can be a lot of enemies on the screen, so they draw with composite poses if turned on."""
+
+    character_folder = 'test'
+    composite_poses = c.COMPOSITE_ENEMY_POSES
+
+
+# What an enemy is doing, in EnemyManager.state.
+STATE_PATROL = 0
+STATE_AIM = 1
+
+# How far along its aim angle the point an enemy's head and gun turn towards is.
+AIM_REACH = 1000
+
+
+class EnemyManager:
+    """Every enemy in a level. Their state is kept in numpy arrays, one value per enemy, and the
+        whole lot is moved on with a handful of array operations each update, however many there are.
+        Only enemies on or near the screen have their sprites set from the arrays and are put in the
+        sprite list, so enemies far away cost next to nothing.
+
+        Enemies walk back and forth along their patrol, and stop to aim at the player when the player
+        is near. They don't fall or bump into walls."""
+
+    def __init__(self, sprite_list):
+        # Where the parts of the enemies near the screen go, to be drawn.
+        self.sprite_list = sprite_list
+
+        # The Enemy sprites, in the same order as the arrays.
+        self.enemies = []
+
+        # Length of every clip, and how many updates each of its frames is shown for, by clip id.
+        self.clip_lengths = numpy.array([clip.length for clip in an.HUMAN_CLIPS])
+        self.clip_ticks_per_frame = numpy.array([clip.ticks_per_frame for clip in an.HUMAN_CLIPS])
+
+        # Where each enemy starts, and the ends of its patrol.
+        self.start_x = numpy.zeros(0)
+        self.start_y = numpy.zeros(0)
+        self.patrol_left = numpy.zeros(0)
+        self.patrol_right = numpy.zeros(0)
+
+        self.x = numpy.zeros(0)
+        self.y = numpy.zeros(0)
+        self.change_x = numpy.zeros(0)
+        self.facing = numpy.zeros(0, dtype=numpy.int64)
+
+        # The clip each enemy's body plays, how many updates into it and the frame that is on, as in an.Animator.
+        self.clip = numpy.zeros(0, dtype=numpy.int64)
+        self.tick = numpy.zeros(0, dtype=numpy.int64)
+        self.frame = numpy.zeros(0, dtype=numpy.int64)
+
+        # Angle the head and gun point at, in degrees, and STATE_PATROL or STATE_AIM.
+        self.aim_angle = numpy.zeros(0)
+        self.state = numpy.zeros(0, dtype=numpy.int64)
+
+        # Whether each enemy's sprites are in the sprite list.
+        self.shown = numpy.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return len(self.enemies)
+
+    def add_enemies(self, xs, ys, patrol_distance=c.ENEMY_PATROL_DISTANCE):
+        """Adds an enemy at each x, y position, patrolling that far either side of it."""
+        xs = numpy.asarray(xs, dtype=numpy.float64)
+        ys = numpy.asarray(ys, dtype=numpy.float64)
+        for _ in range(len(xs)):
+            enemy = Enemy()
+            enemy.equipped_one_handed = True
+            self.enemies.append(enemy)
+
+        self.start_x = numpy.concatenate([self.start_x, xs])
+        self.start_y = numpy.concatenate([self.start_y, ys])
+        self.patrol_left = numpy.concatenate([self.patrol_left, xs - patrol_distance])
+        self.patrol_right = numpy.concatenate([self.patrol_right, xs + patrol_distance])
+        self.reset()
+
+    def add_enemy(self, x, y, patrol_distance=c.ENEMY_PATROL_DISTANCE):
+        """Adds one enemy. Adding many with add_enemies() is quicker."""
+        self.add_enemies([x], [y], patrol_distance)
+
+    def reset(self):
+        """Puts every enemy back where it started, standing still and facing right."""
+        count = len(self.enemies)
+        self.x = self.start_x.copy()
+        self.y = self.start_y.copy()
+        self.change_x = numpy.zeros(count)
+        self.facing = numpy.full(count, c.RIGHT_FACING, dtype=numpy.int64)
+        self.clip = numpy.full(count, an.CLIP_IDLE, dtype=numpy.int64)
+        self.tick = numpy.zeros(count, dtype=numpy.int64)
+        self.frame = numpy.zeros(count, dtype=numpy.int64)
+        self.aim_angle = numpy.zeros(count)
+        self.state = numpy.full(count, STATE_PATROL, dtype=numpy.int64)
+
+        # Sprites are put back in the sprite list by the next sync().
+        for index in numpy.flatnonzero(self.shown):
+            self.hide(index)
+        self.shown = numpy.zeros(count, dtype=bool)
+
+    def update(self, player_x, player_y):
+        """Moves every enemy on by one update, and works out where it aims and what frame it's on."""
+        if not self.enemies:
             return
-        self.jumping = False
 
-        # IDLE animation.
-        if self.change_x == 0 and self.change_y == 0:
-            self.idling = True
-            self.texture = self.idle_texture_pair[self.character_face_direction]
-            self.cur_texture_name = f'idle_to_walk_0'
+        # Enemies that can see the player stop and aim at them.
+        offset_x = player_x - self.x
+        offset_y = player_y - self.y
+        sees = (numpy.abs(offset_x) < c.ENEMY_SIGHT_X) & (numpy.abs(offset_y) < c.ENEMY_SIGHT_Y)
+        self.state = numpy.where(sees, STATE_AIM, STATE_PATROL)
+
+        # The rest turn round at the ends of their patrol.
+        facing = self.facing
+        facing[self.x >= self.patrol_right] = c.LEFT_FACING
+        facing[self.x <= self.patrol_left] = c.RIGHT_FACING
+        facing[sees] = numpy.where(offset_x[sees] < 0, c.LEFT_FACING, c.RIGHT_FACING)
+
+        walk_speed = numpy.where(facing == c.RIGHT_FACING, c.ENEMY_WALK_SPEED, -c.ENEMY_WALK_SPEED)
+        self.change_x = numpy.where(sees, 0, walk_speed)
+        self.x += self.change_x
+
+        # Point at the player, or straight ahead.
+        ahead = numpy.where(facing == c.RIGHT_FACING, 0, 180)
+        self.aim_angle = numpy.where(sees, numpy.degrees(numpy.arctan2(offset_y, offset_x)), ahead)
+
+        # Walk or stand still. Switching clips keeps the same tick unless the new clip is too
+        # short for it, then every clip moves on by one update, the same as an.Animator.play().
+        clip = numpy.where(self.change_x != 0, an.CLIP_WALK, an.CLIP_IDLE)
+        lengths = self.clip_lengths[clip]
+        tick = numpy.where((clip != self.clip) & (self.tick >= lengths), 0, self.tick) + 1
+        tick[tick >= lengths] = 0
+        self.clip = clip
+        self.tick = tick
+        self.frame = tick // self.clip_ticks_per_frame[clip]
+
+    def sync(self, view_left, view_bottom, margin=c.ENEMY_VIEW_MARGIN):
+        """Sets the sprites of the enemies on or near the screen from the arrays, and puts them
+            in the sprite list. Enemies that have gone off the screen are taken out of it."""
+        if not self.enemies:
             return
 
-        self.idling = False
-        if self.sprinting:
-            # RUNNING animation.
-            self.cur_texture += 1
-            if self.cur_texture == 2 * c.UPDATES_PER_FRAME:
-                arcade.play_sound(a.sound[f'run_grass_{random.randint(1, 8)}'])
-            if self.cur_texture > 4 * c.UPDATES_PER_FRAME:
-                self.cur_texture = 0
-                arcade.play_sound(a.sound[f'run_grass_{random.randint(1, 8)}'])
-            frame = self.cur_texture // c.UPDATES_PER_FRAME
-            self.cur_texture_name = f'run_{frame}'
-            direction = self.character_face_direction
-            self.texture = self.run_textures[frame][direction]
-            return
-
-        else:
-            # WALKING animation.
-            self.cur_texture += 1
-            if self.cur_texture == 4 * c.UPDATES_PER_FRAME:
-                arcade.play_sound(a.sound[f'walk_grass_{random.randint(1, 8)}'])
-            if self.cur_texture > 8 * c.UPDATES_PER_FRAME:
-                self.cur_texture = 0
-                arcade.play_sound(a.sound[f'walk_grass_{random.randint(1, 8)}'])
-            frame = self.cur_texture // c.UPDATES_PER_FRAME
-            self.cur_texture_name = f'walk_{frame}'
-            direction = self.character_face_direction
-            self.texture = self.walk_textures[frame][direction]
-            return
+        near = ((self.x > view_left - margin) & (self.x < view_left + c.SCREEN_WIDTH + margin)
+                & (self.y > view_bottom - margin) & (self.y < view_bottom + c.SCREEN_HEIGHT + margin))
+        for index in numpy.flatnonzero(self.shown & ~near):
+            self.hide(index)
+        for index in numpy.flatnonzero(near & ~self.shown):
+            self.show(index)
+        self.shown = near
 
-    class PlayerCharacterLegs(arcade.Sprite):
-        """Player Sprite legs."""
-
-        def __init__(self):
-            # Set up parent class.
-            super().__init__()
-
-            # Default to face-right.
-            self.character_face_direction = c.RIGHT_FACING
-
-            # Used for flipping between image sequences.
-            self.cur_texture = 0
-            self.scale = c.PIXEL_SCALING
-
-            # Track our state.
-            self.jumping = False
-            self.climbing = False
-            self.is_on_ladder = False
-            self.idling = False
-            self.sprinting = False
-
-            # --- Load Textures --- #
-
-            # Load textures for IDLE standing.
-            self.idle_texture_pair = f.load_texture_pair(f'resources/images/characters/test/legs/idle_to_walk_0.png')
-            self.jump_texture_pair = f.load_texture_pair(f'resources/images/characters/test/legs/idle_to_walk_0.png')
-            self.fall_texture_pair = f.load_texture_pair(f'resources/images/characters/test/legs/idle_to_walk_0.png')
-
-            # Load textures for WALKING.
-            self.walk_textures = []
-            for i in range(9):
-                texture = f.load_texture_pair(f'resources/images/characters/test/legs/walk_{i}.png')
-                self.walk_textures.append(texture)
-
-            # Load textures for RUNNING.
-            self.run_textures = []
-            for i in range(5):
-                texture = f.load_texture_pair(f'resources/images/characters/test/legs/run_{i}.png')
-                self.run_textures.append(texture)
-
-            # Load textures for going from IDLE to JUMPING.
-            self.idle_to_jump_textures = []
-            for i in range(16):
-                texture = f.load_texture_pair(f'resources/images/characters/test/legs/idle_to_jump_{i}.png')
-                self.idle_to_jump_textures.append(texture)
-
-            # Load textures for CLIMBING.
-            self.climbing_textures = []
-            texture = arcade.load_texture(f'resources/images/characters/test/legs/idle_to_walk_0.png')
-            self.climbing_textures.append(texture)
-            texture = arcade.load_texture(f'resources/images/characters/test/legs/idle_to_walk_0.png')
-            self.climbing_textures.append(texture)
-
-            # Set the initial texture.
-            self.texture = self.idle_texture_pair[0]
-
-            # Hit box will be set based on the first image used. If you want to specify
-            # a different hit box, you can do it like the code below.
-            # self.set_hit_box([[-6, -31], [-6, 32], [17, 32], [17, -31]])
-            # self.set_hit_box(self.texture.hit_box_points)
-
-        def update_animation(self, delta_time: float = 1 / 60):
-            # CLIMBING animation.
-            if self.climbing:
-                self.texture = self.climbing_textures[self.cur_texture // 4]
-                return
-
-            # IDLE to JUMPING animation.
-            if self.jumping:
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.idle_to_jump_textures[frame][direction]
-                return
-
-            # IDLE animation.
-            if self.idling:
-                self.texture = self.idle_texture_pair[self.character_face_direction]
-                return
-
-            if self.sprinting:
-                # RUNNING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-
-                # This is to stop the 'list out of bounds error'.
-                try:
-                    self.texture = self.run_textures[frame][direction]
-                except:
-                    self.texture = self.run_textures[0][direction]
-                return
-
-            else:
-                # WALKING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.walk_textures[frame][direction]
-                return
-
-    class PlayerCharacterHead(arcade.Sprite):
-        """Player Sprite head."""
-
-        def __init__(self):
-            # Set up parent class.
-            super().__init__()
-
-            # Default to face-right.
-            self.character_face_direction = c.RIGHT_FACING
-
-            self.scale = c.PIXEL_SCALING
-
-            # Track our state.
-            self.jumping = False
-            self.climbing = False
-            self.is_on_ladder = False
-            self.idling = False
-            self.sprinting = False
-
-            # --- Load Textures --- #
-
-            # Load textures for IDLE standing.
-            self.texture_pair = f.load_texture_pair_vertical_flip(f'resources/images/characters/test/head/head.png')
-
-            # Set the initial texture.
-            self.texture = self.texture_pair[0]
-
-            # Destination point is where we are going.
-            self.dest_x = 0
-            self.dest_y = 0
-
-            # Max speed we can rotate.
-            self.rot_speed = 5
-
-            # TODO: Add separate hitbox for the head, to allow headshots.
-            # Hit box will be set based on the first image used. If you want to specify
-            # a different hit box, you can do it like the code below.
-            # self.set_hit_box([[-6, -31], [-6, 32], [17, 32], [17, -31]])
-            # self.set_hit_box(self.texture.hit_box_points)
-
-        def update_rotation(self, dest_x, dest_y):
-            # Calculate the angle in radians between the start points
-            # and end points. This is the angle the head will face.
-            x_diff = dest_x - self.center_x
-            y_diff = dest_y - self.center_y
-
-            # Determine if the head should be flipped.
-            if dest_x > self.center_x:
-                self.character_face_direction = c.RIGHT_FACING
-            elif dest_x < self.center_x:
-                self.character_face_direction = c.LEFT_FACING
-            else:
-                # Stay the same direction.
-                pass
-            self.texture = self.texture_pair[self.character_face_direction]
-
-            angle = math.atan2(y_diff, x_diff)
-
-            # Set the head to face the mouse position.
-            self.angle = math.degrees(angle)
-
-    class PlayerCharacterFrontArm(arcade.Sprite):
-        """Player Sprite front arm."""
-
-        def __init__(self):
-            # Set up parent class.
-            super().__init__()
-
-            # Default to face-right.
-            self.character_face_direction = c.RIGHT_FACING
-
-            self.scale = c.PIXEL_SCALING
-            self.cur_texture = 0
-            self.equipped_one_handed = False
-            self.equipped_two_handed = False
-
-            # Track our state.
-            self.jumping = False
-            self.climbing = False
-            self.is_on_ladder = False
-            self.idling = False
-            self.sprinting = False
-            self.firing = False
-
-            # --- Load Textures --- #
-
-            # Load textures for idle standing.
-            self.idle_texture_pair = f.load_texture_pair(
-                f'resources/images/characters/test/front_arms/idle_to_walk_0.png')
-
-            # Load textures for climbing.
-            self.climbing_textures = f.load_texture_pair(
-                f'resources/images/characters/test/front_arms/idle_to_walk_0.png')
-
-            # Load textures for One-Handed weapons.
-            self.one_handed_texture_pair = f.load_texture_pair_vertical_flip(
-                f'resources/images/characters/test/front_arms'
-                f'/one_handed_firing_0.png')
-
-            # Load textures for going from IDLE to JUMPING.
-            self.idle_to_jump_textures = []
-            for i in range(16):
-                texture = f.load_texture_pair(f'resources/images/characters/test/front_arms/idle_to_jump_{i}.png')
-                self.idle_to_jump_textures.append(texture)
-
-            # Load textures for walking.
-            self.walk_textures = []
-            for i in range(9):
-                texture = f.load_texture_pair(f'resources/images/characters/test/front_arms/walk_{i}.png')
-                self.walk_textures.append(texture)
-
-            # Load textures for RUNNING.
-            self.run_textures = []
-            for i in range(5):
-                texture = f.load_texture_pair(f'resources/images/characters/test/front_arms/run_{i}.png')
-                self.run_textures.append(texture)
-
-            # Load textures for ONE-HANDED FIRING.
-            self.one_handed_firing_textures = []
-            for i in range(3):
-                texture = f.load_texture_pair_vertical_flip(
-                    f'resources/images/characters/test/front_arms/one_handed_firing_{i}.png')
-                self.one_handed_firing_textures.append(texture)
-
-            # Set the initial texture.
-            self.texture = self.idle_texture_pair[self.character_face_direction]
-
-            # Destination point is where we are going.
-            self.dest_x = 0
-            self.dest_y = 0
-
-            # Max speed we can rotate.
-            self.rot_speed = 5
-
-        def animation_firing_one_handed(self):
-            # Fire one-handed weapon.
-            self.cur_texture += 1
-            if self.cur_texture > 4 * c.UPDATES_PER_FRAME:
-                self.cur_texture = 0
-            frame = self.cur_texture // c.UPDATES_PER_FRAME
-            direction = self.character_face_direction
-            self.texture = self.one_handed_firing_textures[frame][direction]
+        indices = numpy.flatnonzero(near)
+        if not len(indices):
             return
 
-        def update_animation(self, delta_time: float = 1 / 60):
-            # Equip gun
-            if self.equipped_one_handed and not self.firing:
-                self.texture = self.one_handed_texture_pair[self.character_face_direction]
-                return
-
-            # Fire one-handed weapon.
-            if self.firing:
-                if self.cur_texture > 4 * c.UPDATES_PER_FRAME:
-                    self.cur_texture = 0
-                self.cur_texture += 1
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                if frame >= 3:
-                    self.firing = False
-                    return
-                direction = self.character_face_direction
-                self.texture = self.one_handed_firing_textures[frame][direction]
-                return
-
-            # CLIMBING animation.
-            if self.climbing:
-                self.texture = self.climbing_textures[self.cur_texture // 4]
-                return
-
-            # IDLE to JUMPING animation.
-            if self.jumping:
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.idle_to_jump_textures[frame][direction]
-                return
-
-            # IDLE animation.
-            if self.idling:
-                self.texture = self.idle_texture_pair[self.character_face_direction]
-                return
-
-            if self.sprinting:
-                # RUNNING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-
-                # This is to stop the 'list out of bounds error'.
-                try:
-                    self.texture = self.run_textures[frame][direction]
-                except:
-                    self.texture = self.run_textures[0][direction]
-                return
-
-            else:
-                # WALKING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.walk_textures[frame][direction]
-                return
-
-        def update_rotation(self, dest_x, dest_y):
-            # Calculate the angle in radians between the start points
-            # and end points. This is the angle the head will face.
-            x_diff = dest_x - self.center_x
-            y_diff = dest_y - self.center_y
-
-            # Determine if the arm should be flipped.
-            if dest_x > self.center_x:
-                self.character_face_direction = c.RIGHT_FACING
-            elif dest_x < self.center_x:
-                self.character_face_direction = c.LEFT_FACING
-            else:
-                # Stay the same direction.
-                pass
-
-            angle = math.atan2(y_diff, x_diff)
-
-            # Set the arm to face the mouse position.
-            self.angle = math.degrees(angle)
-
-    class PlayerCharacterBackArm(arcade.Sprite):
-        """Player Sprite back arm."""
-
-        def __init__(self):
-            # Set up parent class.
-            super().__init__()
-
-            # Default to face-right.
-            self.character_face_direction = c.RIGHT_FACING
-
-            self.scale = c.PIXEL_SCALING
-            self.cur_texture = 0
-            self.equipped_one_handed = False
-            self.equipped_two_handed = False
-
-            # Track our state.
-            self.jumping = False
-            self.climbing = False
-            self.is_on_ladder = False
-            self.idling = False
-            self.sprinting = False
-
-            # --- Load Textures --- #
-
-            # Load textures for idle standing.
-            self.idle_texture_pair = f.load_texture_pair(
-                f'resources/images/characters/test/back_arms/idle_to_walk_0.png')
-
-            # Load textures for climbing.
-            self.climbing_textures = f.load_texture_pair(
-                f'resources/images/characters/test/back_arms/idle_to_walk_0.png')
-
-            # Load textures for going from IDLE to JUMPING.
-            self.idle_to_jump_textures = []
-            for i in range(16):
-                texture = f.load_texture_pair(f'resources/images/characters/test/back_arms/idle_to_jump_{i}.png')
-                self.idle_to_jump_textures.append(texture)
-
-            # Load textures for walking.
-            self.walk_textures = []
-            for i in range(9):
-                texture = f.load_texture_pair(f'resources/images/characters/test/back_arms/walk_{i}.png')
-                self.walk_textures.append(texture)
-
-            # Load textures for RUNNING.
-            self.run_textures = []
-            for i in range(5):
-                texture = f.load_texture_pair(f'resources/images/characters/test/back_arms/run_{i}.png')
-                self.run_textures.append(texture)
-
-            # Set the initial texture.
-            self.texture = self.idle_texture_pair[self.character_face_direction]
-
-            # Destination point is where we are going.
-            self.dest_x = 0
-            self.dest_y = 0
-
-            # Max speed we can rotate.
-            self.rot_speed = 5
-
-        def update_animation(self, delta_time: float = 1 / 60):
-            # CLIMBING animation.
-            if self.climbing:
-                self.texture = self.climbing_textures[self.cur_texture // 4]
-                return
-
-            # IDLE to JUMPING animation.
-            if self.jumping:
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.idle_to_jump_textures[frame][direction]
-                return
-
-            # IDLE animation.
-            if self.idling:
-                self.texture = self.idle_texture_pair[self.character_face_direction]
-                return
-
-            if self.sprinting:
-                # RUNNING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-
-                # This is to stop the 'list out of bounds error'.
-                try:
-                    self.texture = self.run_textures[frame][direction]
-                except:
-                    self.texture = self.run_textures[0][direction]
-                return
-
-            else:
-                # WALKING animation.
-                frame = self.cur_texture // c.UPDATES_PER_FRAME
-                direction = self.character_face_direction
-                self.texture = self.walk_textures[frame][direction]
-                return
-
-        def update_rotation(self, dest_x, dest_y):
-            # Calculate the angle in radians between the start points
-            # and end points. This is the angle the head will face.
-            x_diff = dest_x - self.center_x
-            y_diff = dest_y - self.center_y
-
-            # Determine if the arm should be flipped.
-            if dest_x > self.center_x:
-                self.character_face_direction = c.RIGHT_FACING
-            elif dest_x < self.center_x:
-                self.character_face_direction = c.LEFT_FACING
-            else:
-                # Stay the same direction.
-                pass
-
-            angle = math.atan2(y_diff, x_diff)
-
-            # Set the arm to face the mouse position.
-            self.angle = math.degrees(angle)
+        # Everything is turned into plain numbers in one go, as numpy's are slow to use one at a time.
+        x = self.x[indices]
+        y = self.y[indices]
+        radians = numpy.radians(self.aim_angle[indices])
+        rows = zip(indices.tolist(), x.tolist(), y.tolist(), self.change_x[indices].tolist(),
+                   self.facing[indices].tolist(), self.clip[indices].tolist(),
+                   self.tick[indices].tolist(), self.frame[indices].tolist(),
+                   (x + numpy.cos(radians) * AIM_REACH).tolist(), (y + numpy.sin(radians) * AIM_REACH).tolist())
+
+        for index, center_x, center_y, change_x, facing, clip_id, tick, frame, aim_x, aim_y in rows:
+            enemy = self.enemies[index]
+            enemy.position = (center_x, center_y)
+            enemy.change_x = change_x
+            enemy.character_face_direction = facing
+
+            animator = enemy.animator
+            if animator.clip_id != clip_id:
+                animator.clip_id = clip_id
+                animator.clip = animator.clips[clip_id]
+            animator.tick = tick
+            animator.frame = frame
+
+            enemy.acquire_mouse_position(aim_x, aim_y)
+            enemy.update_textures()
+            enemy.update_appendages()
+
+    def show(self, index):
+        """Puts an enemy's parts in the sprite list, in the order they're drawn."""
+        for sprite in self.enemies[index].parts:
+            self.sprite_list.append(sprite)
+
+    def hide(self, index):
+        """Takes an enemy's parts out of the sprite list."""
+        for sprite in self.enemies[index].parts:
+            self.sprite_list.remove(sprite)
@@ -6,17 +6,147 @@ Import this as 'f' for consistency.
 
 import arcade
 import os
+import io
+import hashlib
+import threading
 import random
+import PIL.Image
 from pyglet.gl import GL_NEAREST
 import math
 import game_constants as c
+import game_pack as pk
+
+
+# -- TEXTURE REGISTRY -- #
+
+
+# Decoded images, keyed by the SHA-1 of the file contents.
+# Identical PNGs saved under different names are only ever decoded once.
+image_cache = {}
+
+# File path to the digest of its contents, so each file is only read from disk once.
+path_digests = {}
+
+# Shared Texture objects, keyed by (digest, flipped horizontally, flipped vertically, region),
+# or by ('made', name) for textures made in code.
+texture_cache = {}
+
+# Every texture in the registry, sorted into the atlas it should be packed into.
+# A sprite list that is preloaded with a whole group never has to rebuild its atlas
+# when a sprite switches to a new animation frame.
+atlas_groups = {'characters': [],
+                'effects': [],
+                'items': [],
+                'other': []}
+
+
+def get_atlas_group(filename):
+    """Returns the name of the atlas group an image file belongs to, based on its folder."""
+    if 'images/characters/' in filename:
+        return 'characters'
+    if 'images/effects/' in filename:
+        return 'effects'
+    if 'images/items/' in filename:
+        return 'items'
+    return 'other'
+
+
+# Guards the registry, since the background loader decodes images on other threads.
+registry_lock = threading.Lock()
+
+
+def decode_image(filename):
+    """Reads and decodes an image file into the registry if it isn't there already, and
+        returns the digest of its contents. Safe to call from the background loader's threads."""
+    digest = path_digests.get(filename)
+    if digest is not None:
+        return digest
+
+    # Use the pre-decoded pixels in the asset pack if it has been built.
+    packed = pk.load_image(filename)
+    if packed is not None:
+        digest, image = packed
+    else:
+        with open(filename, 'rb') as file:
+            data = file.read()
+        digest = hashlib.sha1(data).hexdigest()
+        image = None
+        if digest not in image_cache:
+            image = PIL.Image.open(io.BytesIO(data)).convert('RGBA')
+
+    with registry_lock:
+        if image is not None:
+            image_cache.setdefault(digest, image)
+        path_digests[filename] = digest
+
+    return digest
+
+
+def load_texture(filename, flipped_horizontally=False, flipped_vertically=False, region=None):
+    """Returns the shared texture for an image file, only reading and decoding the file
+        the first time it is asked for. Flipped variants are made from the same decoded image.
+        Region is an optional (x, y, width, height) part of the image, e.g. one tile of a tileset."""
+    digest = decode_image(filename)
+    if region is not None:
+        region = tuple(region)
+
+    key = (digest, flipped_horizontally, flipped_vertically, region)
+    texture = texture_cache.get(key)
+    if texture is not None:
+        return texture
+
+    with registry_lock:
+        # Another thread may have made it while we were waiting.
+        texture = texture_cache.get(key)
+        if texture is None:
+            image = image_cache[digest]
+            name = f'{digest}-{int(flipped_horizontally)}-{int(flipped_vertically)}'
+            if region is not None:
+                x, y, width, height = region
+                image = image.crop((x, y, x + width, y + height))
+                name += f'-{x}-{y}-{width}-{height}'
+            if flipped_horizontally:
+                image = image.transpose(PIL.Image.FLIP_LEFT_RIGHT)
+            if flipped_vertically:
+                image = image.transpose(PIL.Image.FLIP_TOP_BOTTOM)
+
+            # The name is what sprite list atlases use to tell textures apart,
+            # so textures with the same contents share one slot in the atlas.
+            texture = arcade.Texture(name, image)
+            texture_cache[key] = texture
+            atlas_groups[get_atlas_group(filename)].append(texture)
+
+    return texture
+
+
+def add_texture(name, image, group_name):
+    """Returns a texture for an image made in code, e.g. by compositing loaded ones, and puts it
+        in an atlas group so preloading the group packs it too. The name should say what it's made
+        of, so the same image made twice shares one texture."""
+    with registry_lock:
+        key = ('made', name)
+        texture = texture_cache.get(key)
+        if texture is None:
+            texture = arcade.Texture(name, image)
+            texture_cache[key] = texture
+            atlas_groups[group_name].append(texture)
+    return texture
+
+
+def preload_atlas(sprite_list, *group_names):
+    """Packs every texture in the given atlas groups into the sprite list's atlas up front."""
+    textures = []
+    for name in group_names:
+        textures.extend(atlas_groups[name])
+    if textures:
+        sprite_list.preload_textures(textures)
 
 
 def load_texture_pair(filename):
     """Loads a texture pair, with the second being a mirror image."""
     return [
-        arcade.load_texture(filename),
-        arcade.load_texture(filename, flipped_horizontally=True)
+        load_texture(filename),
+        load_texture(filename, flipped_horizontally=True)
     ]
 
 
@@ -24,8 +154,8 @@ def load_texture_pair_vertical_flip(filename):
     """Loads a texture pair, with the second being a vertical mirror image.
         Used for sprites that both rotate with angles and face left or right."""
     return [
-        arcade.load_texture(filename),
-        arcade.load_texture(filename, flipped_vertically=True)
+        load_texture(filename),
+        load_texture(filename, flipped_vertically=True)
     ]
 
 
@@ -41,7 +171,7 @@ class BlackScreenFade(arcade.Sprite):
         self.cur_alpha = 255
         self.counter = 0
         self.alpha = 0
-        self.texture = arcade.load_texture('resources/images/ui/black_fade.png')
+        self.texture = load_texture('resources/images/ui/black_fade.png')
         self.scale = c.PIXEL_SCALING
         self.center_x = c.SCREEN_WIDTH / 2
         self.center_y = c.SCREEN_HEIGHT / 2
@@ -84,161 +214,89 @@ screen_fade = BlackScreenFade()
 # TODO: end_of_animation function to detect the end of an animation.
 
 
-# -- PLAYER AND ENEMIES SPRITE STUFF -- #
-
-
-# HEAD
-
-
-# List of all the names of the human sprite animation frames in the game.
-frame_list = []
-
-# Dictionary that contains the names of the frames and their respective head positions.
-# This is what is accessed whenever the head is repositioned.
-frame_head_position = {}
-
-# Contains all the x, y values for all the different animation frames.
-head_positions = []
-
-# x, y co-ordinates for the different frames. Contents added to 'head_positions' afterwards.
-head_positions_idle_to_jump = [[1, 24], [2, 25], [3, 20], [3, 16], [3, 17], [2, 24], [2, 30], [1, 26],
-                               [1, 24], [0, 25], [-1, 26], [-1, 26], [1, 25], [-1, 23], [-1, 22], [-1, 22]]
-
-head_positions_idle_to_walk = [[1, 23], [1, 23], [1, 23], [1, 22], [1, 21], [2, 23]]
-
-head_positions_run = [[9, 23], [10, 20], [16, 23], [8, 24], [8, 22]]
-
-head_positions_walk = [[-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 23]]
-
-
-def add_frames_to_list():
-    """Loads all the names of the frame files and puts them into frame_list.
-        Also compiles all the 'head_positions_(x)' lists into one big list.
-        MUST ALL BE IN SAME ORDER!"""
-
-    # Compiling positions into big list.
-    for i in head_positions_idle_to_jump:
-        head_positions.append(i)
-    for i in head_positions_idle_to_walk:
-        head_positions.append(i)
-    for i in head_positions_run:
-        head_positions.append(i)
-    for i in head_positions_walk:
-        head_positions.append(i)
-
-    # Adding all the names.
-    for i in range(16):
-        frame_list.append(f'idle_to_jump_{i}')
-    for i in range(6):
-        frame_list.append(f'idle_to_walk_{i}')
-    for i in range(5):
-        frame_list.append(f'run_{i}')
-    for i in range(9):
-        frame_list.append(f'walk_{i}')
-
-    return frame_list
-
-
-def load_frames_and_positions():
-    # For all the frames of the animations.
-    counter = -1
-    for i in frame_list:
-        counter += 1
-        # Load the positions into the dictionary.
-        frame_head_position[f'{i}'.format(i)] = head_positions[counter]
-
-
-def get_head_offset_x(frame):
-    """Returns the x co-ordinates for where the centre of the head
-        should be from an animation frame."""
-    # Head position.
-    head_x = frame_head_position[f'{frame}']
-
-    return head_x[0]
-
-
-def get_head_offset_y(frame):
-    """Returns the y co-ordinates for where the centre of the head
-        should be from an animation frame."""
-    # Head position.
-    head_y = frame_head_position[f'{frame}']
-
-    return head_y[1]
-
-
-# ARMS
-
-# List of all the names of the human sprite animation frames in the game.
-arms_frame_list = []
-
-# Dictionary that contains the names of the frames and their respective head positions.
-# This is what is accessed whenever the head is repositioned.
-frame_arms_position = {}
-
-# Contains all the x, y values for all the different animation frames.
-arms_positions = []
-
-# x, y co-ordinates for the different frames. Contents added to 'arms_positions' afterwards.
-arms_positions_idle_to_jump = [[1, 24], [2, 25], [3, 20], [3, 16], [3, 17], [2, 24], [2, 30], [1, 26],
-                               [1, 24], [0, 25], [-1, 26], [-1, 26], [1, 25], [-1, 23], [-1, 22], [-1, 22]]
-
-arms_positions_idle_to_walk = [[1, 23], [1, 23], [1, 23], [1, 22], [1, 21], [2, 23]]
-
-arms_positions_run = [[9, 23], [10, 20], [16, 23], [8, 24], [8, 22]]
-
-arms_positions_walk = [[-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 24], [-2, 25], [-2, 24], [-2, 22], [-2, 23]]
-
-
-def arms_add_frames_to_list():
-    """Loads all the names of the frame files and puts them into frame_list.
-        Also compiles all the 'arms_positions_(x)' lists into one big list.
-        MUST ALL BE IN SAME ORDER!"""
-
-    # Compiling positions into big list.
-    for i in arms_positions_idle_to_jump:
-        arms_positions.append(i)
-    for i in arms_positions_idle_to_walk:
-        arms_positions.append(i)
-    for i in head_positions_run:
-        arms_positions.append(i)
-    for i in head_positions_walk:
-        arms_positions.append(i)
-
-    # Adding all the names.
-    for i in range(16):
-        arms_frame_list.append(f'idle_to_jump_{i}')
-    for i in range(6):
-        arms_frame_list.append(f'idle_to_walk_{i}')
-    for i in range(5):
-        arms_frame_list.append(f'run_{i}')
-    for i in range(9):
-        arms_frame_list.append(f'walk_{i}')
-
-    return arms_frame_list
-
-
-def arms_load_frames_and_positions():
-    # For all the frames of the animations.
-    counter = -1
-    for i in frame_list:
-        counter += 1
-        # Load the positions into the dictionary.
-        frame_arms_position[f'{i}'.format(i)] = arms_positions[counter]
-
-
-def get_arms_offset_x(frame):
-    """Returns the x co-ordinates for where the centre of the head
-        should be from an animation frame."""
-    # Arm position.
-    arm_x = frame_arms_position[f'{frame}']
-
-    return arm_x[0]
-
-
-def get_arms_offset_y(frame):
-    """Returns the y co-ordinates for where the centre of the head
-        should be from an animation frame."""
-    # Arm position.
-    arm_y = frame_arms_position[f'{frame}']
-
-    return arm_y[1]
+# -- SPRITE POOLS -- #
+
+
+class SpritePool:
+    """A fixed number of sprites, made up front and handed out again and again, for things
+        like bullets and hit effects that would otherwise be created and thrown away
+        many times a second.
+
+        Every sprite stays in the sprite list the whole time, with the free ones hidden, because
+        adding or removing a sprite makes the sprite list rebuild all of its buffers for the
+        graphics card. Update the sprites with the pool's update() rather than the sprite list's,
+        so only the ones in use are updated. Every sprite gets a 'pool' attribute, so it can
+        give itself back with pool.release(sprite)."""
+
+    def __init__(self, create_sprite, capacity, sprite_list):
+        self.sprite_list = sprite_list
+        self.capacity = capacity
+
+        # Sprites waiting to be used.
+        self.free = []
+
+        # Sprites that are in use. A dictionary so it keeps the order they were acquired in.
+        self.in_use = {}
+
+        for _ in range(capacity):
+            sprite = create_sprite()
+            sprite.pool = self
+            sprite.alpha = 0
+            self.free.append(sprite)
+            self.sprite_list.append(sprite)
+
+        # -- Utilisation counters -- #
+
+        # Every sprite handed out since the pool was made.
+        self.acquired_count = 0
+
+        # The most sprites that have been in use at once.
+        self.peak_in_use = 0
+
+        # Times a sprite was asked for and the pool had run out.
+        self.exhausted_count = 0
+
+    def acquire(self):
+        """Returns a free sprite, made visible, or None if they are all in use."""
+        if not self.free:
+            self.exhausted_count += 1
+            return None
+
+        sprite = self.free.pop()
+        sprite.alpha = 255
+        self.in_use[sprite] = None
+
+        self.acquired_count += 1
+        self.peak_in_use = max(self.peak_in_use, len(self.in_use))
+        return sprite
+
+    def release(self, sprite):
+        """Hides a sprite and puts it back in the pool."""
+        if sprite not in self.in_use:
+            return
+        del self.in_use[sprite]
+        sprite.alpha = 0
+        sprite.change_x = 0
+        sprite.change_y = 0
+        self.free.append(sprite)
+
+    def release_all(self):
+        """Puts every sprite back in the pool."""
+        for sprite in list(self.in_use):
+            self.release(sprite)
+
+    def update(self):
+        """Calls update() on every sprite in use."""
+        for sprite in list(self.in_use):
+            sprite.update()
+
+    @property
+    def utilisation(self):
+        """How much of the pool is in use, from 0 to 1."""
+        return len(self.in_use) / self.capacity
+
+    def get_stats(self):
+        """A line of text with the pool's counters, e.g. for showing on screen. Only uses letters, numbers
+            and commas, as the game's font has little else."""
+        return (f'{len(self.in_use)} of {self.capacity} in use, peak {self.peak_in_use}, '
+                f'{self.acquired_count} acquired, {self.exhausted_count} exhausted')
@@ -33,7 +33,7 @@ class Reticle(arcade.Sprite):
         self.visible = False
         self.alpha = 0
 
-        self.texture = arcade.load_texture('resources/images/ui/reticle.png')
+        self.texture = f.load_texture('resources/images/ui/reticle.png')
 
         # These will become the mouse position.
         self.follow_x = None
@@ -0,0 +1,405 @@
+"""
+Compiled levels. Each tiled map (and the tileset it uses) is compiled once into a compact
+binary form: per-layer arrays of gid, position and scale, plus a table of the image, hit box
+and properties for each gid. Restarting or changing level is then just filling sprite lists
+from those arrays, rather than parsing the XML and working every tile out again.
+
+Compiled levels are kept in memory, keyed by the map's path and modification time, and saved
+next to the maps in 'resources/maps/compiled' so the next run of the game can skip parsing too.
+
+Layers that never move are drawn as ChunkedLayers, split into square chunks with their own sprite
+list each, so only the chunks on the screen are drawn however big the map is.
+
+Import this as 'lv' for consistency.
+"""
+
+import os
+import math
+import json
+import array
+import struct
+import threading
+import PIL.Image
+import arcade
+from arcade import tilemap
+import game_constants as c
+import game_functions as f
+import game_draw_layers as dl
+
+# Where compiled levels are saved.
+COMPILED_FOLDER = 'resources/maps/compiled'
+
+# Identifies the file, and the version of the layout below.
+LEVEL_MAGIC = b'UXLV'
+LEVEL_VERSION = 1
+
+# Header: magic, version, length of the JSON description in bytes.
+HEADER_FORMAT = '<4sII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# The layers of the map the game uses.
+LAYER_NAMES = ['Walls',
+               'Grass',
+               'Foreground Decorations',
+               'Background Decorations',
+               'Background Walls',
+               'Barrels',
+               'Treasure',
+               'Next Level',
+               'Enemies']
+
+# The arrays stored for each layer, with their array type codes.
+LAYER_ARRAYS = [('gids', 'I'),
+                ('center_x', 'f'),
+                ('center_y', 'f'),
+                ('scale', 'f')]
+
+# Compiled levels in memory, keyed by (map path, modification time of the map and its tilesets).
+level_cache = {}
+
+# Guards the level cache and the compiled files, since the background loader loads maps on other threads.
+level_lock = threading.Lock()
+
+
+class CompiledLevel:
+    """A level, compiled from a tiled map into flat arrays."""
+
+    def __init__(self, source_mtime, map_width, map_height, background_color, tiles, layers, layer_alphas):
+        # Modification time of the map and its tilesets when this was compiled.
+        self.source_mtime = source_mtime
+
+        # Size of the map, in pixels.
+        self.map_width = map_width
+        self.map_height = map_height
+
+        self.background_color = background_color
+
+        # For each gid: image file, flips, hit box and properties.
+        self.tiles = tiles
+
+        # For each layer name: a dictionary of the arrays in LAYER_ARRAYS.
+        self.layers = layers
+
+        # For each layer name: the alpha of its sprites, or None to leave them opaque.
+        self.layer_alphas = layer_alphas
+
+
+def get_source_mtime(map_name):
+    """Returns the latest modification time of a map and the tilesets in its folder."""
+    map_directory = os.path.dirname(map_name)
+    mtime = os.path.getmtime(map_name)
+    for file_name in os.listdir(map_directory):
+        if file_name.endswith('.tsx'):
+            mtime = max(mtime, os.path.getmtime(os.path.join(map_directory, file_name)))
+    return mtime
+
+
+def get_compiled_name(map_name):
+    """Returns the file a map is compiled to, e.g. 'resources/maps/compiled/1.lvl'."""
+    name = os.path.splitext(os.path.basename(map_name))[0]
+    return os.path.join(COMPILED_FOLDER, f'{name}.lvl')
+
+
+# -- COMPILING -- #
+
+
+def compile_tile(my_map, gid):
+    """Works out everything a sprite needs from a gid, the same way arcade's process_layer does."""
+    # Only done when compiling, so it's fine to lean on arcade's own tile handling here.
+    tile = tilemap._get_tile_by_gid(my_map, gid)
+    if tile is None:
+        raise ValueError(f"Couldn't find tile for gid {gid} in '{my_map.tmx_file}'.")
+
+    if tile.flipped_diagonally:
+        print(f'Warning, tile {gid} in {my_map.tmx_file} is flipped diagonally, which compiled levels ignore.')
+
+    sprite = tilemap._create_sprite_from_tile(my_map, tile, scaling=c.PIXEL_SCALING)
+    image_file = tilemap._get_image_source(tile, None, os.path.dirname(my_map.tmx_file))
+
+    # Tiles cut out of a tileset image, or only using part of their own image, need to know which part.
+    region = list(tilemap._get_image_info_from_tileset(tile))
+    with PIL.Image.open(image_file) as image:
+        if region == [0, 0, image.width, image.height]:
+            region = None
+
+    return {'image': os.path.normpath(str(image_file)).replace(os.sep, '/'),
+            'region': region,
+            'flipped_horizontally': tile.flipped_horizontally,
+            'flipped_vertically': tile.flipped_vertically,
+            'width': sprite.width,
+            'height': sprite.height,
+            'hit_box': [list(point) for point in sprite.get_hit_box()],
+            'properties': dict(sprite.properties)}
+
+
+def compile_level(map_name):
+    """Reads a tiled map and compiles it into a CompiledLevel."""
+    source_mtime = get_source_mtime(map_name)
+    my_map = arcade.tilemap.read_tmx(map_name)
+
+    tile_width = my_map.tile_size[0] * c.PIXEL_SCALING
+    tile_height = my_map.tile_size[1] * c.PIXEL_SCALING
+    map_rows = my_map.map_size.height
+
+    tiles = {}
+    layers = {}
+    layer_alphas = {}
+    for layer_name in LAYER_NAMES:
+        layer_arrays = {name: array.array(type_code) for name, type_code in LAYER_ARRAYS}
+        layers[layer_name] = layer_arrays
+        layer_alphas[layer_name] = None
+
+        layer = arcade.tilemap.get_tilemap_layer(my_map, layer_name)
+        if layer is None:
+            continue
+
+        if layer.opacity:
+            layer_alphas[layer_name] = int(layer.opacity * 255)
+
+        for row_index, row in enumerate(layer.layer_data):
+            for column_index, gid in enumerate(row):
+                # Check for empty square.
+                if gid == 0:
+                    continue
+
+                if gid not in tiles:
+                    tiles[gid] = compile_tile(my_map, gid)
+                tile = tiles[gid]
+
+                layer_arrays['gids'].append(gid)
+                layer_arrays['center_x'].append(column_index * tile_width + tile['width'] / 2)
+                layer_arrays['center_y'].append((map_rows - row_index - 1) * tile_height + tile['height'] / 2)
+                layer_arrays['scale'].append(c.PIXEL_SCALING)
+
+    background_color = list(my_map.background_color) if my_map.background_color else None
+
+    return CompiledLevel(source_mtime=source_mtime,
+                         map_width=my_map.map_size.width * tile_width,
+                         map_height=my_map.map_size.height * tile_height,
+                         background_color=background_color,
+                         tiles=tiles,
+                         layers=layers,
+                         layer_alphas=layer_alphas)
+
+
+def save_level(level, filename):
+    """Writes a compiled level to disk."""
+    description = {'source_mtime': level.source_mtime,
+                   'map_width': level.map_width,
+                   'map_height': level.map_height,
+                   'background_color': level.background_color,
+                   'tiles': {str(gid): tile for gid, tile in level.tiles.items()},
+                   'layers': {name: len(layer_arrays['gids']) for name, layer_arrays in level.layers.items()},
+                   'layer_alphas': level.layer_alphas}
+    description_bytes = json.dumps(description, separators=(',', ':')).encode('utf-8')
+
+    # Written to a temporary file first and then moved into place, so the game being closed part way
+    # through never leaves half a level behind.
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temporary_name = filename + '.tmp'
+    with open(temporary_name, 'wb') as file:
+        file.write(struct.pack(HEADER_FORMAT, LEVEL_MAGIC, LEVEL_VERSION, len(description_bytes)))
+        file.write(description_bytes)
+        for layer_name in LAYER_NAMES:
+            for array_name, _ in LAYER_ARRAYS:
+                file.write(level.layers[layer_name][array_name].tobytes())
+    os.replace(temporary_name, filename)
+
+
+def load_level(filename):
+    """Reads a compiled level from disk. Returns None if it is missing, from an older version,
+        or cut short or corrupt, so the map is compiled again."""
+    if not os.path.isfile(filename):
+        return None
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    try:
+        return read_level(data)
+    except (struct.error, ValueError, KeyError, TypeError):
+        # json.JSONDecodeError, and UnicodeDecodeError, are ValueErrors.
+        return None
+
+
+def read_level(data):
+    """Reads a compiled level from the bytes of a file. Returns None if it's the wrong version or size,
+        and raises struct.error, ValueError, KeyError or TypeError if it's corrupt."""
+    if len(data) < HEADER_SIZE:
+        return None
+    magic, version, description_size = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != LEVEL_MAGIC or version != LEVEL_VERSION:
+        return None
+
+    description = json.loads(data[HEADER_SIZE:HEADER_SIZE + description_size])
+    if list(description['layers']) != LAYER_NAMES:
+        return None
+
+    # The arrays should fill the rest of the file exactly.
+    offset = HEADER_SIZE + description_size
+    item_size = sum(array.array(type_code).itemsize for _, type_code in LAYER_ARRAYS)
+    if len(data) != offset + item_size * sum(description['layers'].values()):
+        return None
+
+    layers = {}
+    for layer_name in LAYER_NAMES:
+        count = description['layers'][layer_name]
+        layer_arrays = {}
+        for array_name, type_code in LAYER_ARRAYS:
+            values = array.array(type_code)
+            size = count * values.itemsize
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            layer_arrays[array_name] = values
+        layers[layer_name] = layer_arrays
+
+    return CompiledLevel(source_mtime=description['source_mtime'],
+                         map_width=description['map_width'],
+                         map_height=description['map_height'],
+                         background_color=description['background_color'],
+                         tiles={int(gid): tile for gid, tile in description['tiles'].items()},
+                         layers=layers,
+                         layer_alphas=description['layer_alphas'])
+
+
+# -- LOADING -- #
+
+
+def get_level(map_name):
+    """Returns the compiled level for a map. Comes from memory if the map hasn't changed,
+        then from the compiled file, and only compiles the map again if both are out of date.
+        Safe to call from the background loader's threads, a map is only compiled by one at a time."""
+    with level_lock:
+        source_mtime = get_source_mtime(map_name)
+        key = (map_name, source_mtime)
+
+        level = level_cache.get(key)
+        if level is not None:
+            return level
+
+        compiled_name = get_compiled_name(map_name)
+        level = load_level(compiled_name)
+        if level is None or level.source_mtime != source_mtime:
+            level = compile_level(map_name)
+            save_level(level, compiled_name)
+
+        level_cache[key] = level
+        return level
+
+
+def build_layer(level, layer_name, use_spatial_hash=True):
+    """Fills a new sprite list with one layer of a compiled level."""
+    sprite_list = arcade.SpriteList(use_spatial_hash=use_spatial_hash)
+    layer_arrays = level.layers[layer_name]
+    alpha = level.layer_alphas[layer_name]
+
+    for gid, center_x, center_y, scale in zip(layer_arrays['gids'], layer_arrays['center_x'],
+                                              layer_arrays['center_y'], layer_arrays['scale']):
+        tile = level.tiles[gid]
+
+        sprite = arcade.Sprite()
+        sprite.texture = f.load_texture(tile['image'],
+                                        flipped_horizontally=tile['flipped_horizontally'],
+                                        flipped_vertically=tile['flipped_vertically'],
+                                        region=tile['region'])
+        sprite.scale = scale
+        sprite.set_hit_box(tile['hit_box'])
+        sprite.center_x = center_x
+        sprite.center_y = center_y
+        sprite.properties.update(tile['properties'])
+        if alpha is not None:
+            sprite.alpha = alpha
+
+        sprite_list.append(sprite)
+
+    return sprite_list
+
+
+# -- DRAWING -- #
+
+
+class ChunkedLayer:
+    """A layer of tiles split into square chunks, each with its own static sprite list, for drawing
+        only the chunks on or near the screen. Drawing costs the same however big the map is.
+
+        Static sprite lists don't send changes to the graphics card, so any sprites that move are
+        kept in one more sprite list, drawn along with the chunks. Draws in place of a sprite list,
+        e.g. layer.draw(filter=GL_NEAREST)."""
+
+    def __init__(self, sprite_list, chunk_tiles=c.CHUNK_TILES, margin=c.CHUNK_DRAW_MARGIN):
+        self.chunk_size = chunk_tiles * c.GRID_PIXEL_SIZE * c.PIXEL_SCALING
+        self.margin = margin
+
+        # Sprite lists of the tiles in each chunk, by (column, row) of the chunk.
+        self.chunks = {}
+        self.moving_list = arcade.SpriteList(use_spatial_hash=False)
+
+        for sprite in sprite_list:
+            if sprite.change_x or sprite.change_y or sprite.change_angle:
+                self.moving_list.append(sprite)
+                continue
+
+            key = (math.floor(sprite.center_x / self.chunk_size), math.floor(sprite.center_y / self.chunk_size))
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = arcade.SpriteList(use_spatial_hash=False, is_static=True)
+                self.chunks[key] = chunk
+            chunk.append(sprite)
+
+        # How many chunks the last draw() drew, and its draw calls, sprites and textures, see dl.get_draw_stats().
+        self.drawn_count = 0
+        self.draw_stats = dl.NO_DRAW_STATS
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks.values()) + len(self.moving_list)
+
+    def __iter__(self):
+        for chunk in self.chunks.values():
+            yield from chunk
+        yield from self.moving_list
+
+    def get_chunk_range(self, left, right, bottom, top):
+        """First and last column, and first and last row, of the chunks touching an area plus the margin."""
+        size = self.chunk_size
+        margin = self.margin
+        return (math.floor((left - margin) / size), math.floor((right + margin) / size),
+                math.floor((bottom - margin) / size), math.floor((top + margin) / size))
+
+    def get_chunk_sprites(self):
+        """The sprites in the chunks, leaving out the moving ones."""
+        for chunk in self.chunks.values():
+            yield from chunk
+
+    def draw_chunks(self, **kwargs):
+        """Draws the chunks touching the viewport, top row first, the same order as the map's tiles, but
+            not the moving sprites, e.g. for rc.LayerCache to draw them into its images."""
+        first_column, last_column, first_row, last_row = self.get_chunk_range(*arcade.get_viewport())
+        self.drawn_count = 0
+        sprite_count = 0
+        textures = []
+        for row in range(last_row, first_row - 1, -1):
+            for column in range(first_column, last_column + 1):
+                chunk = self.chunks.get((column, row))
+                if chunk is not None:
+                    chunk.draw(**kwargs)
+                    self.drawn_count += 1
+                    sprite_count += len(chunk)
+                    textures.append(chunk._texture)
+
+        # Every chunk is a draw call with its own atlas.
+        self.draw_stats = (self.drawn_count, sprite_count, tuple(textures))
+
+    def draw(self, **kwargs):
+        """Draws the chunks touching the viewport, and then the moving sprites."""
+        self.draw_chunks(**kwargs)
+        self.moving_list.draw(**kwargs)
+        self.draw_stats = tuple(total + count for total, count in
+                                zip(self.draw_stats, dl.get_draw_stats(self.moving_list)))
+
+    def prepare(self, **kwargs):
+        """Draws every chunk once, so each one's buffers and texture atlas are made while the level
+            loads, rather than on the frame it first comes on to the screen. Call it outside of
+            on_draw(), the screen is cleared before the next frame is drawn."""
+        for chunk in self.chunks.values():
+            chunk.draw(**kwargs)
+        self.moving_list.draw(**kwargs)
@@ -0,0 +1,163 @@
+"""
+Background asset loading. Images, sounds and maps are decoded on a pool of
+worker threads, so the game can keep drawing (e.g. the intro cutscene) while
+the assets for the next view stream in.
+
+Example usage.
+    loader = ld.AssetLoader()
+    ld.queue_game_assets(loader, level=1)
+    # Then every frame, on the main thread:
+    loader.update()
+    # And loader.progress goes from 0 to 1.
+
+Import this as 'ld' for consistency.
+"""
+
+import os
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import game_constants as c
+import game_functions as f
+import game_audio as a
+import game_levels as lv
+
+# Folders with every image the game view needs before it can start.
+GAME_IMAGE_FOLDERS = ['resources/images/characters/player',
+                      'resources/images/effects',
+                      'resources/images/items',
+                      'resources/images/backgrounds']
+
+# Single images the game view needs that aren't in those folders.
+GAME_IMAGE_FILES = ['resources/images/ui/black_fade.png',
+                    'resources/images/ui/reticle.png']
+
+
+class AssetLoader:
+    """Decodes assets on background threads and hands them over to the main thread."""
+
+    def __init__(self, workers=c.LOADER_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+        # Every future that has been submitted, finished or not.
+        self.futures = []
+
+        # Images that have been decoded, waiting for their textures to be made on the main thread.
+        self.decoded_images = collections.deque()
+
+        # Keeps count of how much work there is and how much has been done.
+        self.total_tasks = 0
+        self.finished_tasks = 0
+        self.count_lock = threading.Lock()
+
+        # Futures that raised, so update() can raise their errors on the main thread.
+        self.failed_futures = []
+
+    def submit(self, function, *args):
+        """Runs a function on a worker thread, and returns its future."""
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(self.on_task_done)
+        self.futures.append(future)
+        self.total_tasks += 1
+        return future
+
+    def on_task_done(self, future):
+        # Counting the finished tasks. Runs on the worker thread.
+        with self.count_lock:
+            self.finished_tasks += 1
+            if future.exception() is not None:
+                self.failed_futures.append(future)
+
+    def on_image_done(self, future):
+        # An image that failed to decode never has its texture made, so that task is finished too.
+        if future.exception() is not None:
+            with self.count_lock:
+                self.finished_tasks += 1
+
+    def decode_image(self, filename):
+        # Runs on a worker thread, then leaves the texture to be made on the main thread.
+        digest = f.decode_image(filename)
+        self.decoded_images.append(filename)
+        return digest
+
+    def load_image(self, filename):
+        """Decodes an image in the background. Its texture is made later by update()."""
+        # Counted as a task for the decode and another for making the texture.
+        self.total_tasks += 1
+        future = self.submit(self.decode_image, filename)
+        future.add_done_callback(self.on_image_done)
+        return future
+
+    def load_images_in_folder(self, folder):
+        """Decodes every image in a folder and its subfolders in the background."""
+        for directory, _, file_names in sorted(os.walk(folder)):
+            for file_name in sorted(file_names):
+                if file_name.endswith('.png'):
+                    self.load_image(f'{directory}/{file_name}')
+
+    def load_sound(self, name):
+        """Loads a sound into a.sound in the background."""
+        return self.submit(a.load_sound, name)
+
+    def load_map(self, map_name):
+        """Compiles a tiled map, or loads it already compiled, into the level cache in the background."""
+        return self.submit(lv.get_level, map_name)
+
+    @property
+    def progress(self):
+        """How much of the queued work is done, from 0 to 1."""
+        if self.total_tasks == 0:
+            return 1
+        return self.finished_tasks / self.total_tasks
+
+    @property
+    def done(self):
+        return self.finished_tasks >= self.total_tasks
+
+    def update(self, max_textures=c.LOADER_TEXTURES_PER_FRAME):
+        """Call on the main thread once per frame. Turns a small batch of decoded
+            images into textures in the registry, so no single frame takes too long.
+            Raises the error of anything that failed to load."""
+        if self.failed_futures:
+            self.failed_futures[0].result()
+
+        for _ in range(max_textures):
+            if not self.decoded_images:
+                break
+            filename = self.decoded_images.popleft()
+            f.load_texture(filename)
+            with self.count_lock:
+                self.finished_tasks += 1
+
+    def wait(self):
+        """Blocks until everything queued has loaded, then makes any remaining textures."""
+        for future in list(self.futures):
+            # Raises here if anything failed to load.
+            future.result()
+        while self.decoded_images:
+            self.update()
+        self.futures.clear()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
+def queue_intro_assets(loader):
+    """Queues the cutscene frames and instructions for the intro view."""
+    for i in range(12):
+        loader.load_image(f'resources/images/cutscene/auckland_{i}.png')
+    loader.load_image('resources/images/ui/instructions_text.png')
+
+
+def queue_game_assets(loader, level=1):
+    """Queues everything the game view loads when it starts: audio, character,
+        effect and item frames, backgrounds, and the first level's map."""
+    loader.load_map(f'resources/maps/{level}.tmx')
+
+    for folder in GAME_IMAGE_FOLDERS:
+        loader.load_images_in_folder(folder)
+    for filename in GAME_IMAGE_FILES:
+        loader.load_image(filename)
+
+    for name in a.add_audio_to_list():
+        loader.load_sound(name)
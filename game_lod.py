@@ -0,0 +1,150 @@
+"""
+Level of detail for updates. Sprites that move or animate on their own are sorted into square
+cells of the level, and how often a cell is updated depends on how far it is from the screen:
+every update on and near the screen, every few updates a bit further out, and not at all far away.
+
+A sprite that has missed updates is given all of them at once the next time its cell is updated,
+so it ends up exactly where it would have been. Far away sprites sleep until the screen comes near
+enough to wake them, and then catch up. The cost of updating is then down to what's near the
+screen, not how big the level is. Catching up should cost about the same however many updates
+were missed, e.g. by working out where a sprite on a loop ends up directly, or by stopping once
+an effect has finished, so a sprite that wakes after a long sleep doesn't cause a hitch.
+
+A sprite is only moved to a new cell when it's updated, so one that moves a long way while
+asleep turns up once its old cell is near enough to wake.
+
+Example usage.
+    def update_effect(effect, steps):
+        for _ in range(steps):
+            effect.update()
+            if effect not in effect.pool.in_use:
+                return False
+        return True
+
+    scheduler = lod.LodScheduler(update_effect)
+    scheduler.add(effect, step=0)
+    # Then every update:
+    scheduler.update(step, view_left, view_bottom)
+
+Import this as 'lod' for consistency.
+"""
+
+import math
+import game_constants as c
+
+
+class LodScheduler:
+    """Updates a group of sprites by how far they are from the screen.
+
+        update_sprite(sprite, steps) is called to move a sprite on by that many updates. It returns
+        False if the sprite is finished with, e.g. an explosion that has played to the end, and
+        it's then forgotten about."""
+
+    def __init__(self, update_sprite, cell_size=c.LOD_CELL_SIZE, full_margin=c.LOD_FULL_MARGIN,
+                 reduced_margin=c.LOD_REDUCED_MARGIN, reduced_interval=c.LOD_REDUCED_INTERVAL):
+        self.update_sprite = update_sprite
+        self.cell_size = cell_size
+
+        # Cells closer to the screen than this, in pixels, are updated every update.
+        self.full_margin = full_margin
+
+        # Cells closer than this are updated every reduced_interval updates, the rest sleep.
+        self.reduced_margin = reduced_margin
+        self.reduced_interval = reduced_interval
+
+        # The sprites in each cell, by (column, row). Dictionaries so they keep the order they were added in.
+        self.cells = {}
+
+        # For each sprite, its cell and the step it was last updated on.
+        self.sprite_cells = {}
+        self.last_steps = {}
+
+        # How many sprites were updated, and how many updates they were given, by the last update().
+        self.updated_count = 0
+        self.updated_steps = 0
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def get_cell(self, sprite):
+        return (math.floor(sprite.center_x / self.cell_size), math.floor(sprite.center_y / self.cell_size))
+
+    def add(self, sprite, step):
+        """Starts updating a sprite, as of having been updated on this step.
+            Adding a sprite that is already here starts it again from this step."""
+        self.remove(sprite)
+        cell = self.get_cell(sprite)
+        self.cells.setdefault(cell, {})[sprite] = None
+        self.sprite_cells[sprite] = cell
+        self.last_steps[sprite] = step
+
+    def remove(self, sprite):
+        """Stops updating a sprite, if it's being updated."""
+        cell = self.sprite_cells.pop(sprite, None)
+        if cell is None:
+            return
+        del self.last_steps[sprite]
+        sprites = self.cells[cell]
+        del sprites[sprite]
+        if not sprites:
+            del self.cells[cell]
+
+    def clear(self):
+        """Forgets every sprite."""
+        self.cells.clear()
+        self.sprite_cells.clear()
+        self.last_steps.clear()
+
+    def get_cell_range(self, view_left, view_bottom, margin):
+        """First and last column, and first and last row, of the cells touching the screen plus a margin."""
+        size = self.cell_size
+        return (math.floor((view_left - margin) / size), math.floor((view_left + c.SCREEN_WIDTH + margin) / size),
+                math.floor((view_bottom - margin) / size), math.floor((view_bottom + c.SCREEN_HEIGHT + margin) / size))
+
+    def update(self, step, view_left, view_bottom):
+        """Brings the sprites near the screen up to this step."""
+        self.updated_count = 0
+        self.updated_steps = 0
+        if not self.cells:
+            return
+
+        full_left, full_right, full_bottom, full_top = self.get_cell_range(view_left, view_bottom, self.full_margin)
+        left, right, bottom, top = self.get_cell_range(view_left, view_bottom, self.reduced_margin)
+
+        # Only look at the cells in range, or the cells there are if there are fewer of those.
+        if (right - left + 1) * (top - bottom + 1) < len(self.cells):
+            cells = [(column, row) for column in range(left, right + 1) for row in range(bottom, top + 1)
+                     if (column, row) in self.cells]
+        else:
+            cells = [(column, row) for column, row in self.cells
+                     if left <= column <= right and bottom <= row <= top]
+
+        for cell in cells:
+            column, row = cell
+            if not (full_left <= column <= full_right and full_bottom <= row <= full_top):
+                # Cells further out take turns, so they don't all update on the same step.
+                if (step + column + row) % self.reduced_interval:
+                    continue
+            self.update_cell(cell, step)
+
+    def update_cell(self, cell, step):
+        """Gives every sprite in a cell the updates it has missed."""
+        for sprite in list(self.cells.get(cell, ())):
+            steps = step - self.last_steps[sprite]
+            if steps <= 0:
+                continue
+            self.updated_count += 1
+            self.updated_steps += steps
+
+            if not self.update_sprite(sprite, steps):
+                self.remove(sprite)
+                continue
+
+            self.last_steps[sprite] = step
+            new_cell = self.get_cell(sprite)
+            if new_cell != cell:
+                del self.cells[cell][sprite]
+                self.cells.setdefault(new_cell, {})[sprite] = None
+                self.sprite_cells[sprite] = new_cell
+        if cell in self.cells and not self.cells[cell]:
+            del self.cells[cell]
@@ -0,0 +1,252 @@
+"""
+The pre-baked asset pack. All the PNG images and WAV audio in 'resources' are packed into
+one file of raw RGBA pixels and PCM samples, so starting the game doesn't have to open
+and decode every PNG and WAV one at a time. Maps aren't packed, levels are compiled by lv instead.
+
+Build (or rebuild, after changing anything in 'resources') the pack with:
+
+    python game_pack.py
+
+If there is no pack, everything is loaded from the original files like before. The pack remembers
+the modification time and size of every file it was built from, and any file that has changed
+since is loaded from the original too.
+
+Import this as 'pk' for consistency.
+"""
+
+import os
+import io
+import json
+import mmap
+import wave
+import struct
+import hashlib
+import PIL.Image
+import arcade
+from pyglet.media.codecs.base import StaticSource, AudioFormat
+
+# Where the pack is written to and read from. Next to this file, so it is found wherever the game is run from.
+PACK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', 'assets.pack')
+
+# Folders that go into the pack.
+PACK_FOLDERS = ['resources/images', 'resources/audio']
+
+# Identifies the file, and the version of the layout below.
+PACK_MAGIC = b'UXPK'
+PACK_VERSION = 2
+
+# Header: magic, version, length of the JSON index in bytes.
+HEADER_FORMAT = '<4sII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Payloads start on a multiple of this many bytes.
+PAYLOAD_ALIGNMENT = 16
+
+
+def normalise_path(filename):
+    """Turns a path into the form used as a key in the pack index, e.g. 'resources/audio/jump_1.wav'."""
+    return os.path.normpath(filename).replace(os.sep, '/')
+
+
+def get_source_stamp(filename):
+    """Returns the modification time, in nanoseconds, and size of a file, or None if it's missing."""
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+# -- BUILDING -- #
+
+
+def encode_file(filename):
+    """Returns the index entry and raw payload for one image or sound in the resources folder,
+        or None if it's neither."""
+    if not filename.endswith(('.png', '.wav')):
+        return None
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    # The digest of the original file, so the texture registry stays content-addressed, and
+    # its modification time and size, so a pack built before it changed can be spotted.
+    entry = {'digest': hashlib.sha1(data).hexdigest(),
+             'source': get_source_stamp(filename)}
+
+    if filename.endswith('.png'):
+        image = PIL.Image.open(io.BytesIO(data)).convert('RGBA')
+        entry['kind'] = 'image'
+        entry['width'] = image.width
+        entry['height'] = image.height
+        payload = image.tobytes()
+    else:
+        with wave.open(io.BytesIO(data)) as wav:
+            entry['kind'] = 'sound'
+            entry['channels'] = wav.getnchannels()
+            entry['sample_size'] = wav.getsampwidth() * 8
+            entry['sample_rate'] = wav.getframerate()
+            payload = wav.readframes(wav.getnframes())
+
+    return entry, payload
+
+
+def build_pack(filename=PACK_FILE, folders=None):
+    """Packs every file in the given folders into one indexed pack file."""
+    if folders is None:
+        folders = PACK_FOLDERS
+
+    index = {}
+    payloads = []
+    offset = 0
+
+    for folder in folders:
+        for directory, _, file_names in sorted(os.walk(folder)):
+            for file_name in sorted(file_names):
+                path = normalise_path(os.path.join(directory, file_name))
+                encoded = encode_file(path)
+                if encoded is None:
+                    continue
+                entry, payload = encoded
+
+                # Pad so every payload is aligned.
+                padding = -offset % PAYLOAD_ALIGNMENT
+                offset += padding
+                payloads.append(b'\0' * padding)
+
+                entry['offset'] = offset
+                entry['size'] = len(payload)
+                index[path] = entry
+                payloads.append(payload)
+                offset += len(payload)
+
+    index_bytes = json.dumps(index, separators=(',', ':')).encode('utf-8')
+
+    # The payloads are addressed relative to the first aligned byte after the index.
+    data_start = HEADER_SIZE + len(index_bytes)
+    data_start += -data_start % PAYLOAD_ALIGNMENT
+
+    with open(filename, 'wb') as file:
+        file.write(struct.pack(HEADER_FORMAT, PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        file.write(index_bytes)
+        file.write(b'\0' * (data_start - HEADER_SIZE - len(index_bytes)))
+        for payload in payloads:
+            file.write(payload)
+
+    return index
+
+
+# -- LOADING -- #
+
+
+class PackedSource(StaticSource):
+    """A pyglet static source over PCM samples that are already decoded."""
+
+    def __init__(self, data, audio_format):
+        # Deliberately not calling the parent __init__, since it decodes another source.
+        # Copied out of the map once here, so pyglet can share it between every player.
+        self._data = bytes(data)
+        self.audio_format = audio_format
+        self._duration = len(self._data) / audio_format.bytes_per_second
+
+
+class PackedSound(arcade.Sound):
+    """A sound made from PCM samples in the pack, rather than from a WAV file on disk."""
+
+    def __init__(self, file_name, data, channels, sample_size, sample_rate):
+        # Deliberately not calling the parent __init__, since it loads from a file.
+        self.file_name = file_name
+        self.source = PackedSource(data, AudioFormat(channels, sample_size, sample_rate))
+        self.min_distance = 100000000
+
+
+class AssetPack:
+    """A memory-mapped asset pack. Images are built straight on top of the mapped bytes."""
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+
+        magic, version, index_size = struct.unpack_from(HEADER_FORMAT, self.map)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"'{filename}' is not a version {PACK_VERSION} asset pack, rebuild it.")
+
+        self.index = json.loads(bytes(self.view[HEADER_SIZE:HEADER_SIZE + index_size]))
+
+        self.data_start = HEADER_SIZE + index_size
+        self.data_start += -self.data_start % PAYLOAD_ALIGNMENT
+
+        # Whether a file that has changed since the pack was built has been found yet.
+        self.warned_stale = False
+
+    def find(self, filename):
+        """Returns the index entry for a file, or None if it isn't in the pack, or has changed
+            since the pack was built."""
+        entry = self.index.get(normalise_path(filename))
+        if entry is None:
+            return None
+
+        if get_source_stamp(filename) != entry['source']:
+            if not self.warned_stale:
+                print(f"Warning, '{filename}' has changed since the asset pack was built, so it and any others "
+                      f"that have are loaded from the original files. Rebuild it with 'python game_pack.py'.")
+                self.warned_stale = True
+            return None
+        return entry
+
+    def get_bytes(self, entry):
+        """Returns a zero-copy slice of the pack holding an entry's payload."""
+        start = self.data_start + entry['offset']
+        return self.view[start:start + entry['size']]
+
+    def get_image(self, entry):
+        """Returns a read-only RGBA image that shares its pixels with the mapped pack."""
+        return PIL.Image.frombuffer('RGBA', (entry['width'], entry['height']), self.get_bytes(entry),
+                                    'raw', 'RGBA', 0, 1)
+
+    def get_sound(self, filename, entry):
+        """Returns a sound made from an entry's PCM samples."""
+        return PackedSound(filename, self.get_bytes(entry), entry['channels'],
+                           entry['sample_size'], entry['sample_rate'])
+
+
+def load_pack(filename=PACK_FILE):
+    """Opens the asset pack if it has been built, otherwise returns None."""
+    if not os.path.isfile(filename):
+        return None
+    try:
+        return AssetPack(filename)
+    except (ValueError, struct.error):
+        print(f"Warning, couldn't read the asset pack '{filename}'. Loading from the original files.")
+        return None
+
+
+def load_image(filename):
+    """Returns (digest, image) for an image in the pack, or None if it has to be loaded from disk."""
+    if pack is None:
+        return None
+    entry = pack.find(filename)
+    if entry is None or entry['kind'] != 'image':
+        return None
+    return entry['digest'], pack.get_image(entry)
+
+
+def load_sound(filename):
+    """Loads a sound from the pack, falling back to the WAV file if it isn't packed."""
+    if pack is not None:
+        entry = pack.find(filename)
+        if entry is not None and entry['kind'] == 'sound':
+            return pack.get_sound(filename, entry)
+    return arcade.load_sound(filename)
+
+
+# The actual pack, if one has been built.
+pack = load_pack()
+
+
+if __name__ == '__main__':
+    # Build relative to the game folder, wherever this is run from.
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    built_index = build_pack()
+    print(f'Packed {len(built_index)} files into {PACK_FILE} ({os.path.getsize(PACK_FILE) / 1e6:.1f} MB).')
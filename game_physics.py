@@ -0,0 +1,238 @@
+"""
+The player's physics. arcade's platformer physics engine, except that the walls the player is
+touching are found with a pj.TileGrid and a separating axis test, rather than arcade's spatial
+hash and shapely, and only the walls that move are looked at when moving walls.
+
+Example usage.
+    physics_engine = ph.PhysicsEnginePlatformer(player_sprite, wall_list, gravity_constant=c.GRAVITY)
+    # Then every update:
+    physics_engine.update()
+
+Import this as 'ph' for consistency.
+"""
+
+import math
+import arcade
+import game_projectiles as pj
+
+
+class PhysicsEnginePlatformer(arcade.PhysicsEnginePlatformer):
+    """arcade.PhysicsEnginePlatformer, remembering which walls have a velocity when it's made.
+        Moving walls are moved and turned round at their boundaries, and push the player, the
+        same as in arcade. Walls given a velocity later aren't moved.
+
+        The walls that don't move go in a grid. Every hit box has to be convex, as tiles' and
+        arcade's simple hit boxes are, for the walls touching the player to be the ones arcade finds."""
+
+    def __init__(self, player_sprite, platforms, gravity_constant=0.5, ladders=None):
+        super().__init__(player_sprite, platforms, gravity_constant=gravity_constant, ladders=ladders)
+        self.moving_platforms = [platform for platform in platforms if platform.change_x or platform.change_y]
+        self.wall_grid = pj.TileGrid([platform for platform in platforms
+                                      if not (platform.change_x or platform.change_y)])
+
+    def check_for_collision_with_walls(self, sprite):
+        """The walls a sprite overlaps, like arcade.check_for_collision_with_list()."""
+        hit_list = self.wall_grid.find_touching(sprite)
+        for platform in self.moving_platforms:
+            if self.check_for_collision(sprite, platform):
+                hit_list.append(platform)
+        return hit_list
+
+    def check_for_collision(self, sprite, wall):
+        """Whether a sprite overlaps a wall, like arcade.check_for_collision()."""
+        return pj.are_polygons_overlapping(sprite.get_adjusted_hit_box(), wall.get_adjusted_hit_box())
+
+    def can_jump(self, y_distance=5):
+        """Whether there's a floor under the player, the same as arcade's can_jump()."""
+        # Move down to see if we are on a platform.
+        self.player_sprite.center_y -= y_distance
+        hit_list = self.check_for_collision_with_walls(self.player_sprite)
+        self.player_sprite.center_y += y_distance
+
+        if hit_list:
+            self.jumps_since_ground = 0
+
+        return bool(hit_list) or self.allow_multi_jump and self.jumps_since_ground < self.allowed_jumps
+
+    def update(self):
+        """Moves the player and the moving walls, and returns the walls the player hit."""
+        # Add gravity if we aren't on a ladder.
+        if not self.is_on_ladder():
+            self.player_sprite.change_y -= self.gravity_constant
+
+        complete_hit_list = self.move_sprite(self.player_sprite, ramp_up=True)
+
+        for platform in self.moving_platforms:
+            self.move_platform(platform)
+
+        return complete_hit_list
+
+    def get_unstuck(self, sprite):
+        """Moves a sprite that's inside a wall to the nearest of a few places around it that isn't,
+            trying further and further away, the way arcade does."""
+        original_x = sprite.center_x
+        original_y = sprite.center_y
+
+        vary = 1
+        while True:
+            for x, y in [(original_x, original_y + vary),
+                         (original_x, original_y - vary),
+                         (original_x + vary, original_y),
+                         (original_x - vary, original_y),
+                         (original_x + vary, original_y + vary),
+                         (original_x + vary, original_y - vary),
+                         (original_x - vary, original_y + vary),
+                         (original_x - vary, original_y - vary)]:
+                sprite.center_x = x
+                sprite.center_y = y
+                if not self.check_for_collision_with_walls(sprite):
+                    return
+            vary *= 2
+
+    def move_sprite(self, moving_sprite, ramp_up):
+        """Moves a sprite by its velocity, stopping it at walls and walking it up slopes, the way
+            arcade does. Returns the walls it hit."""
+        # See if we are starting this turn with a sprite already colliding with us.
+        if self.check_for_collision_with_walls(moving_sprite):
+            self.get_unstuck(moving_sprite)
+
+        original_x = moving_sprite.center_x
+        original_y = moving_sprite.center_y
+        original_angle = moving_sprite.angle
+
+        # -- Rotate -- #
+        rotating_hit_list = []
+        if moving_sprite.change_angle:
+            moving_sprite.angle += moving_sprite.change_angle
+
+            # Resolve collisions caused by rotating.
+            rotating_hit_list = self.check_for_collision_with_walls(moving_sprite)
+            if rotating_hit_list:
+                max_distance = (moving_sprite.width + moving_sprite.height) / 2
+                self.get_unstuck(moving_sprite)
+                if arcade.get_distance(original_x, original_y,
+                                       moving_sprite.center_x, moving_sprite.center_y) > max_distance:
+                    # Glitched trying to rotate, so put it back.
+                    moving_sprite.center_x = original_x
+                    moving_sprite.center_y = original_y
+                    moving_sprite.angle = original_angle
+
+        # -- Move in the y direction -- #
+        moving_sprite.center_y += moving_sprite.change_y
+        hit_list_y = self.check_for_collision_with_walls(moving_sprite)
+        complete_hit_list = hit_list_y
+
+        # If we hit a wall, move so the edges are at the same point.
+        if hit_list_y:
+            if moving_sprite.change_y > 0:
+                while self.check_for_collision_with_walls(moving_sprite):
+                    moving_sprite.center_y -= 1
+            elif moving_sprite.change_y < 0:
+                for item in hit_list_y:
+                    # Moved up a bit at a time, rather than to the top of the wall, for slopes.
+                    while self.check_for_collision(moving_sprite, item):
+                        moving_sprite.center_y += 0.25
+
+                    if item.change_x != 0:
+                        moving_sprite.center_x += item.change_x
+            moving_sprite.change_y = min(0.0, hit_list_y[0].change_y)
+
+        moving_sprite.center_y = round(moving_sprite.center_y, 2)
+
+        # -- Move in the x direction -- #
+        if moving_sprite.change_x:
+            # Keep track of our current y, used in ramping up.
+            almost_original_y = moving_sprite.center_y
+
+            # Strip off the sign, so there's only one version of this for both directions.
+            direction = math.copysign(1, moving_sprite.change_x)
+            cur_x_change = abs(moving_sprite.change_x)
+            upper_bound = cur_x_change
+            lower_bound = 0
+            cur_y_change = 0
+
+            # Search for the furthest the sprite can move, going up slopes if it can.
+            exit_loop = False
+            while not exit_loop:
+                moving_sprite.center_x = original_x + cur_x_change * direction
+                collision_check = self.check_for_collision_with_walls(moving_sprite)
+
+                for sprite in collision_check:
+                    if sprite not in complete_hit_list:
+                        complete_hit_list.append(sprite)
+
+                if collision_check:
+                    # We did collide. Can we ramp up and not collide?
+                    if ramp_up:
+                        cur_y_change = cur_x_change
+                        moving_sprite.center_y = original_y + cur_y_change
+
+                        collision_check = self.check_for_collision_with_walls(moving_sprite)
+                        if collision_check:
+                            cur_y_change -= cur_x_change
+                        else:
+                            while not collision_check and cur_y_change > 0:
+                                cur_y_change -= 1
+                                moving_sprite.center_y = almost_original_y + cur_y_change
+                                collision_check = self.check_for_collision_with_walls(moving_sprite)
+                            cur_y_change += 1
+                            collision_check = []
+
+                    if collision_check:
+                        upper_bound = cur_x_change - 1
+                        if upper_bound - lower_bound <= 0:
+                            cur_x_change = lower_bound
+                            exit_loop = True
+                        else:
+                            cur_x_change = (upper_bound + lower_bound) // 2
+                    else:
+                        exit_loop = True
+                else:
+                    # No collision. Keep this new position.
+                    lower_bound = cur_x_change
+                    if upper_bound - lower_bound <= 0:
+                        exit_loop = True
+                    else:
+                        cur_x_change = (upper_bound + lower_bound) // 2 + (upper_bound + lower_bound) % 2
+
+            moving_sprite.center_x = original_x + cur_x_change * direction
+            moving_sprite.center_y = almost_original_y + cur_y_change
+
+        for sprite in rotating_hit_list:
+            if sprite not in complete_hit_list:
+                complete_hit_list.append(sprite)
+
+        return complete_hit_list
+
+    def move_platform(self, platform):
+        """Moves a wall on by its velocity, the way arcade does."""
+        player_sprite = self.player_sprite
+        platform.center_x += platform.change_x
+
+        if platform.boundary_left is not None and platform.left <= platform.boundary_left:
+            platform.left = platform.boundary_left
+            if platform.change_x < 0:
+                platform.change_x *= -1
+
+        if platform.boundary_right is not None and platform.right >= platform.boundary_right:
+            platform.right = platform.boundary_right
+            if platform.change_x > 0:
+                platform.change_x *= -1
+
+        if self.check_for_collision(player_sprite, platform):
+            if platform.change_x < 0:
+                player_sprite.right = platform.left
+            if platform.change_x > 0:
+                player_sprite.left = platform.right
+
+        platform.center_y += platform.change_y
+
+        if platform.boundary_top is not None and platform.top >= platform.boundary_top:
+            platform.top = platform.boundary_top
+            if platform.change_y > 0:
+                platform.change_y *= -1
+
+        if platform.boundary_bottom is not None and platform.bottom <= platform.boundary_bottom:
+            platform.bottom = platform.boundary_bottom
+            if platform.change_y < 0:
+                platform.change_y *= -1
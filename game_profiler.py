@@ -0,0 +1,164 @@
+"""
+Timing what each part of a frame costs. Wrap a phase of the frame in a named timer, and call
+end_frame() once a frame. The last few seconds of frames are kept for each phase, for working
+out typical and worst times, showing them on screen and saving them for looking at later.
+
+Draw phases time how long it takes to hand the drawing to the graphics card, not how long the
+graphics card takes to do it.
+
+Example usage.
+    profiler = pf.Profiler()
+    with profiler.phase('physics'):
+        physics_engine.update()
+    profiler.end_frame()
+    print(profiler.get_stats('physics')['p95'])
+
+Import this as 'pf' for consistency.
+"""
+
+import collections
+import csv
+import json
+import timeit
+
+# How many frames of times are kept, about ten seconds at 60 frames a second.
+HISTORY_FRAMES = 600
+
+# Percentiles worked out for every phase.
+PERCENTILES = (50, 95, 99)
+
+# Stats shown for every phase, in order.
+COLUMNS = ('p50', 'p95', 'p99', 'worst')
+
+
+class PhaseTimer:
+    """Times one named phase of the frame. A phase can be timed more than once a frame,
+        e.g. for each update the simulation catches up by, and the times are added up."""
+
+    def __init__(self, name, history_frames):
+        self.name = name
+
+        # Seconds spent in the phase so far this frame.
+        self.frame_time = 0
+        self.start_time = 0
+
+        # Seconds spent in the phase in each of the last frames, oldest first.
+        self.history = collections.deque(maxlen=history_frames)
+
+    def __enter__(self):
+        self.start_time = timeit.default_timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.frame_time += timeit.default_timer() - self.start_time
+
+    def end_frame(self):
+        self.history.append(self.frame_time)
+        self.frame_time = 0
+
+
+class Profiler:
+    """Named phase timers, and how long each whole frame took."""
+
+    def __init__(self, history_frames=HISTORY_FRAMES):
+        self.history_frames = history_frames
+
+        # Phases, in the order they were first timed.
+        self.phases = {}
+
+        # Seconds between the ends of each of the last frames.
+        self.frame_times = collections.deque(maxlen=history_frames)
+        self.last_frame_end = None
+
+        # Frames ended since the profiler was made.
+        self.frame_count = 0
+
+    def phase(self, name):
+        """Returns the timer for a phase, for using in a with statement."""
+        timer = self.phases.get(name)
+        if timer is None:
+            timer = PhaseTimer(name, self.history_frames)
+            self.phases[name] = timer
+        return timer
+
+    def end_frame(self):
+        """Moves every phase's time this frame into its history."""
+        now = timeit.default_timer()
+        if self.last_frame_end is not None:
+            self.frame_times.append(now - self.last_frame_end)
+        self.last_frame_end = now
+        self.frame_count += 1
+
+        for timer in self.phases.values():
+            timer.end_frame()
+
+    @property
+    def fps(self):
+        """Average frames per second over the history, or None before two frames have ended."""
+        if not self.frame_times:
+            return None
+        return len(self.frame_times) / sum(self.frame_times)
+
+    def get_stats(self, name=None):
+        """Returns the mean, percentiles and worst time of a phase in seconds,
+            or of the whole frame if no phase is given."""
+        times = self.frame_times if name is None else self.phases[name].history
+        return get_stats(times)
+
+    def get_table(self):
+        """(name, stats) for the whole frame and then every phase."""
+        return [('frame', self.get_stats())] + [(name, self.get_stats(name)) for name in self.phases]
+
+    def get_lines(self):
+        """Lines of text with every phase's times in milliseconds, e.g. for printing."""
+        lines = [f'{"phase":<30}' + ''.join(f'{key:>8}' for key in COLUMNS)]
+        for name, stats in self.get_table():
+            lines.append(f'{name:<30}' + ''.join(f'{stats[key] * 1000:>8.2f}' for key in COLUMNS))
+        return lines
+
+    def export_csv(self, path):
+        """Writes every phase's time in each frame of the history, in milliseconds, one frame a row."""
+        names = list(self.phases)
+        columns = [list(self.frame_times)] + [list(self.phases[name].history) for name in names]
+        row_count = max(len(column) for column in columns)
+
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'frame_time'] + names)
+            for row in range(row_count):
+                values = []
+                for column in columns:
+                    # Phases first timed part way through the history have fewer frames, lined up at the end.
+                    index = row - (row_count - len(column))
+                    values.append(f'{column[index] * 1000:.4f}' if index >= 0 else '')
+                writer.writerow([self.frame_count - row_count + row] + values)
+
+    def export_json(self, path):
+        """Writes every phase's stats in milliseconds, along with its times in each frame of the history."""
+        data = {'frame_count': self.frame_count,
+                'fps': self.fps,
+                'phases': {}}
+        for name in [None] + list(self.phases):
+            times = self.frame_times if name is None else self.phases[name].history
+            data['phases'][name or 'frame'] = {
+                'stats': {key: value * 1000 for key, value in get_stats(times).items()},
+                'times': [time * 1000 for time in times]}
+
+        with open(path, 'w') as file:
+            json.dump(data, file, indent=1)
+
+
+def get_stats(times):
+    """Mean, percentiles and worst of a list of times, all 0 if there aren't any."""
+    stats = {'mean': 0, 'worst': 0}
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}'] = 0
+    if not times:
+        return stats
+
+    ordered = sorted(times)
+    stats['mean'] = sum(ordered) / len(ordered)
+    stats['worst'] = ordered[-1]
+    for percentile in PERCENTILES:
+        stats[f'p{percentile}'] = ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+    return stats
@@ -0,0 +1,508 @@
+"""
+Projectile collisions. Static things bullets can hit (walls, barrels) are put into a uniform
+grid once when the level loads, then every bullet is tested against it in one batched pass
+per frame, with numpy. Bullets that are nowhere near anything are ruled out by looking up
+the cells under them, and the rest are tested against the few sprites in those cells.
+
+Example usage.
+    wall_grid = pj.TileGrid(wall_list)
+    # Then every frame, find the first wall each bullet's path since last frame hit, and how far along:
+    batch = pj.BulletBatch(bullet_list)
+    bullet_indices, wall_indices, fractions = wall_grid.check_paths(batch)
+
+Import this as 'pj' for consistency.
+"""
+
+import math
+import numpy
+import arcade
+import game_constants as c
+
+# Size of a grid cell, in pixels. One tile of the map.
+CELL_SIZE = c.GRID_PIXEL_SIZE * c.PIXEL_SCALING
+
+# Hit box given to every bullet, before scaling.
+BULLET_HIT_BOX = ((-2, -2), (-2, 2), (2, 2), (2, -2))
+
+
+def no_hits():
+    """Two empty index arrays, for when nothing was hit."""
+    return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64)
+
+
+def get_boxes(sprites):
+    """Returns numpy arrays of left, right, bottom, top and is_box for the hit boxes of a list of
+        sprites. is_box is True if a hit box is exactly that rectangle. Nearly every tile is,
+        and they can be tested with numpy."""
+    count = len(sprites)
+    left, right, bottom, top = numpy.zeros((4, count))
+    is_box = numpy.zeros(count, dtype=bool)
+
+    hit_boxes = [sprite.get_adjusted_hit_box() for sprite in sprites]
+    four_points = [index for index, points in enumerate(hit_boxes) if len(points) == 4]
+    others = [index for index, points in enumerate(hit_boxes) if len(points) != 4]
+
+    if four_points:
+        points = numpy.round(numpy.array([hit_boxes[index] for index in four_points], dtype=numpy.float64), 3)
+        xs = numpy.sort(points[:, :, 0], axis=1)
+        ys = numpy.sort(points[:, :, 1], axis=1)
+        left[four_points], right[four_points] = xs[:, 0], xs[:, 3]
+        bottom[four_points], top[four_points] = ys[:, 0], ys[:, 3]
+        # Two different x values and two different y values make a rectangle.
+        is_box[four_points] = ((xs[:, 0] == xs[:, 1]) & (xs[:, 2] == xs[:, 3])
+                               & (ys[:, 0] == ys[:, 1]) & (ys[:, 2] == ys[:, 3]))
+
+    for index in others:
+        left[index] = min(x for x, _ in hit_boxes[index])
+        right[index] = max(x for x, _ in hit_boxes[index])
+        bottom[index] = min(y for _, y in hit_boxes[index])
+        top[index] = max(y for _, y in hit_boxes[index])
+
+    return left, right, bottom, top, is_box
+
+
+class BulletBatch:
+    """The positions and shapes of a frame's bullets, as numpy arrays.
+
+        Bullet hit boxes are taken to be rectangles centred on the bullet, rotated with it,
+        like BULLET_HIT_BOX."""
+
+    def __init__(self, bullets):
+        self.bullets = list(bullets)
+
+        # Bullets nearly always share one hit box (BULLET_HIT_BOX), so the size of each
+        # different hit box is only worked out once.
+        hit_box_sizes = {}
+        values = []
+        for bullet in self.bullets:
+            points = bullet.get_hit_box()
+            size = hit_box_sizes.get(id(points))
+            if size is None:
+                size = (max(abs(x) for x, _ in points), max(abs(y) for _, y in points))
+                hit_box_sizes[id(points)] = size
+            values.append((bullet.center_x, bullet.center_y, bullet.change_x, bullet.change_y,
+                           bullet.angle, bullet.scale, size[0], size[1]))
+        (x, y, change_x, change_y,
+         angles, scales, half_widths, half_heights) = numpy.array(values, dtype=numpy.float64).reshape(-1, 8).T
+
+        self.x = x
+        self.y = y
+
+        # How far each bullet moved this frame. It went from (x - change_x, y - change_y) to (x, y).
+        self.change_x = change_x
+        self.change_y = change_y
+        self.cos = numpy.cos(numpy.radians(angles))
+        self.sin = numpy.sin(numpy.radians(angles))
+
+        # Half the width and height of each hit box, before it is rotated.
+        self.half_width = half_widths * scales
+        self.half_height = half_heights * scales
+
+        # Anything further than this from a bullet's centre can't be touching it, whichever way it is rotated.
+        self.radius = numpy.hypot(self.half_width, self.half_height)
+
+        # Half the width and height of the box around each bullet, as it is rotated.
+        abs_cos, abs_sin = numpy.abs(self.cos), numpy.abs(self.sin)
+        self.extent_x = self.half_width * abs_cos + self.half_height * abs_sin
+        self.extent_y = self.half_width * abs_sin + self.half_height * abs_cos
+
+    def __len__(self):
+        return len(self.bullets)
+
+    def find_culled(self, centre_x, centre_y, distance_x=c.CULL_DISTANCE_X, distance_y=c.CULL_DISTANCE_Y):
+        """Returns a mask of the bullets too far from a centre point (usually the player) to keep."""
+        return (numpy.abs(self.x - centre_x) > distance_x) | (numpy.abs(self.y - centre_y) > distance_y)
+
+
+def are_polygons_overlapping(points_a, points_b):
+    """Whether two convex polygons overlap, not counting ones that only touch along an edge or at a
+        corner, the same as arcade.are_polygons_intersecting() without making shapely polygons.
+        A separating axis test: they overlap unless, along the normal of one of their edges, one
+        ends where the other starts or before."""
+    # Edges lined up with the x or y axis all have the same normals, so they're checked at once,
+    # by comparing the bounding boxes. For tiles, that's every edge that isn't a slope.
+    xs_a = [x for x, _ in points_a]
+    ys_a = [y for _, y in points_a]
+    xs_b = [x for x, _ in points_b]
+    ys_b = [y for _, y in points_b]
+    if (max(xs_a) <= min(xs_b) or max(xs_b) <= min(xs_a)
+            or max(ys_a) <= min(ys_b) or max(ys_b) <= min(ys_a)):
+        return False
+
+    for points in (points_a, points_b):
+        previous_x, previous_y = points[-1]
+        for x, y in points:
+            normal_x = previous_y - y
+            normal_y = x - previous_x
+            previous_x, previous_y = x, y
+            if normal_x == 0 or normal_y == 0:
+                continue
+            projections_a = [point_x * normal_x + point_y * normal_y for point_x, point_y in points_a]
+            projections_b = [point_x * normal_x + point_y * normal_y for point_x, point_y in points_b]
+            if max(projections_a) <= min(projections_b) or max(projections_b) <= min(projections_a):
+                return False
+    return True
+
+
+def get_segment_fractions(start_x, start_y, delta_x, delta_y, left, right, bottom, top):
+    """Returns how far along each segment, from 0 to 1, it first touches a box, or infinity
+        if it doesn't. Segments that start inside a box touch it at 0. Works on numpy arrays."""
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        first_x = (left - start_x) / delta_x
+        second_x = (right - start_x) / delta_x
+        first_y = (bottom - start_y) / delta_y
+        second_y = (top - start_y) / delta_y
+
+    # A segment that doesn't move along an axis is either always or never between the sides.
+    inside_x = (left <= start_x) & (start_x <= right)
+    inside_y = (bottom <= start_y) & (start_y <= top)
+    near_x = numpy.where(delta_x == 0, numpy.where(inside_x, -numpy.inf, numpy.inf), numpy.minimum(first_x, second_x))
+    far_x = numpy.where(delta_x == 0, numpy.where(inside_x, numpy.inf, -numpy.inf), numpy.maximum(first_x, second_x))
+    near_y = numpy.where(delta_y == 0, numpy.where(inside_y, -numpy.inf, numpy.inf), numpy.minimum(first_y, second_y))
+    far_y = numpy.where(delta_y == 0, numpy.where(inside_y, numpy.inf, -numpy.inf), numpy.maximum(first_y, second_y))
+
+    near = numpy.maximum(near_x, near_y)
+    far = numpy.minimum(far_x, far_y)
+    touching = (near <= far) & (far >= 0) & (near <= 1)
+    return numpy.where(touching, numpy.maximum(near, 0), numpy.inf)
+
+
+class TileGrid:
+    """A uniform grid over sprites that don't move, for finding what bullets, or the player, are touching.
+
+        The sprites overlapping each cell are kept in one numpy array, indexed
+        [column, row, slot], with how many slots are filled kept in another. So a whole
+        frame of bullets can be matched up with the sprites near them without a Python loop."""
+
+    def __init__(self, sprite_list, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+
+        # Every sprite in the grid. Hits are returned as indices into this.
+        self.sprites = list(sprite_list)
+
+        # The index of each sprite in the list above.
+        self.sprite_indices = {sprite: index for index, sprite in enumerate(self.sprites)}
+
+        # Indices of sprites that have been taken out of the grid. They keep their
+        # index, so they can be put back (e.g. on respawn) without the list growing.
+        self.removed_indices = set()
+
+        # The bounding box of each sprite's hit box, and whether the hit box is that
+        # plain rectangle. Sprites that aren't (is_box is False) are checked with arcade instead.
+        self.left, self.right, self.bottom, self.top, self.is_box = get_boxes(self.sprites)
+
+        # The hit box of each sprite, for find_touching().
+        self.hit_boxes = [sprite.get_adjusted_hit_box() for sprite in self.sprites]
+
+        # Bottom left corner of the grid, and its size in cells. Covers every sprite, with
+        # a cell of empty space around the outside.
+        if self.sprites:
+            self.origin_x = self.left.min() - cell_size
+            self.origin_y = self.bottom.min() - cell_size
+            right = self.right.max() + cell_size
+            top = self.top.max() + cell_size
+        else:
+            self.origin_x = self.origin_y = right = top = 0
+        self.columns = int((right - self.origin_x) // cell_size) + 1
+        self.rows = int((top - self.origin_y) // cell_size) + 1
+
+        # How many sprites overlap each cell, and which ones.
+        self.counts = numpy.zeros((self.columns, self.rows), dtype=numpy.int32)
+        self.cell_sprites = numpy.full((self.columns, self.rows, 1), -1, dtype=numpy.int32)
+
+        for index in range(len(self.sprites)):
+            self.insert(index)
+        self.update_filled_totals()
+
+    def update_filled_totals(self):
+        # How many cells with something in them are below and left of each corner of the cells, so
+        # whether an area of cells has anything in it is four lookups. Kept up to date as sprites
+        # are added and removed.
+        totals = numpy.zeros((self.columns + 1, self.rows + 1), dtype=numpy.int32)
+        totals[1:, 1:] = (self.counts > 0).cumsum(axis=0).cumsum(axis=1)
+        self.filled_totals = totals
+
+    def get_cell_range(self, index):
+        """Returns the columns and rows a sprite's bounding box covers. A tile lined up with
+            the grid only covers its own cell, not the ones it shares an edge with."""
+        first_column = int((self.left[index] - self.origin_x) // self.cell_size)
+        last_column = max(first_column, math.ceil((self.right[index] - self.origin_x) / self.cell_size) - 1)
+        first_row = int((self.bottom[index] - self.origin_y) // self.cell_size)
+        last_row = max(first_row, math.ceil((self.top[index] - self.origin_y) / self.cell_size) - 1)
+        return range(first_column, last_column + 1), range(first_row, last_row + 1)
+
+    def insert(self, index):
+        # Adds a sprite, by its index, to every cell it overlaps.
+        columns, rows = self.get_cell_range(index)
+        for column in columns:
+            for row in rows:
+                slot = self.counts[column, row]
+                if slot == self.cell_sprites.shape[2]:
+                    # Every cell gets another slot. Only happens while the grid is being filled.
+                    extra = numpy.full((self.columns, self.rows, 1), -1, dtype=numpy.int32)
+                    self.cell_sprites = numpy.concatenate([self.cell_sprites, extra], axis=2)
+                self.cell_sprites[column, row, slot] = index
+                self.counts[column, row] += 1
+
+    def add(self, sprite):
+        """Adds a sprite to the grid, or puts back one that was removed.
+            It has to be inside the area the grid was made with."""
+        index = self.sprite_indices.get(sprite)
+        if index is None:
+            index = len(self.sprites)
+            self.sprite_indices[sprite] = index
+            self.sprites.append(sprite)
+            left, right, bottom, top, is_box = get_boxes([sprite])
+            self.left = numpy.append(self.left, left)
+            self.right = numpy.append(self.right, right)
+            self.bottom = numpy.append(self.bottom, bottom)
+            self.top = numpy.append(self.top, top)
+            self.is_box = numpy.append(self.is_box, is_box)
+            self.hit_boxes.append(sprite.get_adjusted_hit_box())
+        elif index in self.removed_indices:
+            self.removed_indices.remove(index)
+        else:
+            return
+        self.insert(index)
+        self.update_filled_totals()
+
+    def remove(self, sprite):
+        """Takes a sprite out of the grid, e.g. when a barrel is blown up."""
+        index = self.sprite_indices.get(sprite)
+        if index is None or index in self.removed_indices:
+            return
+        self.removed_indices.add(index)
+
+        columns, rows = self.get_cell_range(index)
+        for column in columns:
+            for row in rows:
+                # Swap the last sprite in the cell into this one's slot.
+                last_slot = self.counts[column, row] - 1
+                slots = self.cell_sprites[column, row]
+                slot = int(numpy.flatnonzero(slots[:last_slot + 1] == index)[0])
+                slots[slot] = slots[last_slot]
+                slots[last_slot] = -1
+                self.counts[column, row] -= 1
+        self.update_filled_totals()
+
+    def find_touching(self, sprite):
+        """Returns the sprites in the grid that one sprite overlaps, in the order they were added. The same
+            ones as arcade.check_for_collision_with_list(), as long as the hit boxes are convex, like
+            tiles' and arcade's simple hit boxes are."""
+        points = sprite.get_adjusted_hit_box()
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        first_column = max(0, int((min(xs) - self.origin_x) // self.cell_size))
+        last_column = min(self.columns - 1, int((max(xs) - self.origin_x) // self.cell_size))
+        first_row = max(0, int((min(ys) - self.origin_y) // self.cell_size))
+        last_row = min(self.rows - 1, int((max(ys) - self.origin_y) // self.cell_size))
+        if first_column > last_column or first_row > last_row:
+            return []
+
+        # Every sprite in those cells. Removed sprites aren't in any, and empty slots are -1.
+        indices = set(self.cell_sprites[first_column:last_column + 1, first_row:last_row + 1].ravel().tolist())
+        indices.discard(-1)
+        return [self.sprites[index] for index in sorted(indices)
+                if are_polygons_overlapping(points, self.hit_boxes[index])]
+
+    def find_pairs(self, batch):
+        """Returns every (bullet index, sprite index) pair where the bullet's bounding
+            box reaches a cell the sprite is in. Each pair only appears once."""
+        first_columns = numpy.floor((batch.x - batch.radius - self.origin_x) / self.cell_size).astype(numpy.int64)
+        last_columns = numpy.floor((batch.x + batch.radius - self.origin_x) / self.cell_size).astype(numpy.int64)
+        first_rows = numpy.floor((batch.y - batch.radius - self.origin_y) / self.cell_size).astype(numpy.int64)
+        last_rows = numpy.floor((batch.y + batch.radius - self.origin_y) / self.cell_size).astype(numpy.int64)
+
+        # Bullets are much smaller than a cell, so this is usually just the 2 by 2 cells around each one.
+        span = int(max((last_columns - first_columns).max(), (last_rows - first_rows).max())) + 1
+
+        bullet_indices = []
+        cell_indices = []
+        all_bullets = numpy.arange(len(batch))
+        for column_offset in range(span):
+            for row_offset in range(span):
+                columns = first_columns + column_offset
+                rows = first_rows + row_offset
+                inside = ((columns <= last_columns) & (rows <= last_rows)
+                          & (columns >= 0) & (columns < self.columns) & (rows >= 0) & (rows < self.rows))
+                columns, rows = columns[inside], rows[inside]
+
+                # Only the cells that have anything in them.
+                filled = self.counts[columns, rows] > 0
+                bullet_indices.append(all_bullets[inside][filled])
+                cell_indices.append(columns[filled] * self.rows + rows[filled])
+
+        bullet_indices = numpy.concatenate(bullet_indices)
+        cell_indices = numpy.concatenate(cell_indices)
+        if len(bullet_indices) == 0:
+            return no_hits()
+
+        cell_count = self.columns * self.rows
+
+        # Every filled slot of every one of those cells.
+        slots = self.cell_sprites.reshape(cell_count, -1)[cell_indices]
+        filled = slots >= 0
+        bullet_indices = numpy.broadcast_to(bullet_indices[:, None], slots.shape)[filled]
+        sprite_indices = slots[filled].astype(numpy.int64)
+
+        # The same sprite can be in more than one of a bullet's cells.
+        sprite_count = len(self.sprites)
+        keys = numpy.unique(bullet_indices * sprite_count + sprite_indices)
+        return keys // sprite_count, keys % sprite_count
+
+    def check_for_collisions(self, batch):
+        """Checks every bullet in a BulletBatch against the grid in one pass.
+
+            Returns two numpy arrays: the indices of the bullets that hit something, and the
+            indices (in self.sprites) of what they hit. A bullet touching two sprites appears twice."""
+        if len(batch) == 0 or len(self.removed_indices) == len(self.sprites):
+            return no_hits()
+
+        bullet_indices, sprite_indices = self.find_pairs(batch)
+        if len(bullet_indices) == 0:
+            return no_hits()
+
+        # Rectangle sprites. A separating axis test of each rotated bullet against the
+        # sprite's box: they touch unless there is a gap along one of the four edge directions.
+        boxes = self.is_box[sprite_indices]
+        bullets, sprites = bullet_indices[boxes], sprite_indices[boxes]
+
+        box_half_width = (self.right[sprites] - self.left[sprites]) / 2
+        box_half_height = (self.top[sprites] - self.bottom[sprites]) / 2
+        distance_x = (self.left[sprites] + box_half_width) - batch.x[bullets]
+        distance_y = (self.bottom[sprites] + box_half_height) - batch.y[bullets]
+        cos, sin = batch.cos[bullets], batch.sin[bullets]
+        abs_cos, abs_sin = numpy.abs(cos), numpy.abs(sin)
+        half_width, half_height = batch.half_width[bullets], batch.half_height[bullets]
+
+        touching = ((numpy.abs(distance_x) <= box_half_width + half_width * abs_cos + half_height * abs_sin)
+                    & (numpy.abs(distance_y) <= box_half_height + half_width * abs_sin + half_height * abs_cos)
+                    & (numpy.abs(distance_x * cos + distance_y * sin)
+                       <= half_width + box_half_width * abs_cos + box_half_height * abs_sin)
+                    & (numpy.abs(distance_y * cos - distance_x * sin)
+                       <= half_height + box_half_width * abs_sin + box_half_height * abs_cos))
+        bullet_hits = [bullets[touching]]
+        sprite_hits = [sprites[touching]]
+
+        # Anything else, e.g. slopes, the slow way.
+        others = [(bullet_index, sprite_index)
+                  for bullet_index, sprite_index in zip(bullet_indices[~boxes], sprite_indices[~boxes])
+                  if arcade.check_for_collision(batch.bullets[bullet_index], self.sprites[sprite_index])]
+        if others:
+            bullet_hits.append(numpy.array([bullet_index for bullet_index, _ in others], dtype=numpy.int64))
+            sprite_hits.append(numpy.array([sprite_index for _, sprite_index in others], dtype=numpy.int64))
+
+        return numpy.concatenate(bullet_hits), numpy.concatenate(sprite_hits)
+
+    def raycast(self, start_x, start_y, end_x, end_y, extent_x=0, extent_y=0):
+        """Finds the first sprite each segment touches, by stepping through the cells along it
+            in order (Amanatides and Woo's DDA), so it only looks at the cells the segment passes
+            through and can't miss a thin wall however long the segment is.
+
+            The segments can be given a thickness with extent_x and extent_y, which have to be
+            less than a cell. Sprites are treated as their bounding boxes. Takes numpy arrays,
+            and returns three: the indices of the segments that hit something, the index
+            (in self.sprites) of what each one hit first, and how far along it, from 0 to 1."""
+        start_x, start_y, end_x, end_y = numpy.broadcast_arrays(*[numpy.asarray(values, dtype=numpy.float64)
+                                                                  for values in [start_x, start_y, end_x, end_y]])
+        extent_x = numpy.broadcast_to(numpy.asarray(extent_x, dtype=numpy.float64), start_x.shape)
+        extent_y = numpy.broadcast_to(numpy.asarray(extent_y, dtype=numpy.float64), start_x.shape)
+        count = len(start_x)
+        if count == 0 or len(self.removed_indices) == len(self.sprites):
+            return no_hits() + (numpy.empty(0),)
+
+        delta_x = end_x - start_x
+        delta_y = end_y - start_y
+
+        # The cell each segment starts and ends in.
+        columns = numpy.floor((start_x - self.origin_x) / self.cell_size).astype(numpy.int64)
+        rows = numpy.floor((start_y - self.origin_y) / self.cell_size).astype(numpy.int64)
+        end_columns = numpy.floor((end_x - self.origin_x) / self.cell_size).astype(numpy.int64)
+        end_rows = numpy.floor((end_y - self.origin_y) / self.cell_size).astype(numpy.int64)
+
+        # Segments with nothing in the cells they cross, or the cells around those, can't touch anything.
+        # Usually most of them, so they're left out before stepping through the cells.
+        first_columns = numpy.clip(numpy.minimum(columns, end_columns) - 1, 0, self.columns)
+        last_columns = numpy.clip(numpy.maximum(columns, end_columns) + 2, 0, self.columns)
+        first_rows = numpy.clip(numpy.minimum(rows, end_rows) - 1, 0, self.rows)
+        last_rows = numpy.clip(numpy.maximum(rows, end_rows) + 2, 0, self.rows)
+        totals = self.filled_totals
+        filled = (totals[last_columns, last_rows] - totals[first_columns, last_rows]
+                  - totals[last_columns, first_rows] + totals[first_columns, first_rows])
+        active = numpy.flatnonzero(filled > 0)
+        if len(active) == 0:
+            return no_hits() + (numpy.empty(0),)
+
+        cells_left = numpy.abs(end_columns - columns) + numpy.abs(end_rows - rows) + 1
+
+        # Which way each segment steps through the grid, how far along it the next column and row
+        # boundaries are, and how far along it has to go to cross a whole cell.
+        step_x = numpy.sign(delta_x).astype(numpy.int64)
+        step_y = numpy.sign(delta_y).astype(numpy.int64)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            next_x = self.origin_x + (columns + (step_x > 0)) * self.cell_size
+            next_y = self.origin_y + (rows + (step_y > 0)) * self.cell_size
+            boundary_x = numpy.where(step_x != 0, (next_x - start_x) / delta_x, numpy.inf)
+            boundary_y = numpy.where(step_y != 0, (next_y - start_y) / delta_y, numpy.inf)
+            cross_x = numpy.where(step_x != 0, self.cell_size / numpy.abs(delta_x), numpy.inf)
+            cross_y = numpy.where(step_y != 0, self.cell_size / numpy.abs(delta_y), numpy.inf)
+
+        best_fractions = numpy.full(count, numpy.inf)
+        best_sprites = numpy.full(count, -1, dtype=numpy.int64)
+
+        # A thick segment can touch sprites in the cells next to the ones it passes through.
+        neighbour_columns = numpy.array([-1, -1, -1, 0, 0, 0, 1, 1, 1])
+        neighbour_rows = numpy.array([-1, 0, 1, -1, 0, 1, -1, 0, 1])
+
+        # Every segment takes one step per pass, so this loops as many times as the longest segment has cells.
+        while len(active) > 0:
+            # Sprites in and around the current cell of each active segment.
+            around_columns = columns[active, None] + neighbour_columns
+            around_rows = rows[active, None] + neighbour_rows
+            inside = ((around_columns >= 0) & (around_columns < self.columns)
+                      & (around_rows >= 0) & (around_rows < self.rows))
+            cell_indices = numpy.where(inside, around_columns * self.rows + around_rows, 0)
+            slots = self.cell_sprites.reshape(self.columns * self.rows, -1)[cell_indices]
+            slots = numpy.where(inside[:, :, None], slots, -1).reshape(len(active), -1)
+
+            # Where each segment first touches each of them, grown by the segment's thickness.
+            segments = active[:, None]
+            sprites = numpy.maximum(slots, 0)
+            fractions = get_segment_fractions(start_x[segments], start_y[segments],
+                                              delta_x[segments], delta_y[segments],
+                                              self.left[sprites] - extent_x[segments],
+                                              self.right[sprites] + extent_x[segments],
+                                              self.bottom[sprites] - extent_y[segments],
+                                              self.top[sprites] + extent_y[segments])
+            fractions = numpy.where(slots >= 0, fractions, numpy.inf)
+
+            nearest = numpy.argmin(fractions, axis=1)
+            nearest_fractions = fractions[numpy.arange(len(active)), nearest]
+            closer = nearest_fractions < best_fractions[active]
+            best_fractions[active[closer]] = nearest_fractions[closer]
+            best_sprites[active[closer]] = slots[numpy.arange(len(active)), nearest][closer]
+
+            # Anything touched later on would have to be further along than the end of this cell,
+            # so segments that have hit something before then are finished.
+            exits = numpy.minimum(boundary_x[active], boundary_y[active])
+            cells_left[active] -= 1
+            active = active[(cells_left[active] > 0) & (best_fractions[active] > exits)]
+
+            # Step the rest into the next cell, across whichever boundary comes first.
+            across_x = boundary_x[active] < boundary_y[active]
+            stepping_x, stepping_y = active[across_x], active[~across_x]
+            columns[stepping_x] += step_x[stepping_x]
+            boundary_x[stepping_x] += cross_x[stepping_x]
+            rows[stepping_y] += step_y[stepping_y]
+            boundary_y[stepping_y] += cross_y[stepping_y]
+
+        hits = numpy.flatnonzero(best_sprites >= 0)
+        return hits, best_sprites[hits], best_fractions[hits]
+
+    def check_paths(self, batch):
+        """Finds the first sprite each bullet in a BulletBatch touched on its way from where it
+            was last frame to where it is now, so fast bullets can't pass through thin walls.
+
+            Returns the same as raycast()."""
+        return self.raycast(batch.x - batch.change_x, batch.y - batch.change_y, batch.x, batch.y,
+                            batch.extent_x, batch.extent_y)
@@ -0,0 +1,318 @@
+"""
+Caching layers that don't change as images. The sprite lists of a group of layers are drawn once
+into square images of the level, and after that drawing the layers is just drawing the few images
+on the screen. Images are drawn as they come near the screen, and when part of a layer does
+change, e.g. a barrel being blown up, only the images under that part are drawn again.
+
+The images are kept side by side in a few big pages, each one texture with one framebuffer to draw
+into it, so all the images on the screen from one page are drawn with one draw call.
+
+The images are made at the size of the art, a quarter of the size on screen, and scaled up without
+smoothing. Every sprite in the level lines up with the pixels of its art, so the cached images
+look exactly like drawing the sprites, as long as nothing in them is partly see-through.
+
+Example usage.
+    cache = rc.LayerCache([wall_list, grass_list])
+    # Then in on_draw(), once the viewport is set:
+    cache.update()
+    arcade.start_render()
+    cache.draw()
+    # And when a sprite is taken out of, or put back in, one of the lists:
+    cache.invalidate_sprite(sprite)
+
+Import this as 'rc' for consistency.
+"""
+
+import math
+import array
+import arcade
+from arcade.gl import BufferDescription
+import game_constants as c
+import game_draw_layers as dl
+
+# Draws one cached image over its square of the level, with the same projection as the sprites.
+VERTEX_SHADER = """
+#version 330
+
+uniform Projection {
+    uniform mat4 matrix;
+} proj;
+
+in vec2 in_vert;
+in vec2 in_uv;
+out vec2 v_uv;
+
+void main() {
+    gl_Position = proj.matrix * vec4(in_vert, 0.0, 1.0);
+    v_uv = in_uv;
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+
+uniform sampler2D texture0;
+
+in vec2 v_uv;
+out vec4 f_color;
+
+void main() {
+    f_color = texture(texture0, v_uv);
+}
+"""
+
+# The shader program, made the first time a cache is drawn, for each graphics context.
+programs = {}
+
+
+def get_program(ctx):
+    program = programs.get(ctx)
+    if program is None:
+        program = ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+        programs[ctx] = program
+    return program
+
+
+def get_static_sprites(sprite_list):
+    """The sprites of a layer that go into the images. That's all of them, except for an lv.ChunkedLayer,
+        whose moving sprites are drawn over the images as they are."""
+    if hasattr(sprite_list, 'moving_list'):
+        return sprite_list.get_chunk_sprites()
+    return sprite_list
+
+
+def draw_static(sprite_list, **kwargs):
+    """Draws the sprites of a layer that go into the images."""
+    if hasattr(sprite_list, 'moving_list'):
+        sprite_list.draw_chunks(**kwargs)
+    else:
+        sprite_list.draw(**kwargs)
+
+
+def is_static(sprite_lists):
+    """Whether nothing in any of the sprite lists moves or turns by itself, so they can be cached."""
+    return not any(sprite.change_x or sprite.change_y or sprite.change_angle
+                   for sprite_list in sprite_lists for sprite in get_static_sprites(sprite_list))
+
+
+class CachePage:
+    """A big image holding the images of many tiles side by side, in square slots. All the tiles on
+        the screen from one page are drawn together, from one buffer of vertices."""
+
+    def __init__(self, ctx, slots_across, slot_size):
+        size = slots_across * slot_size
+        self.texture = ctx.texture((size, size), components=4, filter=(ctx.NEAREST, ctx.NEAREST))
+        self.framebuffer = ctx.framebuffer(color_attachments=[self.texture])
+        self.size = size
+        self.slot_size = slot_size
+
+        # Bottom left corners of the slots no tile has taken yet, the first slot last.
+        self.free_slots = [(column * slot_size, row * slot_size)
+                           for row in reversed(range(slots_across)) for column in reversed(range(slots_across))]
+
+        # Room for two triangles, of four floats a vertex, for every slot.
+        self.buffer = ctx.buffer(reserve=len(self.free_slots) * 6 * 4 * 4)
+        self.geometry = ctx.geometry([BufferDescription(self.buffer, '2f 2f', ['in_vert', 'in_uv'])],
+                                     mode=ctx.TRIANGLES)
+
+        # Vertices of the tiles to draw from this page this frame.
+        self.vertices = array.array('f')
+
+
+class CachedTile:
+    """One square of the level, and where its image is kept."""
+
+    def __init__(self, left, bottom, size):
+        self.left = left
+        self.bottom = bottom
+        self.size = size
+
+        # The page and slot the image is in, and the vertices drawing it over its square of the level.
+        # Found the first time the tile is drawn.
+        self.page = None
+        self.slot = None
+        self.vertices = None
+
+        # Whether the image needs drawing again.
+        self.dirty = True
+
+    def set_slot(self, page, slot):
+        """Keeps the tile's image in a slot of a page."""
+        self.page = page
+        self.slot = slot
+        left, bottom, size = self.left, self.bottom, self.size
+        u0 = slot[0] / page.size
+        v0 = slot[1] / page.size
+        u1 = (slot[0] + page.slot_size) / page.size
+        v1 = (slot[1] + page.slot_size) / page.size
+        self.vertices = array.array('f', [left, bottom, u0, v0,
+                                          left + size, bottom, u1, v0,
+                                          left, bottom + size, u0, v1,
+                                          left, bottom + size, u0, v1,
+                                          left + size, bottom, u1, v0,
+                                          left + size, bottom + size, u1, v1])
+
+
+class LayerCache:
+    """A group of sprite lists, drawn one after another, cached as images of square tiles of the level.
+        Draws in place of the sprite lists, e.g. cache.draw(filter=GL_NEAREST). Anything that draws
+        like a sprite list and can be looped over for its sprites will do, such as lv.ChunkedLayer.
+
+        Only the chunks of an lv.ChunkedLayer are cached. Its moving sprites are drawn over the
+        images, after the whole group. If anything else in the sprite lists moves, they can't be
+        cached, and are drawn as they are."""
+
+    def __init__(self, sprite_lists, tile_size=c.RENDER_CACHE_TILE_SIZE, page_size=c.RENDER_CACHE_PAGE_SIZE):
+        self.sprite_lists = sprite_lists
+        self.moving_lists = [sprite_list.moving_list for sprite_list in sprite_lists
+                             if hasattr(sprite_list, 'moving_list')]
+        self.tile_size = tile_size
+        self.page_size = page_size
+        self.cached = is_static(sprite_lists)
+
+        # Size of each tile's image. One pixel for each pixel of the art.
+        self.resolution = tile_size // c.PIXEL_SCALING
+
+        # Tiles with something in them, by (column, row). They're only given slots, and drawn, once
+        # they come near the screen.
+        self.tiles = {}
+        if self.cached:
+            for sprite_list in sprite_lists:
+                for sprite in get_static_sprites(sprite_list):
+                    self.invalidate_sprite(sprite)
+
+        # Pages made so far. A new one is made when the others are full.
+        self.pages = []
+
+        # How many tile images the last update() drew, and the draw calls, sprites and textures of the
+        # last draw(), see dl.get_draw_stats(). Every tile on the screen is one sprite.
+        self.render_count = 0
+        self.draw_stats = dl.NO_DRAW_STATS
+
+    def get_tile_range(self, left, right, bottom, top):
+        """First and last column, and first and last row, of the tiles touching an area."""
+        size = self.tile_size
+        return (math.floor(left / size), math.floor(right / size),
+                math.floor(bottom / size), math.floor(top / size))
+
+    def invalidate(self, left, right, bottom, top):
+        """Marks the images under an area of the level to be drawn again, making tiles where there aren't any."""
+        first_column, last_column, first_row, last_row = self.get_tile_range(left, right, bottom, top)
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                tile = self.tiles.get((column, row))
+                if tile is None:
+                    tile = CachedTile(column * self.tile_size, row * self.tile_size, self.tile_size)
+                    self.tiles[(column, row)] = tile
+                tile.dirty = True
+
+    def invalidate_sprite(self, sprite):
+        """Marks the images under a sprite to be drawn again, e.g. once it's been taken out of a list."""
+        self.invalidate(sprite.left, sprite.right, sprite.bottom, sprite.top)
+
+    def get_tiles(self, left, right, bottom, top):
+        """The tiles touching an area."""
+        first_column, last_column, first_row, last_row = self.get_tile_range(left, right, bottom, top)
+        tiles = []
+        for column in range(first_column, last_column + 1):
+            for row in range(first_row, last_row + 1):
+                tile = self.tiles.get((column, row))
+                if tile is not None:
+                    tiles.append(tile)
+        return tiles
+
+    def get_free_slot(self, ctx):
+        """A page and a slot in it for a tile's image, making a new page if the others are full. New pages
+            are only as big as they need to be for the tiles without slots, up to the page size."""
+        for page in self.pages:
+            if page.free_slots:
+                return page, page.free_slots.pop()
+        unplaced = sum(1 for tile in self.tiles.values() if tile.page is None)
+        slots_across = min(math.ceil(math.sqrt(unplaced)), self.page_size // self.resolution)
+        page = CachePage(ctx, slots_across, self.resolution)
+        self.pages.append(page)
+        return page, page.free_slots.pop()
+
+    def render_tile(self, ctx, tile):
+        """Draws the sprite lists into a tile's image."""
+        if tile.page is None:
+            tile.set_slot(*self.get_free_slot(ctx))
+
+        # The viewport is the tile's slot while it's drawn, so only what's in the tile is drawn into its
+        # image, and clearing the page only clears the slot. Cleared before it's bound, as clear() binds
+        # it and then binds whatever was bound before.
+        framebuffer = tile.page.framebuffer
+        framebuffer.viewport = (tile.slot[0], tile.slot[1], self.resolution, self.resolution)
+        projection = ctx.projection_2d
+        framebuffer.clear()
+        with framebuffer:
+            ctx.projection_2d = (tile.left, tile.left + tile.size, tile.bottom, tile.bottom + tile.size)
+            for sprite_list in self.sprite_lists:
+                draw_static(sprite_list, filter=ctx.NEAREST)
+                self.add_draw_stats(dl.get_draw_stats(sprite_list))
+        ctx.projection_2d = projection
+
+        tile.dirty = False
+        self.render_count += 1
+
+    def add_draw_stats(self, stats):
+        self.draw_stats = tuple(total + count for total, count in zip(self.draw_stats, stats))
+
+    def update(self):
+        """Draws the images of the tiles on the screen that need it, and a few near the screen, so they're
+            ready before they're needed. Call it once the viewport is set for the frame, but before the
+            screen is cleared, as drawing into the images part way through drawing the screen makes the
+            graphics driver finish what's on the screen so far first."""
+        self.render_count = 0
+        if not self.cached:
+            return
+
+        ctx = arcade.get_window().ctx
+        left, right, bottom, top = arcade.get_viewport()
+        for tile in self.get_tiles(left, right, bottom, top):
+            if tile.dirty:
+                self.render_tile(ctx, tile)
+
+        margin = c.RENDER_CACHE_MARGIN
+        for tile in self.get_tiles(left - margin, right + margin, bottom - margin, top + margin):
+            if self.render_count >= c.RENDER_CACHE_TILES_PER_FRAME:
+                break
+            if tile.dirty:
+                self.render_tile(ctx, tile)
+
+    def draw(self, **kwargs):
+        """Draws the tiles on the screen, first drawing the images of any that update() hasn't, and
+            then any moving sprites."""
+        self.draw_stats = dl.NO_DRAW_STATS
+        if not self.cached:
+            for sprite_list in self.sprite_lists:
+                sprite_list.draw(**kwargs)
+                self.add_draw_stats(dl.get_draw_stats(sprite_list))
+            return
+
+        ctx = arcade.get_window().ctx
+        tiles = self.get_tiles(*arcade.get_viewport())
+        for tile in tiles:
+            if tile.dirty:
+                self.render_tile(ctx, tile)
+
+        # The tiles don't overlap, so each page's tiles can be drawn together, in any order.
+        pages = []
+        for tile in tiles:
+            if not tile.page.vertices:
+                pages.append(tile.page)
+            tile.page.vertices.extend(tile.vertices)
+
+        program = get_program(ctx)
+        ctx.enable(ctx.BLEND)
+        ctx.blend_func = ctx.BLEND_DEFAULT
+        for page in pages:
+            page.buffer.write(page.vertices)
+            page.texture.use(0)
+            page.geometry.render(program, vertices=len(page.vertices) // 4)
+            del page.vertices[:]
+        self.add_draw_stats((len(pages), len(tiles), tuple(page.texture for page in pages)))
+
+        for moving_list in self.moving_lists:
+            moving_list.draw(**kwargs)
+            self.add_draw_stats(dl.get_draw_stats(moving_list))
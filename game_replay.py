@@ -0,0 +1,162 @@
+"""
+Recording what the player does, and playing it back. The simulation only changes through its
+inputs and its seeded random numbers, so the same level, seed and inputs play out exactly the
+same every time. That makes a recording a repeatable workload, for hunting down slow frames.
+
+A recording is a small binary file. A header has the level, the seed and how many steps were
+played. Then there is a record for each step where the inputs changed: the step number, a byte
+with a bit for each key, and the mouse position.
+
+Example usage.
+    recorder = rp.Recorder('session.replay', level=1, seed=1234)
+    recorder.record(simulation.frame, inputs)
+    recorder.close()
+
+    simulation = rp.run_replay(rp.load_replay('session.replay'))
+
+Import this as 'rp' for consistency.
+"""
+
+import struct
+
+import game_simulation as sim
+
+REPLAY_MAGIC = b'UNXR'
+REPLAY_VERSION = 1
+
+# Magic, version, level, seed, steps played.
+HEADER = struct.Struct('<4sHHII')
+
+# Step, buttons, mouse x, mouse y.
+RECORD = struct.Struct('<IBhh')
+
+# Which bit of a record's buttons byte each input is.
+BUTTONS = ['left', 'right', 'up', 'down', 'sprint', 'fire', 'equip_one_handed', 'equip_two_handed']
+
+# Buttons that are only pressed for one step, rather than held.
+PRESS_BUTTONS = ['fire', 'equip_one_handed', 'equip_two_handed']
+PRESS_MASK = sum(1 << BUTTONS.index(name) for name in PRESS_BUTTONS)
+
+# Where to record the next game played, set from the command line with --record.
+record_path = None
+
+
+def pack_buttons(inputs):
+    """Returns a byte with a bit set for each input that's on."""
+    buttons = 0
+    for bit, name in enumerate(BUTTONS):
+        if getattr(inputs, name):
+            buttons |= 1 << bit
+    return buttons
+
+
+def unpack_buttons(buttons, inputs):
+    """Sets every input from a byte made by pack_buttons."""
+    for bit, name in enumerate(BUTTONS):
+        setattr(inputs, name, bool(buttons & (1 << bit)))
+
+
+class Recorder:
+    """Writes the inputs for each step to a file, as they're played. Only steps where something
+        changed are written. Anything already written is kept, even if the game is closed
+        without close() being called."""
+
+    def __init__(self, path, level, seed):
+        self.level = level
+        self.seed = seed
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, level, seed, 0))
+
+        # The inputs as the last record left them, once its presses were let go.
+        self.last_record = None
+
+        # How many steps have been recorded.
+        self.steps = 0
+
+    def record(self, step, inputs):
+        """Records the inputs a step is about to be played with."""
+        buttons = pack_buttons(inputs)
+        mouse_x = int(inputs.mouse_x)
+        mouse_y = int(inputs.mouse_y)
+        if (buttons, mouse_x, mouse_y) != self.last_record:
+            self.file.write(RECORD.pack(step, buttons, mouse_x, mouse_y))
+            self.last_record = (buttons & ~PRESS_MASK, mouse_x, mouse_y)
+        self.steps = step + 1
+
+    def close(self):
+        """Finishes the file, filling in how many steps were played."""
+        if self.file.closed:
+            return
+        self.file.seek(0)
+        self.file.write(HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.level, self.seed, self.steps))
+        self.file.close()
+
+
+class Replay:
+    """A recording loaded back in, that sets the inputs for each step as they were recorded."""
+
+    def __init__(self, level, seed, steps, records):
+        self.level = level
+        self.seed = seed
+        self.steps = steps
+
+        # (step, buttons, mouse x, mouse y) for every step where the inputs changed.
+        self.records = records
+
+        # The next record to use.
+        self.cursor = 0
+
+    def apply(self, step, inputs):
+        """Sets every input to what it was recorded as for this step. Anything the player
+            is doing at the same time is overwritten."""
+        while self.cursor < len(self.records) and self.records[self.cursor][0] <= step:
+            self.cursor += 1
+        if self.cursor == 0:
+            return
+
+        record_step, buttons, mouse_x, mouse_y = self.records[self.cursor - 1]
+        if record_step != step:
+            # Presses only last for the step they were recorded on.
+            buttons &= ~PRESS_MASK
+        unpack_buttons(buttons, inputs)
+        inputs.mouse_x = mouse_x
+        inputs.mouse_y = mouse_y
+
+    def rewind(self):
+        """Goes back to the start, to play the replay again."""
+        self.cursor = 0
+
+
+def load_replay(path):
+    """Reads a recording made by a Recorder."""
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    magic, version, level, seed, steps = HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f'{path} is not a version {REPLAY_VERSION} replay.')
+
+    # Ignore any partly written record at the end, from the game closing mid-write.
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    records = list(RECORD.iter_unpack(data[HEADER.size:end]))
+
+    # A recording that wasn't closed doesn't know how long it is, so it ends at its last change.
+    if records:
+        steps = max(steps, records[-1][0] + 1)
+    return Replay(level, seed, steps, records)
+
+
+def run_replay(replay, on_step=None, profiler=None):
+    """Plays a replay through a new simulation, with nothing drawn, and returns the simulation.
+        on_step is called with the simulation after every step, e.g. for timing.
+        With no frames drawn, each step is a frame for the profiler."""
+    replay.rewind()
+    simulation = sim.Simulation(level=replay.level, seed=replay.seed, profiler=profiler)
+    inputs = sim.Inputs()
+    for step in range(replay.steps):
+        replay.apply(step, inputs)
+        simulation.step(inputs)
+        simulation.profiler.end_frame()
+        if on_step is not None:
+            on_step(simulation)
+    return simulation
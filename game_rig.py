@@ -0,0 +1,121 @@
+"""
+Offset tables for character rigs. Where the head, arms and legs go relative to the body depends on
+the frame of animation, which way the character faces, which way the head and arm are looking,
+and whether the character is sprinting. Rather than working that out through a tree of branches
+every update, every combination is worked out once when the table is built, and positioning a
+character's parts is a few reads from flat lists.
+
+Example usage.
+    table = rg.get_rig_table(an.HUMAN_CLIPS, an.CLIP_IDLE)
+    index = table.clip_starts[clip_id] + frame
+    head_x = table.head_x[(index * 2 + facing) * 2 + look]
+
+Import this as 'rg' for consistency.
+"""
+
+import game_constants as c
+
+# Which way a head or arm is looking, relative to the way the character faces. Looking
+# right means an angle from -90 to 90 degrees, i.e. anywhere in the right half of the circle.
+LOOKING_RIGHT = 0
+LOOKING_LEFT = 1
+
+# Rig tables, keyed by the id of the clips they were built from.
+rig_tables = {}
+
+
+def get_look(angle):
+    """Returns which half of the circle a part's angle points into."""
+    return LOOKING_RIGHT if -90 <= angle <= 90 else LOOKING_LEFT
+
+
+class RigTable:
+    """Final offsets, in pixels, of every part from the centre of the body.
+
+        Every frame of every clip with offsets gets a frame index, clip_starts[clip_id] + frame.
+        The tables are indexed by that and the other things the offset depends on:
+            head_x          ((frame index * 2 + facing) * 2 + head look)
+            aimed_arm_x     (((frame index * 2 + facing) * 2 + arm look) * 2 + sprinting)
+            arm_x, legs_x, legs_y, back_arm_x, back_arm_y
+                            (frame index * 2 + facing)
+            head_y, aimed_arm_y, arm_y
+                            (frame index)
+        Aimed arms are for holding a gun. They turn about their middle towards the mouse."""
+
+    def __init__(self, clips, idle_clip_id):
+        # Where each clip's frames start, or None for clips without offsets (e.g. the front arm firing).
+        self.clip_starts = []
+
+        self.head_x = []
+        self.head_y = []
+        self.aimed_arm_x = []
+        self.aimed_arm_y = []
+        self.arm_x = []
+        self.arm_y = []
+        self.back_arm_x = []
+        self.back_arm_y = []
+        self.legs_x = []
+        self.legs_y = []
+
+        frame_count = 0
+        for clip_id, clip in enumerate(clips):
+            if not clip.head_offsets:
+                self.clip_starts.append(None)
+                continue
+            self.clip_starts.append(frame_count)
+            frame_count += clip.frame_count
+
+            for (head_x, head_y), (arm_x, arm_y) in zip(clip.head_offsets, clip.arm_offsets):
+                self.add_frame(head_x, head_y, arm_x, arm_y, idling=clip_id == idle_clip_id)
+
+    def add_frame(self, head_x, head_y, arm_x, arm_y, idling):
+        """Works out every combination for one frame, and adds them to the end of the tables."""
+        self.head_y.append(head_y)
+        self.aimed_arm_y.append(arm_y - 7 * c.PIXEL_SCALING)
+        self.arm_y.append(-1 * c.PIXEL_SCALING)
+
+        for facing in (c.RIGHT_FACING, c.LEFT_FACING):
+            # Facing left mirrors the offsets.
+            side = 1 if facing == c.RIGHT_FACING else -1
+
+            # The head shifts a couple of pixels depending on which way it looks, so it stays on the neck.
+            for look in (LOOKING_RIGHT, LOOKING_LEFT):
+                looking_ahead = look == LOOKING_RIGHT
+                if idling == (facing == c.RIGHT_FACING):
+                    look_offset = -2 if looking_ahead else 0
+                else:
+                    look_offset = 0 if looking_ahead else 2
+                self.head_x.append(side * head_x + look_offset * c.PIXEL_SCALING)
+
+            # A gun arm is held at the shoulder, which moves a little when sprinting or aiming behind.
+            for look in (LOOKING_RIGHT, LOOKING_LEFT):
+                looking_ahead = look == LOOKING_RIGHT
+                for sprinting in (False, True):
+                    if facing == c.RIGHT_FACING:
+                        if sprinting:
+                            look_offset = -2 if looking_ahead else -3
+                        else:
+                            look_offset = 0 if looking_ahead else -3
+                        look_offset -= 4
+                    else:
+                        look_offset = 2 if sprinting and looking_ahead else 0
+                        look_offset += 4
+                    self.aimed_arm_x.append(side * arm_x + look_offset * c.PIXEL_SCALING)
+
+            # An empty arm hangs a pixel off the body, towards its back.
+            self.arm_x.append(-side * c.PIXEL_SCALING)
+
+            # The legs and back arm are drawn in place on the body.
+            self.back_arm_x.append(0)
+            self.back_arm_y.append(0)
+            self.legs_x.append(0)
+            self.legs_y.append(0)
+
+
+def get_rig_table(clips, idle_clip_id):
+    """Returns the rig table for a list of clips, only building it the first time."""
+    table = rig_tables.get(id(clips))
+    if table is None:
+        table = RigTable(clips, idle_clip_id)
+        rig_tables[id(clips)] = table
+    return table
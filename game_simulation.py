@@ -0,0 +1,736 @@
+"""
+The game itself: the player, bullets, barrels, hit effects, the viewport and the level, moved on
+one fixed update at a time by step(inputs). It only uses arcade's sprites, sprite lists and
+physics, never the window, so it can run without a GL context and as fast as the computer can go,
+e.g. for soak tests, bots and benchmarks. GameView draws it, plays its sounds and feeds it input.
+
+To run without a display at all, set pyglet.options['shadow_window'] = False before arcade is imported.
+
+Example usage.
+    simulation = sim.Simulation(level=1)
+    inputs = sim.Inputs()
+    inputs.right = True
+    for _ in range(600):
+        simulation.step(inputs)
+
+Import this as 'sim' for consistency.
+"""
+
+import random
+import numpy
+import arcade
+import game_constants as c
+import game_functions as f
+import game_player as p
+import game_entities as e
+import game_levels as lv
+import game_projectiles as pj
+import game_lod as lod
+import game_physics as ph
+import game_profiler as pf
+
+# How long one step of the simulation is, in seconds.
+STEP_TIME = 1 / c.UPDATES_PER_SECOND
+
+
+class Inputs:
+    """What the player is doing with the keyboard and mouse, for one step of the simulation."""
+
+    def __init__(self):
+        # Keys being held down.
+        self.left = False
+        self.right = False
+        self.up = False
+        self.down = False
+        self.sprint = False
+
+        # Position of the mouse on the screen, not in the level.
+        self.mouse_x = 0
+        self.mouse_y = 0
+
+        # Things pressed since the last step.
+        self.fire = False
+        self.equip_one_handed = False
+        self.equip_two_handed = False
+
+    def clear_presses(self):
+        """Forgets what was pressed, once a step has used it. Keys being held stay held."""
+        self.fire = False
+        self.equip_one_handed = False
+        self.equip_two_handed = False
+
+
+class Simulation:
+    """Everything in a level that changes as the game is played."""
+
+    def __init__(self, level=1, seed=None, profiler=None):
+        # Keep track of the level. Starts at the first one.
+        self.level = level
+
+        # Times each phase of a step, see pf.
+        self.profiler = profiler if profiler is not None else pf.Profiler()
+
+        # Anything random, e.g. which footstep sound plays, comes from here so the same seed plays out the same.
+        self.random = random.Random(seed)
+
+        # How many steps have been taken.
+        self.frame = 0
+
+        # Checks if the treasure has been found and the game won.
+        self.game_won = False
+
+        # Set once the game has been won and the screen has faded to black.
+        self.finished = False
+
+        # Names of the sounds that happened during the last step, for whoever is listening to play.
+        self.sounds = []
+
+        # Barrels blown up or put back during the last step, so whoever is drawing can redraw where they were.
+        self.changed_barrels = []
+
+        # Set on the step a new level has been loaded, so whoever is drawing can get it ready.
+        self.level_loaded = False
+
+        # Whether the jump key has to be let go of before jumping again.
+        self.jump_needs_reset = False
+
+        # These are 'lists' that keep track of our sprites. Each sprite should
+        # go into a list.
+        self.coin_list = None
+        self.foreground_decorations_list = None
+        self.explosions_list = None
+        self.barrel_list = None
+        self.background_decorations_list = None
+        self.next_level_list = None
+        self.background_walls_list = None
+        self.treasure_list = None
+        self.grass_list = None
+        self.wall_list = None
+        self.ladder_list = None
+        self.player_list = None
+        self.bullet_list = None
+        self.items_list = None
+        self.enemy_list = None
+
+        # Every enemy in the level, moved on in batches. Only those near the screen are in enemy_list.
+        self.enemies = None
+
+        # Grids of the walls and barrels, for checking bullets against.
+        self.wall_grid = None
+        self.barrel_grid = None
+
+        # Pools of bullets and hit effects, reused instead of making new sprites for every shot.
+        self.bullet_pool = None
+        self.explosion_pool = None
+        self.barrel_explosion_pool = None
+
+        # Hit effects are updated more often the nearer they are to the screen.
+        self.effects_lod = None
+
+        # Player sprite variables. Body, legs etc.
+        self.player_sprite = None
+
+        # Our 'physics' engine.
+        self.physics_engine = None
+
+        # Fades the screen to black once the game is won.
+        self.screen_fade = f.BlackScreenFade()
+
+        # The hit effects textures.
+        self.explosion_texture_list = []
+        for i in range(8):
+            texture = f.load_texture(f'resources/images/effects/dirt_{i}.png')
+            self.explosion_texture_list.append(texture)
+
+        # The barrel explosion effect.
+        self.barrel_explosion_texture_list = []
+        for i in range(20):
+            texture = f.load_texture(f'resources/images/effects/barrel_explosion/{i}.png')
+            self.barrel_explosion_texture_list.append(texture)
+
+        # Used to keep track of our scrolling.
+        self.view_bottom = 0
+        self.view_left = 0
+
+        # Set on the steps the viewport has moved.
+        self.view_changed = False
+
+        self.end_of_map = 0
+
+        # The level's background colour, or None to leave it as it is.
+        self.background_color = None
+
+        # Keep track of the score.
+        self.score = 0
+
+        # -- Checkpoint, saved when a level is loaded and restored when the player respawns -- #
+
+        # Every barrel in the level, including ones that get blown up.
+        self.checkpoint_barrels = []
+
+        self.checkpoint_score = 0
+        self.checkpoint_player_x = c.PLAYER_START_X
+        self.checkpoint_player_y = c.PLAYER_START_Y
+        self.checkpoint_fade_alpha = 0
+
+        self.load_level()
+
+    def load_level(self):
+        """Loads the current level, and puts the player at the start of it."""
+
+        # Used to keep track of our scrolling.
+        self.view_bottom = 0
+        self.view_left = 0
+        self.view_changed = True
+
+        # Keep track of the score.
+        self.score = 0
+
+        # Create the Sprite lists.
+        self.player_list = arcade.SpriteList()
+        self.explosions_list = arcade.SpriteList()
+        self.coin_list = arcade.SpriteList()
+        self.items_list = arcade.SpriteList()
+        self.bullet_list = arcade.SpriteList()
+        self.enemy_list = arcade.SpriteList()
+        self.enemies = e.EnemyManager(self.enemy_list)
+
+        # Set up the player, specifically placing it at these coordinates.
+        self.add_player(c.PLAYER_START_X, c.PLAYER_START_Y)
+
+        # --- Load in a map from the tiled editor --- #
+
+        # Name of the layer in the file that has our platforms/walls.
+        walls_layer_name = 'Walls'
+        moving_platforms_layer_name = 'Moving Platforms'
+
+        # Layer for the grass that goes on top of the grass blocks.
+        grass_layer_name = 'Grass'
+
+        # Names of the decorations layers, these only show sprites.
+        foreground_decorations_layer_name = 'Foreground Decorations'
+        background_decorations_layer_name = 'Background Decorations'
+
+        # Darkened background walls.
+        background_walls_layer_name = 'Background Walls'
+
+        # Explosive barrels that explode when shot.
+        barrels_layer_name = 'Barrels'
+
+        # The treasure at the end of the game.
+        treasure_layer_name = 'Treasure'
+
+        # Dark object that transports the player to the next level.
+        next_level_layer_name = 'Next Level'
+
+        # Where enemies start. Only the positions of its tiles are used, they aren't drawn.
+        enemies_layer_name = 'Enemies'
+
+        # Map name.
+        map_name = f'resources/maps/{self.level}.tmx'
+
+        # Get the compiled level. The tiled map is only parsed if it has changed since it was last compiled.
+        compiled_level = lv.get_level(map_name)
+
+        # Calculate the right edge of the my_map in pixels.
+        self.end_of_map = compiled_level.map_width
+
+        # Reset fading.
+        self.screen_fade.alpha = 0
+
+        # Platforms.
+        self.wall_list = lv.build_layer(compiled_level, walls_layer_name)
+        # Foreground decorations.
+        self.foreground_decorations_list = lv.build_layer(compiled_level, foreground_decorations_layer_name)
+
+        # Explosive barrels.
+        self.barrel_list = lv.build_layer(compiled_level, barrels_layer_name)
+        # Background decorations.
+        self.background_decorations_list = lv.build_layer(compiled_level, background_decorations_layer_name)
+        # Background walls.
+        self.background_walls_list = lv.build_layer(compiled_level, background_walls_layer_name)
+        # Grass.
+        self.grass_list = lv.build_layer(compiled_level, grass_layer_name)
+
+        # Next level.
+        self.next_level_list = lv.build_layer(compiled_level, next_level_layer_name)
+
+        # Tint all the sprites in this background walls list to a darker colour to differentiate it
+        # from the other layers.
+        for wall in self.background_walls_list:
+            wall.color = [130, 130, 140]
+        '''
+        # Moving Platforms.
+        moving_platforms_list = arcade.tilemap.process_layer(my_map, moving_platforms_layer_name, PIXEL_SCALING)
+        for sprite in moving_platforms_list:
+            self.wall_list.append(sprite)
+
+        # Ladders.
+        self.ladder_list = arcade.tilemap.process_layer(my_map, 'Ladders',
+                                                        PIXEL_SCALING,
+                                                        use_spatial_hash=True)
+        '''
+        # Treasure (end goal).
+        self.treasure_list = lv.build_layer(compiled_level, treasure_layer_name)
+
+        # Enemies.
+        enemy_positions = compiled_level.layers[enemies_layer_name]
+        self.enemies.add_enemies(enemy_positions['center_x'], enemy_positions['center_y'])
+
+        # Grids of what bullets can hit. The walls never change, and barrels are only taken out when they explode.
+        self.wall_grid = pj.TileGrid(self.wall_list)
+        self.barrel_grid = pj.TileGrid(self.barrel_list)
+
+        # Make every bullet and hit effect the level can have on screen at once.
+        self.bullet_pool = f.SpritePool(self.create_bullet, c.BULLET_POOL_SIZE, self.bullet_list)
+        self.explosion_pool = f.SpritePool(self.create_explosion, c.EXPLOSION_POOL_SIZE, self.explosions_list)
+        self.barrel_explosion_pool = f.SpritePool(self.create_barrel_explosion, c.BARREL_EXPLOSION_POOL_SIZE,
+                                                  self.explosions_list)
+
+        # Hit effects are added as they start.
+        self.effects_lod = lod.LodScheduler(self.update_effect)
+
+        self.background_color = compiled_level.background_color
+
+        # Create the 'physics engine'. It's the only thing that moves walls with a velocity, turning them
+        # round at their boundaries and pushing the player along with them.
+        self.physics_engine = ph.PhysicsEnginePlatformer(self.player_sprite,
+                                                         self.wall_list,
+                                                         gravity_constant=c.GRAVITY,
+                                                         ladders=self.ladder_list)
+
+        self.save_checkpoint()
+        self.level_loaded = True
+
+    def create_bullet(self):
+        """Makes a bullet, for the bullet pool."""
+        bullet = arcade.Sprite()
+        bullet.texture = f.load_texture('resources/images/effects/bullet_projectile.png')
+        bullet.scale = c.PIXEL_SCALING
+        bullet.set_hit_box(pj.BULLET_HIT_BOX)
+        return bullet
+
+    def create_explosion(self):
+        """Makes a hit effect, for the explosion pool."""
+        explosion = e.Explosion(texture_list=self.explosion_texture_list)
+        explosion.set_texture(0)
+        explosion.scale = c.PIXEL_SCALING
+        return explosion
+
+    def create_barrel_explosion(self):
+        """Makes a barrel explosion, for the barrel explosion pool."""
+        explosion = e.BarrelExplosion(self.barrel_explosion_texture_list)
+        explosion.set_texture(0)
+        explosion.scale = c.PIXEL_SCALING
+        return explosion
+
+    def get_pools(self):
+        """The sprite pools, by name, e.g. for showing how full they get."""
+        return {'bullets': self.bullet_pool,
+                'explosions': self.explosion_pool,
+                'barrel explosions': self.barrel_explosion_pool}
+
+    def add_player(self, x, y):
+        """Creates a new player at these coordinates and adds its body parts to the player list."""
+        self.player_sprite = p.PlayerCharacter()
+        self.player_sprite.center_x = x
+        self.player_sprite.center_y = y
+
+        for sprite in self.player_sprite.parts:
+            self.player_list.append(sprite)
+
+    def save_checkpoint(self):
+        """Remembers the state of everything that can change while playing the level,
+            so respawn() can put it back without loading the level again."""
+        self.checkpoint_barrels = list(self.barrel_list)
+        self.checkpoint_score = self.score
+        self.checkpoint_player_x = self.player_sprite.center_x
+        self.checkpoint_player_y = self.player_sprite.center_y
+        self.checkpoint_fade_alpha = self.screen_fade.alpha
+
+    def respawn(self):
+        """Puts the level back to the last checkpoint. Walls and decorations are left
+            as they are, only the player, bullets, explosions, barrels and enemies are reset."""
+
+        # Used to keep track of our scrolling.
+        self.view_bottom = 0
+        self.view_left = 0
+        self.view_changed = True
+
+        self.score = self.checkpoint_score
+        self.screen_fade.alpha = self.checkpoint_fade_alpha
+
+        # Get rid of any bullets and explosions still flying around.
+        self.bullet_pool.release_all()
+        self.explosion_pool.release_all()
+        self.barrel_explosion_pool.release_all()
+        self.effects_lod.clear()
+
+        # Enemies go back to the start of their patrols.
+        self.enemies.reset()
+
+        # Put back any barrels that were blown up.
+        for barrel in self.checkpoint_barrels:
+            if not barrel.sprite_lists:
+                self.barrel_list.append(barrel)
+                self.barrel_grid.add(barrel)
+                self.changed_barrels.append(barrel)
+
+        # Replace the player with a new one, so every body part's animation state starts fresh.
+        for sprite in list(self.player_list):
+            sprite.remove_from_sprite_lists()
+        self.add_player(self.checkpoint_player_x, self.checkpoint_player_y)
+        self.physics_engine.player_sprite = self.player_sprite
+
+    def play_sound(self, name, variations=1):
+        """Queues a sound for whoever is listening to play. Sounds with variations
+            are numbered from 1, and one is picked at random."""
+        if variations > 1:
+            name = f'{name}_{self.random.randint(1, variations)}'
+        self.sounds.append(name)
+
+    # -- INPUT -- #
+
+    def process_keychange(self, inputs):
+        """Called when we change a key up/down or we move on/off a ladder."""
+
+        # Process up/down.
+        if inputs.up and not inputs.down:
+            if self.physics_engine.is_on_ladder():
+                self.player_sprite.change_y = c.PLAYER_WALK_SPEED
+            elif self.physics_engine.can_jump(y_distance=10) and not self.jump_needs_reset:
+                self.player_sprite.change_y = c.PLAYER_JUMP_SPEED
+                self.jump_needs_reset = True
+                self.play_sound('jump', variations=2)
+        elif inputs.down and not inputs.up:
+            if self.physics_engine.is_on_ladder():
+                self.player_sprite.change_y = -c.PLAYER_WALK_SPEED
+
+        # Process up/down when on a ladder and no movement.
+        if self.physics_engine.is_on_ladder():
+            if not inputs.up and not inputs.down:
+                self.player_sprite.change_y = 0
+            elif inputs.up and inputs.down:
+                self.player_sprite.change_y = 0
+
+        # Process left/right and sprinting.
+        if inputs.sprint:
+            if inputs.right and not inputs.left:
+                self.player_sprite.change_x = c.PLAYER_RUN_SPEED
+                self.player_sprite.sprinting = True
+            elif inputs.left and not inputs.right:
+                self.player_sprite.change_x = -c.PLAYER_RUN_SPEED
+                self.player_sprite.sprinting = True
+            else:
+                self.player_sprite.change_x = 0
+                self.player_sprite.sprinting = False
+        else:
+            if inputs.right and not inputs.left:
+                self.player_sprite.change_x = c.PLAYER_WALK_SPEED
+                self.player_sprite.sprinting = False
+            elif inputs.left and not inputs.right:
+                self.player_sprite.change_x = -c.PLAYER_WALK_SPEED
+                self.player_sprite.sprinting = False
+            else:
+                self.player_sprite.change_x = 0
+                self.player_sprite.sprinting = False
+
+    def equip_two_handed(self):
+        """For equipping the two-handed weapon, or putting it away if it's already equipped."""
+
+        # De-equip other weapon. # TODO: Fix this equipping thingy.
+        if self.player_sprite.equipped_one_handed:
+            self.player_sprite.equipped_one_handed = False
+            self.player_sprite.equipped_two_handed = True
+        else:
+            # De-equip weapon and have no weapons in hand if gun is already equipped.
+            self.player_sprite.equipped_two_handed = not self.player_sprite.equipped_two_handed
+
+        self.player_sprite.equipped_any = self.player_sprite.equipped_two_handed
+
+    def equip_one_handed(self):
+        """For equipping the one-handed weapon, or putting it away if it's already equipped."""
+
+        # De-equip other weapon.
+        if self.player_sprite.equipped_two_handed:
+            self.player_sprite.equipped_two_handed = False
+            self.player_sprite.equipped_one_handed = True
+        else:
+            # De-equip weapon and have no weapons in hand if gun is already equipped.
+            self.player_sprite.equipped_one_handed = not self.player_sprite.equipped_one_handed
+
+        self.player_sprite.equipped_any = self.player_sprite.equipped_one_handed
+
+    def fire(self):
+        """Fires the player's gun along its arm, from the pose solved this step."""
+        if not self.player_sprite.equipped_one_handed:
+            return
+
+        self.player_sprite.firing = True
+
+        # Take a bullet from the pool. If every bullet is already flying, this shot doesn't fire one.
+        bullet = self.bullet_pool.acquire()
+        if bullet is None:
+            return
+
+        # The arm has already been aimed at the mouse this step, so the bullet leaves the muzzle
+        # in the direction the gun points. Aiming from the muzzle at the mouse would send the bullet
+        # backwards whenever the mouse is closer to the shoulder than the muzzle is.
+        player = self.player_sprite
+        bullet.position = player.get_muzzle_position()
+
+        # Angle the bullet sprite so it doesn't look like it is flying sideways.
+        cos, sin = player.get_aim_direction()
+        bullet.angle = player.aim_angle
+        bullet.change_x = cos * c.BULLET_SPEED
+        bullet.change_y = sin * c.BULLET_SPEED
+
+        self.play_sound('glock_17_fire')
+
+    # -- STEP -- #
+
+    def step(self, inputs):
+        """Moves the game on by one update of STEP_TIME seconds, with what the player is doing."""
+        self.frame += 1
+        self.sounds.clear()
+        self.changed_barrels.clear()
+        self.level_loaded = False
+        self.view_changed = False
+
+        # Things pressed since the last step.
+        if inputs.equip_two_handed:
+            self.equip_two_handed()
+        if inputs.equip_one_handed:
+            self.equip_one_handed()
+        if not inputs.up:
+            self.jump_needs_reset = False
+        self.process_keychange(inputs)
+
+        if self.player_sprite.center_y < c.WORLD_BOTTOM:
+            self.respawn()
+
+        # Get mouse position.
+        # view_left and view_bottom added so that the position works when the scrolling screen moves.
+        self.player_sprite.acquire_mouse_position(inputs.mouse_x + self.view_left,
+                                                  inputs.mouse_y + self.view_bottom)
+
+        # Move the player with the physics engine.
+        profiler = self.profiler
+        with profiler.phase('physics'):
+            self.physics_engine.update()
+
+        # Update animations.
+        if self.physics_engine.can_jump():
+            self.player_sprite.can_jump = False
+        else:
+            self.player_sprite.can_jump = True
+
+        if self.physics_engine.is_on_ladder() and not self.physics_engine.can_jump():
+            self.player_sprite.is_on_ladder = True
+        else:
+            self.player_sprite.is_on_ladder = False
+        self.process_keychange(inputs)
+
+        # Move body parts to player's position and update checking variables.
+        with profiler.phase('appendages'):
+            self.player_list.update_animation(STEP_TIME)
+
+        # Fire once the arm is aimed, so the shot leaves from where the gun is drawn this step.
+        if inputs.fire:
+            self.fire()
+
+        # Footsteps and anything else that happened in the player's animation.
+        for event in self.player_sprite.animation_events:
+            self.play_sound(event, variations=8)
+        self.player_sprite.animation_events.clear()
+
+        self.coin_list.update_animation(STEP_TIME)
+
+        self.update_coins()
+        with profiler.phase('effects'):
+            self.update_effects()
+        with profiler.phase('bullets'):
+            self.update_bullets()
+        with profiler.phase('enemies'):
+            self.enemies.update(self.player_sprite.center_x, self.player_sprite.center_y)
+
+        # See if we hit the treasure. It's found with the legs, not the whole body.
+        if not self.game_won:
+            legs_hit_box = self.player_sprite.get_legs_hit_box()
+            treasure_hit_list = [treasure for treasure in self.treasure_list
+                                 if arcade.are_polygons_intersecting(legs_hit_box, treasure.get_adjusted_hit_box())]
+            # Loop through each treasure we hit.
+            if treasure_hit_list:
+                # Change the game to 'won'. Accessed by the if statement after the viewport code.
+                self.game_won = True
+                # End the game.
+
+        # Check if the player got to the end of the current map
+        # and made it to the next level. If so, go to the next level.
+        if arcade.check_for_collision_with_list(self.player_sprite,
+                                                self.next_level_list):
+            self.level += 1
+
+            self.load_level()
+
+        with profiler.phase('scrolling'):
+            self.update_viewport()
+
+        # Only the enemies on the screen, now that it has scrolled, need their sprites updating.
+        with profiler.phase('enemy sprites'):
+            self.enemies.sync(self.view_left, self.view_bottom)
+
+        # Do the screen fade here after the viewport code so that it doesn't move around.
+        if self.game_won:
+            # If sufficiently dark, the game is over.
+            self.screen_fade.center_x = self.view_left + c.SCREEN_WIDTH // 2
+            self.screen_fade.center_y = self.view_bottom + c.SCREEN_HEIGHT // 2
+            self.screen_fade.change_fade(target=255, change=c.GAME_WON_FADE_SPEED)
+            if self.screen_fade.alpha >= 250:
+                self.finished = True
+
+    def update_coins(self):
+        # See if we hit any coins.
+        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
+                                                             self.coin_list)
+
+        # Loop through each coin we hit (if any) and remove it.
+        for coin in coin_hit_list:
+
+            # Figure out how many points this coin is worth.
+            if 'Points' not in coin.properties:
+                print('Warning, collected a coin without a Points property.')
+            else:
+                points = int(coin.properties['Points'])
+                self.score += points
+
+            # Remove the coin.
+            coin.remove_from_sprite_lists()
+
+    def update_effects(self):
+        # Hit effects and barrel explosions. Ones far off the screen catch up when it comes near.
+        self.effects_lod.update(self.frame, self.view_left, self.view_bottom)
+
+    def update_effect(self, effect, steps):
+        """Plays a hit effect on by a number of updates, for the effects scheduler.
+            Returns False once it has finished and gone back to its pool."""
+        for _ in range(steps):
+            effect.update()
+            if effect not in effect.pool.in_use:
+                return False
+        return True
+
+    def update_bullets(self):
+        self.bullet_pool.update()
+
+        if not self.bullet_pool.in_use:
+            return
+
+        # Check every bullet against the barrels and walls in one go. Each bullet's whole path since
+        # last frame is checked, so fast ones can't fly through a wall between two frames.
+        bullets = pj.BulletBatch(self.bullet_pool.in_use)
+
+        # Bullets that have flown too far from the player are got rid of without hitting anything.
+        culled = bullets.find_culled(self.player_sprite.center_x, self.player_sprite.center_y)
+
+        # See how far along its path each bullet hit a wall, if it did.
+        wall_bullet_indices, _, wall_fractions = self.wall_grid.check_paths(bullets)
+        wall_hit_fractions = numpy.full(len(bullets), numpy.inf)
+        wall_hit_fractions[wall_bullet_indices] = wall_fractions
+
+        # See if we hit any barrels, before hitting a wall.
+        bullet_indices, barrel_indices, barrel_fractions = self.barrel_grid.check_paths(bullets)
+        in_front = (barrel_fractions <= wall_hit_fractions[bullet_indices]) & ~culled[bullet_indices]
+        bullet_indices, barrel_indices = bullet_indices[in_front], barrel_indices[in_front]
+        for barrel_index in barrel_indices:
+            barrel = self.barrel_grid.sprites[barrel_index]
+
+            # Two bullets can hit the same barrel in one frame, it only explodes once.
+            if not barrel.sprite_lists:
+                continue
+
+            # Make an explosion, if there is one free.
+            explosion = self.barrel_explosion_pool.acquire()
+            if explosion is not None:
+                explosion.reset()
+
+                # Move it to the location of the barrel
+                explosion.center_x = barrel.center_x
+                explosion.center_y = barrel.center_y
+
+                # Call update() because it sets which image we start on
+                explosion.update()
+                self.effects_lod.add(explosion, self.frame)
+
+            self.play_sound('explosion')
+
+            # Remove the barrel.
+            barrel.remove_from_sprite_lists()
+            self.barrel_grid.remove(barrel)
+            self.changed_barrels.append(barrel)
+
+        # Bullets that hit a barrel.
+        hit_barrel = numpy.zeros(len(bullets), dtype=bool)
+        hit_barrel[bullet_indices] = True
+
+        # Bullets that hit a wall, and didn't hit a barrel first.
+        hit_wall = numpy.isfinite(wall_hit_fractions) & ~hit_barrel & ~culled
+        for bullet_index in numpy.flatnonzero(hit_wall):
+            # Make an explosion, if there is one free.
+            explosion = self.explosion_pool.acquire()
+            if explosion is None:
+                continue
+            explosion.reset()
+
+            # Move it to where the bullet hit the wall.
+            fraction = wall_hit_fractions[bullet_index] - 1
+            explosion.center_x = bullets.x[bullet_index] + bullets.change_x[bullet_index] * fraction
+            explosion.center_y = bullets.y[bullet_index] + bullets.change_y[bullet_index] * fraction
+
+            # Call update() because it sets which image we start on.
+            explosion.update()
+            self.effects_lod.add(explosion, self.frame)
+
+        # Get rid of the bullets that hit something, or were culled.
+        finished = culled | hit_barrel | hit_wall
+        for bullet_index in numpy.flatnonzero(finished):
+            self.bullet_pool.release(bullets.bullets[bullet_index])
+
+    def update_viewport(self):
+        # --- Manage Scrolling --- #
+
+        # Scroll left.
+        left_boundary = self.view_left + c.LEFT_VIEWPORT_MARGIN
+        if self.player_sprite.left < left_boundary:
+            self.view_left -= left_boundary - self.player_sprite.left
+            self.view_changed = True
+
+        # Scroll right.
+        right_boundary = self.view_left + c.SCREEN_WIDTH - c.RIGHT_VIEWPORT_MARGIN
+        if self.player_sprite.right > right_boundary:
+            self.view_left += self.player_sprite.right - right_boundary
+            self.view_changed = True
+
+        # Scroll up.
+        top_boundary = self.view_bottom + c.SCREEN_HEIGHT - c.TOP_VIEWPORT_MARGIN
+        if self.player_sprite.top > top_boundary:
+            self.view_bottom += self.player_sprite.top - top_boundary
+            self.view_changed = True
+
+        # Scroll down.
+        bottom_boundary = self.view_bottom + c.BOTTOM_VIEWPORT_MARGIN
+        if self.player_sprite.bottom < bottom_boundary:
+            self.view_bottom -= bottom_boundary - self.player_sprite.bottom
+            self.view_changed = True
+
+        if self.view_changed:
+            # Only scroll to integers. Otherwise we end up with pixels that
+            # don't line up on the screen.
+            self.view_bottom = int(self.view_bottom)
+            self.view_left = int(self.view_left)
+
+            # These two make sure the viewport doesn't go off the map.
+            if self.view_left <= 0:
+                self.view_left = 0
+            if self.view_left + c.SCREEN_WIDTH >= self.end_of_map:
+                self.view_left = self.end_of_map - c.SCREEN_WIDTH
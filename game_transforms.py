@@ -0,0 +1,127 @@
+"""
+Transform hierarchies, for things attached to other things, e.g. the parts of a character attached
+to its body, and the muzzle of a gun attached to the arm holding it.
+
+Each Transform has a position and angle relative to its parent. Its position and angle in the world
+are only worked out again when it, or something it's attached to, has changed since they were last
+worked out, so a hierarchy where nothing has moved costs next to nothing.
+
+Example usage.
+    body = tf.Transform()
+    arm = tf.Transform(body)
+    muzzle = tf.Transform(arm, x=36 * c.PIXEL_SCALING)
+
+    body.set_local(player_x, player_y)
+    arm.set_local(arm_x, arm_y, aim_angle)
+    muzzle.update()
+    bullet.position = (muzzle.world_x, muzzle.world_y)
+
+Import this as 'tf' for consistency.
+"""
+
+import math
+import game_constants as c
+
+# The cosine and sine of every whole step of c.AIM_ANGLE_STEP degrees around the circle, from 0,
+# if angles are stepped. Only these angles come up then, so turning by them is a lookup.
+if c.AIM_ANGLE_STEP:
+    directions = [(math.cos(math.radians(step * c.AIM_ANGLE_STEP)), math.sin(math.radians(step * c.AIM_ANGLE_STEP)))
+                  for step in range(round(360 / c.AIM_ANGLE_STEP))]
+else:
+    directions = []
+
+
+def step_angle(angle):
+    """Rounds an angle, in degrees, to the nearest whole step of c.AIM_ANGLE_STEP, if angles are stepped."""
+    if c.AIM_ANGLE_STEP:
+        return round(angle / c.AIM_ANGLE_STEP) * c.AIM_ANGLE_STEP
+    return angle
+
+
+def get_direction(angle):
+    """Returns the cosine and sine of an angle, in degrees. Looked up if it's a whole step."""
+    if directions:
+        steps = angle / c.AIM_ANGLE_STEP
+        if steps == int(steps):
+            return directions[int(steps) % len(directions)]
+    radians = math.radians(angle)
+    return math.cos(radians), math.sin(radians)
+
+
+class Transform:
+    """A position, in pixels, and angle, in degrees, relative to a parent transform, or to the
+        world if there isn't one. Children are turned along with their parent, and moved with it.
+
+        world_x, world_y and world_angle are only up to date after update()."""
+
+    __slots__ = ('parent', 'children', 'local_x', 'local_y', 'local_angle',
+                 'world_x', 'world_y', 'world_angle', 'dirty')
+
+    def __init__(self, parent=None, x=0.0, y=0.0, angle=0.0):
+        self.parent = parent
+        self.children = []
+        if parent is not None:
+            parent.children.append(self)
+
+        self.local_x = x
+        self.local_y = y
+        self.local_angle = angle
+
+        self.world_x = 0.0
+        self.world_y = 0.0
+        self.world_angle = 0.0
+
+        # Whether this or a parent has changed since the world position and angle were worked out.
+        # If a transform is dirty, so is everything attached to it.
+        self.dirty = True
+
+    def set_local(self, x, y, angle=0.0):
+        """Moves the transform relative to its parent. Only marks it as changed if it has."""
+        if x != self.local_x or y != self.local_y or angle != self.local_angle:
+            self.local_x = x
+            self.local_y = y
+            self.local_angle = angle
+            self.mark_dirty()
+
+    def mark_dirty(self):
+        """Marks this and everything attached to it as changed."""
+        if self.dirty:
+            return
+        self.dirty = True
+        for child in self.children:
+            if not child.dirty:
+                child.mark_dirty()
+
+    def update(self):
+        """Works out the world position and angle, if anything has changed.
+            Returns whether it had, so whatever follows the transform can be moved."""
+        if not self.dirty:
+            return False
+
+        parent = self.parent
+        if parent is None:
+            self.world_x = self.local_x
+            self.world_y = self.local_y
+            self.world_angle = self.local_angle
+        else:
+            if parent.dirty:
+                parent.update()
+            if parent.world_angle:
+                cos, sin = get_direction(parent.world_angle)
+                self.world_x = parent.world_x + self.local_x * cos - self.local_y * sin
+                self.world_y = parent.world_y + self.local_x * sin + self.local_y * cos
+            else:
+                self.world_x = parent.world_x + self.local_x
+                self.world_y = parent.world_y + self.local_y
+            self.world_angle = parent.world_angle + self.local_angle
+
+        self.dirty = False
+        return True
+
+    def to_world(self, x, y):
+        """Returns where a position relative to this transform is in the world."""
+        self.update()
+        if self.world_angle:
+            cos, sin = get_direction(self.world_angle)
+            return self.world_x + x * cos - y * sin, self.world_y + x * sin + y * cos
+        return self.world_x + x, self.world_y + y
@@ -7,24 +7,29 @@ import arcade.gui
 from arcade.gui import UIManager
 import os
 import random
+import sys
 from pyglet.gl import GL_NEAREST
-import math
-import timeit
+import time
 import game_constants as c
-import game_player as p
 import game_functions as f
 import game_audio as a
 import game_backgrounds as b
-import game_entities as e
+import game_draw_layers as dl
 import game_gui as g
-import game_items as itm
+import game_levels as lv
+import game_loader as ld
+import game_profiler as pf
+import game_render_cache as rc
+import game_replay as rp
+import game_simulation as sim
 
 
 class GameView(arcade.View):
-    """Main application class."""
+    """Main application class. Draws the simulation, plays its sounds and turns the
+        keyboard and mouse into its inputs. The game itself happens in sim.Simulation."""
 
-    def __init__(self):
-        """Initialiser for the game."""
+    def __init__(self, replay=None):
+        """Initialiser for the game. Given a replay, plays that back instead of listening to the player."""
 
         # Call the parent class and set up the window.
         super().__init__()
@@ -33,49 +38,43 @@ class GameView(arcade.View):
         file_path = os.path.dirname(os.path.abspath(__file__))
         os.chdir(file_path)
 
-        # Checks if the treasure has been found and the game won.
-        self.game_won = False
-
         # Keep track of the level. Starts at the first one.
         self.level = 1
 
+        # The game being played.
+        self.simulation = None
+
+        # A recording being played back, and one being made, see rp.
+        self.replay = replay
+        self.recorder = None
+        if replay is not None:
+            self.level = replay.level
+
+        # What the player is doing with the keyboard and mouse, handed to the simulation every update.
+        self.inputs = sim.Inputs()
+
+        # Plays the simulation's sounds, only so many at once.
+        self.mixer = a.Mixer()
+
+        # Time that has passed and not been simulated yet, less than one update's worth.
+        self.update_lag = 0
+
+        # Where everything that moves was before the last update, for blending between updates when drawing.
+        self.previous_player = None
+        self.previous_view = (0, 0)
+        self.previous_positions = []
+
         # Manages the GUI.
         self.ui_manager = UIManager()
 
         # For if we are in fullscreen mode.
         self.is_fullscreen = False
 
-        # Track the current state of what key is pressed.
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
-        self.jump_needs_reset = False
-        self.shift_pressed = False
-
-        # These are 'lists' that keep track of our sprites. Each sprite should
-        # go into a list.
-        self.coin_list = None
+        # Sprite lists that are only drawn, and aren't part of the simulation.
         self.backgrounds_list = None
-        self.foreground_decorations_list = None
-        self.explosions_list = None
-        self.barrel_list = None
-        self.background_decorations_list = None
-        self.next_level_list = None
-        self.background_walls_list = None
-        self.treasure_list = None
-        self.grass_list = None
-        self.wall_list = None
-        self.ladder_list = None
-        self.player_list = None
-        self.bullet_list = None
-        self.items_list = None
         self.fade_list = None
         self.user_interface_list = None
 
-        # Player sprite variables. Body, legs etc.
-        self.player_sprite = None
-
         # Our background sprites.
 
         # Medium-ish away backgrounds
@@ -84,153 +83,77 @@ class GameView(arcade.View):
         self.close_background_0 = None
         self.close_background_1 = None
 
-        # The hit effects textures.
-        self.explosion_texture_list = []
-
-        # The frames for the barrel itself exploding, not the actual fiery explosion animation.
-        self.barrel_texture_list = []
-
-        # Our 'physics' engine.
-        self.physics_engine = None
-
-        # Used to keep track of our scrolling.
-        self.view_bottom = 0
-        self.view_left = 0
-
-        self.end_of_map = 0
+        # Reticle used instead of the mouse cursor.
+        self.reticle = None
 
-        # Keep track of the score.
-        self.score = 0
+        # -- Variables for our statistics -- #
 
-        # Mouse position.
-        self.mouse_position_x = 0
-        self.mouse_position_y = 0
+        # Times each phase of the frame, for the simulation too.
+        self.profiler = pf.Profiler()
 
-        # Set mouse to invisible.
-        self.window.set_mouse_visible(False)
+        # Frames per second, as shown on screen.
+        self.fps_text = None
 
-        # Reticle used instead of the mouse cursor.
-        self.reticle = None
+        # Whether the table of phase times is shown, toggled with F3.
+        self.show_profiler = False
 
-        # -- Variables for our statistics -- #
+        # The table's columns of text, only worked out every so often so the numbers can be read.
+        self.profiler_columns = None
 
-        # Time for on_update.
-        self.processing_time = 0
+        # The level's tile layers that don't move, cached as images in groups that are drawn one after
+        # another. The barrels are cached too, and drawn again where one is blown up or put back.
+        self.background_tiles_cache = None
+        self.barrels_cache = None
+        self.foreground_tiles_cache = None
+        self.layer_caches = ()
 
-        # Time for on_draw.
-        self.draw_time = 0
+        # Everything drawn, back to front, with the name its draw call is timed under.
+        self.draw_layers = dl.DrawLayers(self.profiler)
+        self.draw_stats_text = None
+        self.pool_stats_text = None
 
-        # Variables used to calculate frames per second.
-        self.frame_count = 0
-        self.fps_start_timer = None
-        self.fps = None
         # Set background colour.
         arcade.set_background_color(arcade.color.CORNFLOWER_BLUE)
 
-        # Load all of the audio into a dictionary.
+        # Load all of the audio into a dictionary. Anything the background loader
+        # has already loaded is skipped.
         a.add_audio_to_list()
         a.load_audio()
 
-        # Load all of the positions for the head from the different animation frames.
-        f.add_frames_to_list()
-        f.load_frames_and_positions()
-
-        # Do the same for the arms.
-        f.arms_add_frames_to_list()
-        f.arms_load_frames_and_positions()
-
     def setup(self):
         """Set up the game here. Call this function to restart the game."""
 
         self.ui_manager.purge_ui_elements()
 
-        # Used to keep track of our scrolling.
-        self.view_bottom = 0
-        self.view_left = 0
-
-        # Keep track of the score.
-        self.score = 0
-
-        # Create the Sprite lists.
-        self.player_list = arcade.SpriteList()
-        self.backgrounds_list = arcade.SpriteList()
-        self.background_decorations_list = arcade.SpriteList()
-        self.explosions_list = arcade.SpriteList()
-        self.foreground_decorations_list = arcade.SpriteList()
-        self.next_level_list = arcade.SpriteList()
-        self.treasure_list = arcade.SpriteList()
-        self.grass_list = arcade.SpriteList()
-        self.wall_list = arcade.SpriteList()
-        self.coin_list = arcade.SpriteList()
-        self.items_list = arcade.SpriteList()
-        self.bullet_list = arcade.SpriteList()
-        self.fade_list = arcade.SpriteList()
         self.user_interface_list = arcade.SpriteList()
 
-        # Set up the player, specifically placing it at these coordinates.
-        self.player_sprite = p.PlayerCharacter()
-        self.player_sprite.center_x = c.PLAYER_START_X
-        self.player_sprite.center_y = c.PLAYER_START_Y
-
-        self.player_list.append(self.player_sprite.legs)
-        self.player_list.append(self.player_sprite.back_arm)
-        self.player_list.append(self.player_sprite)
-        self.player_list.append(self.player_sprite.head)
-        self.player_list.append(self.player_sprite.front_arm)
-
         # Reticle used instead of the mouse cursor.
         self.reticle = g.Reticle()
-        self.reticle.follow_x = self.mouse_position_x
-        self.reticle.follow_y = self.mouse_position_y
+        self.reticle.follow_x = self.inputs.mouse_x
+        self.reticle.follow_y = self.inputs.mouse_y
         self.user_interface_list.append(self.reticle)
 
-        # --- Load in a map from the tiled editor --- #
-
-        # Name of the layer in the file that has our platforms/walls.
-        walls_layer_name = 'Walls'
-        moving_platforms_layer_name = 'Moving Platforms'
-
-        # Layer for the grass that goes on top of the grass blocks.
-        grass_layer_name = 'Grass'
-
-        # Name of the layer that has items for pick-up.
-        coins_layer_name = 'Coins'
-
-        # Names of the decorations layers, these only show sprites.
-        foreground_decorations_layer_name = 'Foreground Decorations'
-        background_decorations_layer_name = 'Background Decorations'
-
-        # Darkened background walls.
-        background_walls_layer_name = 'Background Walls'
-
-        # Explosive barrels that explode when shot.
-        barrels_layer_name = 'Barrels'
-
-        # The treasure at the end of the game.
-        treasure_layer_name = 'Treasure'
-
-        # Dark object that transports the player to the next level.
-        next_level_layer_name = 'Next Level'
-
-        # Map name.
-        map_name = f'resources/maps/{self.level}.tmx'
-
-        # Read in the tiled map.
-        my_map = arcade.tilemap.read_tmx(map_name)
-
-        # TODO: GUN
-        # self.gun = itm.Weapon()
-        # self.gun.equip(follow_x=self.player_sprite.center_x, follow_y=self.player_sprite.center_y)
-        # self.items_list.append(self.gun)
+        # Everything random in the game comes from this seed, so a recording of it plays back the same.
+        if self.replay is not None:
+            self.replay.rewind()
+            seed = self.replay.seed
+        else:
+            seed = random.randrange(2 ** 32)
+        self.simulation = sim.Simulation(level=self.level, seed=seed, profiler=self.profiler)
+        if self.replay is None and rp.record_path is not None:
+            self.recorder = rp.Recorder(rp.record_path, self.level, seed)
+        self.setup_level_view()
 
-        # Calculate the right edge of the my_map in pixels.
-        self.end_of_map = my_map.map_size.width * (c.GRID_PIXEL_SIZE * c.PIXEL_SCALING)
+    def setup_level_view(self):
+        """Gets everything that's drawn ready for the level the simulation has just loaded."""
+        simulation = self.simulation
 
-        # Add and reset fading layer.
-        f.screen_fade.alpha = 0
-        self.fade_list.append(f.screen_fade)
+        # Add the fading layer.
+        self.fade_list = arcade.SpriteList()
+        self.fade_list.append(simulation.screen_fade)
 
         # Parallax environment backgrounds.
+        self.backgrounds_list = arcade.SpriteList()
         self.medium_background_0 = b.Background(parallax_multiplier_x=0.9,
                                                 parallax_multiplier_y=0.9,
                                                 texture_type=1)
@@ -245,294 +168,272 @@ class GameView(arcade.View):
                                                parallax_multiplier_y=0.7,
                                                texture_type=2)
 
-        self.medium_background_0.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
-        self.medium_background_0.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (20 * c.PIXEL_SCALING)
+        view_left = simulation.view_left
+        view_bottom = simulation.view_bottom
+        self.medium_background_0.follow_x = view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
+        self.medium_background_0.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (20 * c.PIXEL_SCALING)
 
-        self.medium_background_1.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
-        self.medium_background_1.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (20 * c.PIXEL_SCALING)
+        self.medium_background_1.follow_x = view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
+        self.medium_background_1.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (20 * c.PIXEL_SCALING)
 
-        self.close_background_0.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
-        self.close_background_0.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (200 * c.PIXEL_SCALING)
+        self.close_background_0.follow_x = view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
+        self.close_background_0.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (200 * c.PIXEL_SCALING)
 
-        self.close_background_1.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
-        self.close_background_1.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (200 * c.PIXEL_SCALING)
+        self.close_background_1.follow_x = view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
+        self.close_background_1.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (200 * c.PIXEL_SCALING)
 
         self.backgrounds_list.append(self.medium_background_0)
         self.backgrounds_list.append(self.medium_background_1)
         self.backgrounds_list.append(self.close_background_0)
         self.backgrounds_list.append(self.close_background_1)
 
-        # Platforms.
-        self.wall_list = arcade.tilemap.process_layer(my_map,
-                                                      walls_layer_name,
-                                                      c.PIXEL_SCALING,
-                                                      use_spatial_hash=True)
-        # Foreground decorations.
-        self.foreground_decorations_list = arcade.tilemap.process_layer(my_map, foreground_decorations_layer_name,
-                                                                        c.PIXEL_SCALING,
-                                                                        use_spatial_hash=True)
-
-        # Explosive barrels.
-        self.barrel_list = arcade.tilemap.process_layer(my_map, barrels_layer_name,
-                                                        c.PIXEL_SCALING,
-                                                        use_spatial_hash=True)
-        # Background decorations.
-        self.background_decorations_list = arcade.tilemap.process_layer(my_map, background_decorations_layer_name,
-                                                                        c.PIXEL_SCALING,
-                                                                        use_spatial_hash=True)
-        # Background walls.
-        self.background_walls_list = arcade.tilemap.process_layer(my_map, background_walls_layer_name,
-                                                                  c.PIXEL_SCALING,
-                                                                  use_spatial_hash=True)
-        # Grass.
-        self.grass_list = arcade.tilemap.process_layer(my_map, grass_layer_name,
-                                                       c.PIXEL_SCALING,
-                                                       use_spatial_hash=True)
-
-        # Next level.
-        self.next_level_list = arcade.tilemap.process_layer(my_map, next_level_layer_name,
-                                                            c.PIXEL_SCALING,
-                                                            use_spatial_hash=True)
-
-        # Tint all the sprites in this background walls list to a darker colour to differentiate it
-        # from the other layers.
-        for wall in self.background_walls_list:
-            wall.color = [130, 130, 140]
-        '''
-        # Moving Platforms.
-        moving_platforms_list = arcade.tilemap.process_layer(my_map, moving_platforms_layer_name, PIXEL_SCALING)
-        for sprite in moving_platforms_list:
-            self.wall_list.append(sprite)
-
-        # Ladders.
-        self.ladder_list = arcade.tilemap.process_layer(my_map, 'Ladders',
-                                                        PIXEL_SCALING,
-                                                        use_spatial_hash=True)
-        '''
-        # Treasure (end goal).
-        self.treasure_list = arcade.tilemap.process_layer(my_map, treasure_layer_name,
-                                                          c.PIXEL_SCALING,
-                                                          use_spatial_hash=True)
-
-        # Pre-load the animation frames for hit effects. We don't do this in the __init__
-        # of the explosion sprite because it
-        # takes too long and would cause the game to pause.
-        self.explosion_texture_list = []
-        self.barrel_explosion_texture_list = []
-
-        # Load the dirt hit effect.
-        for i in range(8):
-            texture = arcade.load_texture(f'resources/images/effects/dirt_{i}.png')
-            self.explosion_texture_list.append(texture)
-
-        # The frames for the barrel itself exploding, not the actual fiery explosion animation.
-        for i in range(5):
-            texture = arcade.load_texture(f'resources/images/effects/barrel_{i}.png')
-            self.barrel_texture_list.append(texture)
-
-        # Load the barrel explosion effect.
-        for i in range(20):
-            texture = arcade.load_texture(f'resources/images/effects/barrel_explosion/{i}.png')
-            self.barrel_explosion_texture_list.append(texture)
-
-        # Other stuff.
+        # Pack all the character and effect frames into the atlases up front, so that
+        # switching animation frames never makes a sprite list rebuild its atlas.
+        f.preload_atlas(simulation.explosions_list, 'effects')
+        f.preload_atlas(simulation.items_list, 'items')
+
+        # Tile layers that don't change are split into chunks, so drawing them into the cached images
+        # only draws the chunks under each image. Their buffers are all made now, while the level
+        # loads, so scrolling to new chunks doesn't stutter.
+        background_layers = [lv.ChunkedLayer(simulation.background_walls_list),
+                             lv.ChunkedLayer(simulation.background_decorations_list)]
+        foreground_layers = [lv.ChunkedLayer(simulation.wall_list),
+                             lv.ChunkedLayer(simulation.grass_list),
+                             lv.ChunkedLayer(simulation.foreground_decorations_list)]
+        for layer in background_layers + foreground_layers:
+            layer.prepare(filter=GL_NEAREST)
+
+        # Barrels are put back into the barrel list when the player respawns, so that list is cached as it is.
+        # Images are drawn as they come near the screen, and after that only where barrels are blown up or put back.
+        self.background_tiles_cache = rc.LayerCache(background_layers)
+        self.barrels_cache = rc.LayerCache([simulation.barrel_list])
+        self.foreground_tiles_cache = rc.LayerCache(foreground_layers)
+        self.layer_caches = (self.background_tiles_cache, self.barrels_cache, self.foreground_tiles_cache)
+
+        # The enemies and the player are drawn together, as their frames are all in the characters atlas.
+        # Pools of bullets and effects are always full of hidden sprites, so they're skipped when none are in use.
+        self.draw_layers = dl.DrawLayers(self.profiler)
+        self.draw_layers.add('backgrounds', self.backgrounds_list)
+        self.draw_layers.add('background tiles', self.background_tiles_cache)
+        self.draw_layers.add('treasure', simulation.treasure_list)
+        self.draw_layers.add('items', simulation.items_list)
+        characters = self.draw_layers.add_batch('characters', [simulation.enemy_list, simulation.player_list])
+        f.preload_atlas(characters.sprite_list, 'characters')
+        self.draw_layers.add('next level', simulation.next_level_list)
+        self.draw_layers.add('bullets', simulation.bullet_list, is_empty=lambda: not simulation.bullet_pool.in_use)
+        self.draw_layers.add('barrels', self.barrels_cache)
+        self.draw_layers.add('explosions', simulation.explosions_list,
+                             is_empty=lambda: not (simulation.explosion_pool.in_use
+                                                   or simulation.barrel_explosion_pool.in_use))
+        self.draw_layers.add('foreground tiles', self.foreground_tiles_cache)
+        self.draw_layers.add('user interface', self.user_interface_list)
+        self.draw_layers.add('fade', self.fade_list, is_empty=lambda: simulation.screen_fade.alpha == 0)
+
         # Set the background color
-        if my_map.background_color:
-            arcade.set_background_color(my_map.background_color)
+        if simulation.background_color:
+            arcade.set_background_color(simulation.background_color)
 
-        # Create the 'physics engine'.
-        self.physics_engine = arcade.PhysicsEnginePlatformer(self.player_sprite,
-                                                             self.wall_list,
-                                                             gravity_constant=c.GRAVITY,
-                                                             ladders=self.ladder_list)
+        # Nothing has moved yet, so there's nothing to blend from.
+        self.save_previous_positions()
 
-    def on_draw(self):
-        """Render the screen."""
+    def follow_view(self, view_left, view_bottom):
+        """Scrolls the screen, and moves the backgrounds and reticle along with it."""
+        arcade.set_viewport(view_left, c.SCREEN_WIDTH + view_left,
+                            view_bottom, c.SCREEN_HEIGHT + view_bottom)
+
+        # Update the environment backgrounds.
+        self.medium_background_0.follow_x = view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
+        self.medium_background_0.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (50 * c.PIXEL_SCALING)
+
+        self.medium_background_1.follow_x = view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
+        self.medium_background_1.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (50 * c.PIXEL_SCALING)
 
-        # Start timing how long this takes
-        start_time = timeit.default_timer()
+        self.close_background_0.follow_x = view_left + (
+                    c.SCREEN_WIDTH // 2)  # - c.SCREEN_WIDTH // 2 # TODO: this thing with the backgrounds and positioning thing [[CHANGE THE ACTUAL FOLLOW_X]]
+        self.close_background_0.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (220 * c.PIXEL_SCALING)
+
+        self.close_background_1.follow_x = view_left + (c.SCREEN_WIDTH // 2) + self.close_background_1.width
+        self.close_background_1.follow_y = view_bottom + (c.SCREEN_HEIGHT // 2) + (220 * c.PIXEL_SCALING)
 
-        # --- Calculate FPS
+        self.backgrounds_list.update()
 
-        fps_calculation_freq = 60
-        # Once every 60 frames, calculate our FPS.
-        if self.frame_count % fps_calculation_freq == 0:
-            # Do we have a start time?
-            if self.fps_start_timer is not None:
-                # Calculate FPS.
-                total_time = timeit.default_timer() - self.fps_start_timer
-                self.fps = fps_calculation_freq / total_time
-            # Reset the timer.
-            self.fps_start_timer = timeit.default_timer()
-        # Add one to our frame count.
-        self.frame_count += 1
+        if self.close_background_1.right < view_left + c.SCREEN_WIDTH:
+            self.close_background_0.center_x += self.close_background_0.width * c.PIXEL_SCALING
+            #print(self.close_background_1.right, (view_left + c.SCREEN_WIDTH))
+
+        # Position the reticle.
+        self.reticle.visible = True
+        self.reticle.follow_x = self.inputs.mouse_x + view_left
+        self.reticle.follow_y = self.inputs.mouse_y + view_bottom
+        self.user_interface_list.update()
+
+    def save_previous_positions(self):
+        """Remembers where everything that moves is before a step of the simulation,
+            so drawing can blend from there to where the step leaves it."""
+        simulation = self.simulation
+        self.previous_player = simulation.player_sprite
+        self.previous_view = (simulation.view_left, simulation.view_bottom)
+        self.previous_positions = [(sprite, sprite.position) for sprite in simulation.player_list]
+        self.previous_positions.extend((bullet, bullet.position) for bullet in simulation.bullet_pool.in_use)
+        self.previous_positions.extend((sprite, sprite.position) for sprite in simulation.enemy_list)
+
+    def interpolate_positions(self, blend):
+        """Moves everything that moved in the last step back towards where it was before it,
+            blend being how far from there to go, from 0 to 1. Returns where the moved sprites
+            really are, for putting them back after drawing, and the blended view position."""
+        simulation = self.simulation
+        if simulation.player_sprite is not self.previous_player:
+            # The player respawned or a new level loaded, so there's nothing to blend from.
+            return [], (simulation.view_left, simulation.view_bottom)
+
+        current_positions = []
+        for sprite, (previous_x, previous_y) in self.previous_positions:
+            x, y = sprite.position
+            if x != previous_x or y != previous_y:
+                current_positions.append((sprite, (x, y)))
+                sprite.position = (previous_x + (x - previous_x) * blend,
+                                   previous_y + (y - previous_y) * blend)
+
+        # Only scroll to integers. Otherwise we end up with pixels that don't line up on the screen.
+        previous_left, previous_bottom = self.previous_view
+        view_left = round(previous_left + (simulation.view_left - previous_left) * blend)
+        view_bottom = round(previous_bottom + (simulation.view_bottom - previous_bottom) * blend)
+        return current_positions, (view_left, view_bottom)
+
+    def on_draw(self):
+        """Render the screen."""
+        with self.profiler.phase('draw'):
+            self.draw_game()
+        self.profiler.end_frame()
+
+    def draw_game(self):
+        """Draws the simulation, and the FPS and phase times over it."""
+        profiler = self.profiler
+
+        # Updates happen at a fixed rate, and usually not in step with drawing. Draw everything
+        # that moves part of the way between the last two updates, by how far it is to the next.
+        with profiler.phase('interpolation'):
+            current_positions, (view_left, view_bottom) = self.interpolate_positions(self.update_lag / sim.STEP_TIME)
+        with profiler.phase('background update'):
+            self.follow_view(view_left, view_bottom)
+
+        # Draw any cached images of the level that are needed, before anything is drawn on the screen.
+        with profiler.phase('cached images'):
+            for cache in self.layer_caches:
+                cache.update()
 
         # Clear the screen to the background colour.
         arcade.start_render()
 
         # Draw our sprites.
-        self.backgrounds_list.draw(filter=GL_NEAREST)
-        self.background_walls_list.draw(filter=GL_NEAREST)
-        self.background_decorations_list.draw(filter=GL_NEAREST)
-        self.treasure_list.draw(filter=GL_NEAREST)
-        self.items_list.draw(filter=GL_NEAREST)
-        self.player_list.draw(filter=GL_NEAREST)
-        self.next_level_list.draw(filter=GL_NEAREST)
-        self.bullet_list.draw(filter=GL_NEAREST)
-        self.barrel_list.draw(filter=GL_NEAREST)
-        self.explosions_list.draw(filter=GL_NEAREST)
-        self.wall_list.draw(filter=GL_NEAREST)
-        self.grass_list.draw(filter=GL_NEAREST)
-        '''
-        self.ladder_list.draw(filter=GL_NEAREST)
-        self.coin_list.draw(filter=GL_NEAREST)
-        '''
-        self.foreground_decorations_list.draw(filter=GL_NEAREST)
-        self.user_interface_list.draw(filter=GL_NEAREST)
+        self.draw_layers.draw(filter=GL_NEAREST)
 
-        self.fade_list.draw(filter=GL_NEAREST)
+        # Put everything back where the simulation has it.
+        with profiler.phase('interpolation'):
+            for sprite, position in current_positions:
+                sprite.position = position
 
         # Draw our score on the screen, scrolling it with the viewport.
-        # score_text = f'Score: {self.score}'
-        # arcade.draw_text(score_text, 10 + self.view_left, 10 + self.view_bottom,
+        # score_text = f'Score: {simulation.score}'
+        # arcade.draw_text(score_text, 10 + view_left, 10 + view_bottom,
         #                 arcade.csscolor.WHITE, 32, font_name='resources/Unexplored.ttf')
 
         # Draw hit boxes.
-        # for wall in self.wall_list:
+        # for wall in simulation.wall_list:
         # wall.draw_hit_box(arcade.color.BLACK, 3)
 
         # self.player_sprite.draw_hit_box(arcade.color.RED, 2)
 
-        # Display timings.
-        '''
-        output = f"Processing time: {self.processing_time:.3f}"
-        arcade.draw_text(output,  + self.view_left, c.SCREEN_HEIGHT - 25 + self.view_bottom,
-                         arcade.color.WHITE, 18, font_name='resources/Unexplored.ttf')
-
-        output = f"Drawing time: {self.draw_time:.3f}"
-        arcade.draw_text(output, 20 + self.view_left, c.SCREEN_HEIGHT - 50 + self.view_bottom,
-                         arcade.color.WHITE, 18, font_name='resources/Unexplored.ttf')
-        '''
-        if self.fps is not None:
-            output = f'{self.fps:.0f} FPS'
-            arcade.draw_text(output, 20 + self.view_left, c.SCREEN_HEIGHT - 40 + self.view_bottom,
+        # Display timings. The FPS is only worked out once a second, as every different
+        # piece of text drawn has to be made into a new texture.
+        if profiler.frame_count % 60 == 0 and profiler.fps is not None:
+            self.fps_text = f'{profiler.fps:.0f} FPS'
+        if self.fps_text:
+            arcade.draw_text(self.fps_text, 20 + view_left, c.SCREEN_HEIGHT - 40 + view_bottom,
                              arcade.color.WHITE, 18, font_name='resources/Unexplored.ttf')
-
-        # Stop the draw timer, and calculate total on_draw time.
-        self.draw_time = timeit.default_timer() - start_time
-
-    def process_keychange(self):
-        """Called when we change a key up/down or we move on/off a ladder."""
-
-        # Process up/down.
-        if self.up_pressed and not self.down_pressed:
-            if self.physics_engine.is_on_ladder():
-                self.player_sprite.change_y = c.PLAYER_WALK_SPEED
-            elif self.physics_engine.can_jump(y_distance=10) and not self.jump_needs_reset:
-                self.player_sprite.change_y = c.PLAYER_JUMP_SPEED
-                self.jump_needs_reset = True
-                arcade.play_sound(a.sound[f'jump_{random.randint(1, 2)}'])
-        elif self.down_pressed and not self.up_pressed:
-            if self.physics_engine.is_on_ladder():
-                self.player_sprite.change_y = -c.PLAYER_WALK_SPEED
-
-        # Process up/down when on a ladder and no movement.
-        if self.physics_engine.is_on_ladder():
-            if not self.up_pressed and not self.down_pressed:
-                self.player_sprite.change_y = 0
-            elif self.up_pressed and self.down_pressed:
-                self.player_sprite.change_y = 0
-
-        # Process left/right and sprinting.
-        if self.shift_pressed:
-            if self.right_pressed and not self.left_pressed:
-                self.player_sprite.change_x = c.PLAYER_RUN_SPEED
-                self.player_sprite.sprinting = True
-            elif self.left_pressed and not self.right_pressed:
-                self.player_sprite.change_x = -c.PLAYER_RUN_SPEED
-                self.player_sprite.sprinting = True
-            else:
-                self.player_sprite.change_x = 0
-                self.player_sprite.sprinting = False
-        else:
-            if self.right_pressed and not self.left_pressed:
-                self.player_sprite.change_x = c.PLAYER_WALK_SPEED
-                self.player_sprite.sprinting = False
-            elif self.left_pressed and not self.right_pressed:
-                self.player_sprite.change_x = -c.PLAYER_WALK_SPEED
-                self.player_sprite.sprinting = False
-            else:
-                self.player_sprite.change_x = 0
-                self.player_sprite.sprinting = False
+        if self.show_profiler:
+            self.draw_profiler(view_left, view_bottom)
+
+    def draw_profiler(self, view_left, view_bottom):
+        """Draws a table of how long each phase of the frame takes, in milliseconds."""
+
+        # Only work the numbers out twice a second, so they can be read,
+        # and so the text isn't made into new textures every frame.
+        if self.profiler_columns is None or self.profiler.frame_count % 30 == 0:
+            table = self.profiler.get_table()
+            self.profiler_columns = ['\n'.join(['phase'] + [name for name, _ in table])]
+            for key in pf.COLUMNS:
+                self.profiler_columns.append('\n'.join([key] + [f'{stats[key] * 1000:.2f}' for _, stats in table]))
+            layers = self.draw_layers
+            self.draw_stats_text = (f'{layers.draw_calls} draw calls, {layers.sprite_count} sprites, '
+                                    f'{layers.texture_binds} texture binds, {layers.skipped_count} layers skipped')
+            self.pool_stats_text = '\n'.join(f'{name}, {pool.get_stats()}'
+                                             for name, pool in self.simulation.get_pools().items())
+
+        # The table, then what drawing the sprites took on the line below it, then how full the sprite pools are.
+        line_count = self.profiler_columns[0].count('\n') + 1
+        pool_line_count = self.pool_stats_text.count('\n') + 1
+        left = 20 + view_left
+        top = c.SCREEN_HEIGHT - 60 + view_bottom
+        arcade.draw_lrtb_rectangle_filled(left - 10, left + 700, top + 10,
+                                          top - (line_count + 1 + pool_line_count) * 18 - 10, (0, 0, 0, 180))
+        arcade.draw_text(self.draw_stats_text, left, top - line_count * 18, arcade.color.WHITE, 16,
+                         anchor_y='top', font_name='resources/Unexplored.ttf')
+        arcade.draw_text(self.pool_stats_text, left, top - (line_count + 1) * 18, arcade.color.WHITE, 16,
+                         anchor_y='top', font_name='resources/Unexplored.ttf')
+
+        arcade.draw_text(self.profiler_columns[0], left, top, arcade.color.WHITE, 16,
+                         anchor_y='top', font_name='resources/Unexplored.ttf')
+        for column, text in enumerate(self.profiler_columns[1:]):
+            # Numbers are lined up on their right.
+            arcade.draw_text(text, left + 420 + column * 90, top, arcade.color.WHITE, 16,
+                             align='right', anchor_x='right', anchor_y='top',
+                             font_name='resources/Unexplored.ttf')
+
+    def export_profile(self):
+        """Saves the phase times of the last few seconds of frames, for looking at outside the game."""
+        name = f'profile_{time.strftime("%Y%m%d_%H%M%S")}'
+        self.profiler.export_csv(f'{name}.csv')
+        self.profiler.export_json(f'{name}.json')
+        print(f'Saved frame times to {name}.csv and {name}.json')
 
     def on_key_press(self, key, modifiers):
         """Called whenever a key is pressed."""
 
         if key == arcade.key.LSHIFT:
-            self.shift_pressed = True
+            self.inputs.sprint = True
         elif key == arcade.key.W or key == arcade.key.SPACE:
-            self.up_pressed = True
+            self.inputs.up = True
         elif key == arcade.key.S or key == arcade.key.LCTRL:
-            self.down_pressed = True
+            self.inputs.down = True
         elif key == arcade.key.A:
-            self.left_pressed = True
+            self.inputs.left = True
         elif key == arcade.key.D:
-            self.right_pressed = True
+            self.inputs.right = True
         elif key == arcade.key.KEY_1:
             # For equipping the two-handed weapon.
-
-            # De-equip other weapon. # TODO: Fix this equipping thingy.
-            if self.player_sprite.equipped_one_handed:
-                self.player_sprite.equipped_one_handed = False
-                self.player_sprite.equipped_two_handed = True
-            else:
-                # De-equip weapon and have no weapons in hand if gun is already equipped.
-                if self.player_sprite.equipped_two_handed:
-                    self.player_sprite.equipped_two_handed = False
-                elif not self.player_sprite.equipped_two_handed:
-                    self.player_sprite.equipped_two_handed = True
-
-            if self.player_sprite.equipped_two_handed:
-                self.player_sprite.equipped_any = True
-            else:
-                self.player_sprite.equipped_any = False
+            self.inputs.equip_two_handed = True
         elif key == arcade.key.KEY_2:
             # For equipping the one-handed weapon.
-
-            # De-equip other weapon.
-            if self.player_sprite.equipped_two_handed:
-                self.player_sprite.equipped_two_handed = False
-                self.player_sprite.equipped_one_handed = True
-            else:
-                # De-equip weapon and have no weapons in hand if gun is already equipped.
-                if self.player_sprite.equipped_one_handed:
-                    self.player_sprite.equipped_one_handed = False
-                elif not self.player_sprite.equipped_one_handed:
-                    self.player_sprite.equipped_one_handed = True
-
-            if self.player_sprite.equipped_one_handed:
-                self.player_sprite.equipped_any = True
-            else:
-                self.player_sprite.equipped_any = False
-
-        self.process_keychange()
+            self.inputs.equip_one_handed = True
+        elif key == arcade.key.F3:
+            self.show_profiler = not self.show_profiler
+        elif key == arcade.key.F4:
+            self.export_profile()
 
     def on_key_release(self, key, modifiers):
         """Called when the user releases a key."""
 
         if key == arcade.key.LSHIFT:
-            self.shift_pressed = False
+            self.inputs.sprint = False
         elif key == arcade.key.W or key == arcade.key.SPACE:
-            self.up_pressed = False
-            self.jump_needs_reset = False
+            self.inputs.up = False
         elif key == arcade.key.S or key == arcade.key.LCTRL:
-            self.down_pressed = False
+            self.inputs.down = False
         elif key == arcade.key.A:
-            self.left_pressed = False
+            self.inputs.left = False
         elif key == arcade.key.D:
-            self.right_pressed = False
-
-        self.process_keychange()
+            self.inputs.right = False
 
     def on_mouse_scroll(self, x, y, scroll_x, scroll_y):
         """Called whenever the user uses the scroll on the mouse.
@@ -542,297 +443,77 @@ class GameView(arcade.View):
     def on_mouse_press(self, x, y, button, modifiers):
         """Called whenever the mouse button is clicked."""
 
-        # Create a bullet.
-        if self.player_sprite.equipped_one_handed and button == arcade.MOUSE_BUTTON_LEFT:
-            self.player_sprite.front_arm.firing = True
-            bullet = arcade.Sprite('resources/images/effects/bullet_projectile.png', c.PIXEL_SCALING)
-            bullet.set_hit_box([[-2, -2], [-2, 2], [2, 2], [2, -2]])
-
-            # Position the bullet at the player's front arm.
-            start_x = self.player_sprite.front_arm.center_x
-            start_y = self.player_sprite.front_arm.center_y  # TODO: Change this to gun position.
-            bullet.center_x = start_x
-            bullet.center_y = start_y
-
-            # Get from the mouse the destination location for the bullet
-            # IMPORTANT! If you have a scrolling screen, you will also need
-            # to add in self.view_bottom and self.view_left.
-            dest_x = x + self.view_left
-            dest_y = y + self.view_bottom
-
-            # Do maths to calculate how to get the bullet to the destination.
-            # Calculate the angle in radians between the start points
-            # and end points. This is the angle the bullet will travel.
-            x_diff = dest_x - start_x
-            y_diff = dest_y - start_y
-            angle = math.atan2(y_diff, x_diff)
-
-            # Angle the bullet sprite so it doesn't look like it is flying
-            # sideways.
-            bullet.angle = math.degrees(angle)
-
-            # Taking into account the angle, calculate our change_x
-            # and change_y. Velocity is how fast the bullet travels.
-            bullet.change_x = (math.cos(angle) * c.BULLET_SPEED)
-            bullet.change_y = (math.sin(angle) * c.BULLET_SPEED)
-
-            # Reposition bullet
-            bullet.center_x += math.cos(angle) * (36 * c.PIXEL_SCALING)
-            bullet.center_y += math.sin(angle) * (36 * c.PIXEL_SCALING)
-
-            # Add the bullet to the appropriate lists
-            self.bullet_list.append(bullet)
-            arcade.play_sound(a.sound["glock_17_fire"])
+        # Fire, towards where the mouse was clicked.
+        if button == arcade.MOUSE_BUTTON_LEFT:
+            self.inputs.mouse_x = x
+            self.inputs.mouse_y = y
+            self.inputs.fire = True
 
     def on_update(self, delta_time):
-        """Movement and game logic."""
+        """Moves the simulation on by however many fixed updates fit in the time since the last call."""
 
-        # Start timing how long this takes.
-        start_time = timeit.default_timer()
+        with self.profiler.phase('update'):
+            # Time not yet simulated. Anything past a few updates' worth is dropped,
+            # so a long pause slows the game down rather than making it race to catch up.
+            self.update_lag = min(self.update_lag + delta_time, sim.STEP_TIME * c.MAX_CATCH_UP_UPDATES)
 
-        if self.player_sprite.center_y < c.WORLD_BOTTOM:
-            self.setup()
-
-        # Get mouse position.
-        # view_left and view_bottom added so that the position works when the scrolling screen moves.
-        self.player_sprite.acquire_mouse_position(self.mouse_position_x + self.view_left,
-                                                  self.mouse_position_y + self.view_bottom)
-
-        # Move the player with the physics engine.
-        self.physics_engine.update()
-
-        # Update animations.
-        if self.physics_engine.can_jump():
-            self.player_sprite.can_jump = False
-        else:
-            self.player_sprite.can_jump = True
-
-        if self.physics_engine.is_on_ladder() and not self.physics_engine.can_jump():
-            self.player_sprite.is_on_ladder = True
-            self.process_keychange()
-        else:
-            self.player_sprite.is_on_ladder = False
-            self.process_keychange()
+            # The same sound happening in more than one update this frame is only played once.
+            self.mixer.update()
 
-        # Move body parts to player's position and update checking variables.
-        self.player_list.update_animation(delta_time)
+            simulation = self.simulation
+            while self.update_lag >= sim.STEP_TIME:
+                self.update_lag -= sim.STEP_TIME
+                self.save_previous_positions()
 
-        # Position the gun to the player front_arm sprite.
-        # self.gun.update_position(follow_x=self.player_sprite.front_arm.center_x,
-        #                         follow_y=self.player_sprite.front_arm.center_y,
-        #                         angle=self.player_sprite.front_arm.angle,
-        #                         direction=self.player_sprite.character_face_direction)
-
-        self.coin_list.update_animation(delta_time)
-
-        # Update walls, used with moving platforms.
-        self.wall_list.update()
-
-        # See if the moving wall hit a boundary and needs to reverse direction.
-        for wall in self.wall_list:
-
-            if wall.boundary_right and wall.right > wall.boundary_right and wall.change_x > 0:
-                wall.change_x *= -1
-            if wall.boundary_left and wall.left < wall.boundary_left and wall.change_x < 0:
-                wall.change_x *= -1
-            if wall.boundary_top and wall.top > wall.boundary_top and wall.change_y > 0:
-                wall.change_y *= -1
-            if wall.boundary_bottom and wall.bottom < wall.boundary_bottom and wall.change_y < 0:
-                wall.change_y *= -1
-
-        # See if we hit any coins.
-        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                             self.coin_list)
-
-        # Loop through each coin we hit (if any) and remove it.
-        for coin in coin_hit_list:
-
-            # Figure out how many points this coin is worth.
-            if 'Points' not in coin.properties:
-                print('Warning, collected a coin without a Points property.')
-            else:
-                points = int(coin.properties['Points'])
-                self.score += points
-
-            # Remove the coin.
-            coin.remove_from_sprite_lists()
-
-        # Bullets and hit effects.
-        self.bullet_list.update()
-        self.explosions_list.update()
-
-        # Loop through each bullet
-        for bullet in self.bullet_list:
-
-            # See if we hit any barrels.
-            barrel_hit_list = arcade.check_for_collision_with_list(bullet,
-                                                                   self.barrel_list)
-            # Loop through each barrel we hit (if any) and remove it.
-            for barrel in barrel_hit_list:
-                # Make an explosion
-                explosion = e.BarrelExplosion(self.barrel_explosion_texture_list)
-
-                # Move it to the location of the coin
-                explosion.center_x = barrel_hit_list[0].center_x
-                explosion.center_y = barrel_hit_list[0].center_y
-                explosion.scale = c.PIXEL_SCALING
-
-                # Call update() because it sets which image we start on
-                explosion.update()
-
-                arcade.play_sound(a.sound[f'explosion'])
-
-                # Add to a list of sprites that are explosions
-                self.explosions_list.append(explosion)
-
-                # Remove the barrel.
-                barrel.remove_from_sprite_lists()
-
-            # If it did, get rid of the bullet
-            if len(barrel_hit_list) > 0:
-                bullet.remove_from_sprite_lists()
-
-            # Check this bullet to see if it hit a wall.
-            hit_list = arcade.check_for_collision_with_list(bullet, self.wall_list)
-
-            # If it did, get rid of the bullet
-            if len(hit_list) > 0:
-                # Make an explosion.
-                explosion = e.Explosion(texture_list=self.explosion_texture_list)
-
-                # Move it to the location of the coin.
-                explosion.center_x = bullet.center_x
-                explosion.center_y = bullet.center_y
-                explosion.scale = c.PIXEL_SCALING
-
-                # Call update() because it sets which image we start on.
-                explosion.update()
-
-                # Add to a list of sprites that are explosions.
-                self.explosions_list.append(explosion)
-                bullet.remove_from_sprite_lists()
-
-            # If the bullet flies out of the map, remove it.
-            if bullet.bottom > c.CULL_DISTANCE_Y + self.player_sprite.center_y or bullet.top < c.CULL_DISTANCE_Y * -1 + self.player_sprite.center_y or bullet.right < c.CULL_DISTANCE_X * -1 + self.player_sprite.center_x or bullet.left > c.CULL_DISTANCE_X + self.player_sprite.center_x:
-                bullet.remove_from_sprite_lists()
-
-        # See if we hit the treasure.
-        if not self.game_won:
-            treasure_hit_list = arcade.check_for_collision_with_list(self.player_sprite.legs,
-                                                                     self.treasure_list)
-            # Loop through each treasure we hit.
-            if treasure_hit_list:
-                # Change the game to 'won'. Accessed by the if statement after the viewport code.
-                self.game_won = True
-                # End the game.
-
-        # Check if the player got to the end of the current map
-        # and made it to the next level. If so, go to the next level.
-        if arcade.check_for_collision_with_list(self.player_sprite,
-                                                self.next_level_list):
-            self.level += 1
-
-            self.setup()
-
-        # Track if we need to change the viewport.
-        changed_viewport = False
-
-        # --- Manage Scrolling --- #
-
-        # Scroll left.
-        left_boundary = self.view_left + c.LEFT_VIEWPORT_MARGIN
-        if self.player_sprite.left < left_boundary:
-            self.view_left -= left_boundary - self.player_sprite.left
-            changed_viewport = True
-
-        # Scroll right.
-        right_boundary = self.view_left + c.SCREEN_WIDTH - c.RIGHT_VIEWPORT_MARGIN
-        if self.player_sprite.right > right_boundary:
-            self.view_left += self.player_sprite.right - right_boundary
-            changed_viewport = True
-
-        # Scroll up.
-        top_boundary = self.view_bottom + c.SCREEN_HEIGHT - c.TOP_VIEWPORT_MARGIN
-        if self.player_sprite.top > top_boundary:
-            self.view_bottom += self.player_sprite.top - top_boundary
-            changed_viewport = True
-
-        # Scroll down.
-        bottom_boundary = self.view_bottom + c.BOTTOM_VIEWPORT_MARGIN
-        if self.player_sprite.bottom < bottom_boundary:
-            self.view_bottom -= bottom_boundary - self.player_sprite.bottom
-            changed_viewport = True
-
-        if changed_viewport:
-            # Only scroll to integers. Otherwise we end up with pixels that
-            # don't line up on the screen.
-            self.view_bottom = int(self.view_bottom)
-            self.view_left = int(self.view_left)
-
-            # These two make sure the viewport doesn't go off the map.
-            if self.view_left <= 0:
-                self.view_left = 0
-            if self.view_left + c.SCREEN_WIDTH >= self.end_of_map:
-                self.view_left = self.end_of_map - c.SCREEN_WIDTH
-
-            # Do the scrolling.
-            arcade.set_viewport(self.view_left,
-                                c.SCREEN_WIDTH + self.view_left,
-                                self.view_bottom,
-                                c.SCREEN_HEIGHT + self.view_bottom)
-
-            # Stop the draw timer, and calculate total on_draw time.
-            self.processing_time = timeit.default_timer() - start_time
-
-        # -- ANYTHING AFTER VIEWPORT CODE IS UPDATED HERE SO THAT THEY DON'T MOVE AROUND AND LAG. -- #
+                if self.replay is not None:
+                    self.replay.apply(simulation.frame, self.inputs)
+                elif self.recorder is not None:
+                    self.recorder.record(simulation.frame, self.inputs)
 
-        # Update the environment backgrounds.
-        self.medium_background_0.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) - c.SCREEN_WIDTH // 2
-        self.medium_background_0.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (50 * c.PIXEL_SCALING)
+                simulation.step(self.inputs)
+                self.inputs.clear_presses()
 
-        self.medium_background_1.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) + c.SCREEN_WIDTH // 2
-        self.medium_background_1.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (50 * c.PIXEL_SCALING)
+                for name in simulation.sounds:
+                    self.mixer.play(name)
 
-        self.close_background_0.follow_x = self.view_left + (
-                    c.SCREEN_WIDTH // 2)  # - c.SCREEN_WIDTH // 2 # TODO: this thing with the backgrounds and positioning thing [[CHANGE THE ACTUAL FOLLOW_X]]
-        self.close_background_0.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (220 * c.PIXEL_SCALING)
+                for barrel in simulation.changed_barrels:
+                    self.barrels_cache.invalidate_sprite(barrel)
 
-        self.close_background_1.follow_x = self.view_left + (c.SCREEN_WIDTH // 2) + self.close_background_1.width
-        self.close_background_1.follow_y = self.view_bottom + (c.SCREEN_HEIGHT // 2) + (220 * c.PIXEL_SCALING)
+                if simulation.level_loaded:
+                    self.level = simulation.level
+                    self.setup_level_view()
 
-        self.backgrounds_list.update()
+        # Once the game is won and the screen has faded out, move to end view.
+        if simulation.finished:
+            end_view = EndView()
+            self.window.show_view(end_view)
 
-        if self.close_background_1.right < self.view_left + c.SCREEN_WIDTH:
-            self.close_background_0.center_x += self.close_background_0.width * c.PIXEL_SCALING
-            #print(self.close_background_1.right, (self.view_left + c.SCREEN_WIDTH))
+        # Stop once the recording has been played to the end.
+        if self.replay is not None and simulation.frame >= self.replay.steps:
+            print(f'Replayed {simulation.frame} steps.')
+            print('\n'.join(self.profiler.get_lines()))
+            self.window.close()
 
-        # Do the screen fade here after the viewport code so that it doesn't move around.
-        if self.game_won:
-            # If sufficiently dark, move to end view.
-            f.screen_fade.center_x = self.view_left + c.SCREEN_WIDTH // 2
-            f.screen_fade.center_y = self.view_bottom + c.SCREEN_HEIGHT // 2
-            f.screen_fade.change_fade(target=255, change=4)
-            if f.screen_fade.alpha >= 250:
-                end_view = EndView()
-                self.window.show_view(end_view)
+    def on_show(self):
+        """This is run once when we switch to this view."""
 
-        # Position the reticle. This is after the viewport code so that the view_left and view_bottom are updated.
-        self.reticle.visible = True
-        self.reticle.follow_x = self.mouse_position_x + self.view_left
-        self.reticle.follow_y = self.mouse_position_y + self.view_bottom
-        self.user_interface_list.update()
+        # Set mouse to invisible.
+        self.window.set_mouse_visible(False)
 
     def on_mouse_motion(self, x, y, dx, dy):
         """Handle Mouse Motion."""
 
         # Update the position of the mouse.
-        self.mouse_position_x = x
-        self.mouse_position_y = y
+        self.inputs.mouse_x = x
+        self.inputs.mouse_y = y
 
     def on_hide_view(self):
         # For when the view is switched.
         self.ui_manager.unregister_handlers()
 
+        if self.recorder is not None:
+            self.recorder.close()
+
 
 class MainMenuView(arcade.View):
     """The main menu that shows when you start the game."""
@@ -849,11 +530,16 @@ class MainMenuView(arcade.View):
         arcade.set_viewport(0, c.SCREEN_WIDTH - 1, 0, c.SCREEN_HEIGHT - 1)
 
         self.main_menu_list = arcade.SpriteList()
-        self.menu_texture = arcade.load_texture('resources/images/ui/main_menu.png')
+        self.menu_texture = f.load_texture('resources/images/ui/main_menu.png')
         self.main_menu_image = None
 
         self.fade_list = arcade.SpriteList()
 
+        # Start loading the intro and the game in the background while the menu is up.
+        self.loader = ld.AssetLoader()
+        ld.queue_intro_assets(self.loader)
+        ld.queue_game_assets(self.loader)
+
     def on_show(self):
         """This is run once when we switch to this view."""
 
@@ -868,9 +554,9 @@ class MainMenuView(arcade.View):
         right_column_x = 3 * self.window.width // 4
 
         # TODO: Comments here.
-        button_normal = arcade.load_texture('resources/images/ui/new_game_regular.png')
-        hovered_texture = arcade.load_texture('resources/images/ui/new_game_hover.png')
-        pressed_texture = arcade.load_texture('resources/images/ui/new_game_hover.png')
+        button_normal = f.load_texture('resources/images/ui/new_game_regular.png')
+        hovered_texture = f.load_texture('resources/images/ui/new_game_hover.png')
+        pressed_texture = f.load_texture('resources/images/ui/new_game_hover.png')
         button = g.StartButton(
             center_x=left_column_x - 50 * c.PIXEL_SCALING,
             center_y=y_slot * 3,
@@ -900,13 +586,16 @@ class MainMenuView(arcade.View):
 
     def on_update(self, delta_time: float):
         """For updating the scenes and animations."""
+        # Keep the background loading going.
+        self.loader.update()
+
         if f.screen_fade.fade:
             self.ui_manager.purge_ui_elements()
             f.screen_fade.change_fade(target=255, change=4)
 
         # If sufficiently dark, move to intro view.
         if f.screen_fade.alpha >= 250:
-            intro_view = IntroView()
+            intro_view = IntroView(self.loader)
             self.window.show_view(intro_view)
 
     def on_mouse_press(self, x, y, button, modifiers):
@@ -916,10 +605,16 @@ class MainMenuView(arcade.View):
 class IntroView(arcade.View):
     """The cinematic intro that plays once the player selects 'New game'."""
 
-    def __init__(self):
+    def __init__(self, loader=None):
         """Get all the stuff ready for the intro."""
         super().__init__()
 
+        # The game's assets keep streaming in while the intro plays.
+        if loader is None:
+            loader = ld.AssetLoader()
+            ld.queue_game_assets(loader)
+        self.loader = loader
+
         # For managing the GUI.
         self.ui_manager = UIManager()
 
@@ -942,7 +637,7 @@ class IntroView(arcade.View):
         # Load textures for scene 1.
         self.scene_1_textures = []
         for i in range(12):
-            texture = arcade.load_texture(f'resources/images/cutscene/auckland_{i}.png')
+            texture = f.load_texture(f'resources/images/cutscene/auckland_{i}.png')
             self.scene_1_textures.append(texture)
 
         # Load initial texture.
@@ -953,13 +648,16 @@ class IntroView(arcade.View):
 
         # TODO: TEMPORARY INSTRUCTIONS IN INTRO
         self.instructions_image = arcade.Sprite()
-        self.instructions_image.texture = arcade.load_texture('resources/images/ui/instructions_text.png')
+        self.instructions_image.texture = f.load_texture('resources/images/ui/instructions_text.png')
         self.instructions_image.scale = c.INTRO_SCALING
         self.instructions_image.center_x = c.SCREEN_WIDTH / 2
         self.instructions_image.center_y = c.SCREEN_HEIGHT / 2
 
         self.scene_list.append(self.instructions_image)
 
+        # Whether the game has been clicked for, and is waiting on the loader to start.
+        self.start_clicked = False
+
     def on_show(self):
         """This is run once when we switch to this view."""
 
@@ -994,14 +692,37 @@ class IntroView(arcade.View):
         if f.screen_fade.fade:
             f.screen_fade.change_fade(target=0, change=4)
 
+        # Keep the background loading going.
+        self.loader.update()
+
+        # Start the game once it's been clicked for and everything has loaded.
+        if self.start_clicked and self.loader.done:
+            self.start_game()
+
     def on_draw(self):
         """Draw this view."""
         arcade.start_render()
         self.scene_list.draw(filter=GL_NEAREST)
+
+        # Thin loading bar along the bottom until the game is ready.
+        if not self.loader.done:
+            arcade.draw_lrtb_rectangle_filled(0, c.SCREEN_WIDTH * self.loader.progress, 2 * c.PIXEL_SCALING, 0,
+                                              arcade.color.WHITE)
+
         self.fade_list.draw(filter=GL_NEAREST)
 
     def on_mouse_press(self, x, y, button, modifiers):
-        """If the user presses the mouse button, start the game."""
+        """If the user presses the mouse button, start the game, or once the game's assets have
+            finished streaming in if they haven't yet. The intro keeps playing until then."""
+        self.start_clicked = True
+        if self.loader.done:
+            self.start_game()
+
+    def start_game(self):
+        """Switches to the game view. Only call it once the loader is done."""
+        self.loader.wait()
+        self.loader.shutdown()
+
         game_view = GameView()
         game_view.setup()
         self.window.show_view(game_view)
@@ -1022,7 +743,7 @@ class EndView(arcade.View):
         arcade.set_viewport(0, c.SCREEN_WIDTH - 1, 0, c.SCREEN_HEIGHT - 1)
 
         self.end_image_list = arcade.SpriteList()
-        self.image_texture = arcade.load_texture('resources/images/ui/end_screen.png')
+        self.image_texture = f.load_texture('resources/images/ui/end_screen.png')
         self.end_image = arcade.Sprite()
 
         self.fade_list = arcade.SpriteList()
@@ -1066,12 +787,25 @@ class EndView(arcade.View):
 
 
 def main():
-    """Main method."""
+    """Main method. Run with --record FILE to record the game that's played to a file,
+        or --replay FILE to play a recording back."""
     window = arcade.Window(c.SCREEN_WIDTH, c.SCREEN_HEIGHT, c.SCREEN_TITLE, resizable=True, fullscreen=False)
-    start_view = MainMenuView()
-    window.show_view(start_view)
+    if len(sys.argv) > 2 and sys.argv[1] == '--replay':
+        # Straight into the game, which plays itself.
+        game_view = GameView(replay=rp.load_replay(sys.argv[2]))
+        game_view.setup()
+        window.show_view(game_view)
+    else:
+        if len(sys.argv) > 2 and sys.argv[1] == '--record':
+            rp.record_path = sys.argv[2]
+        start_view = MainMenuView()
+        window.show_view(start_view)
     arcade.run()
 
+    # Finish the recording, if the game was closed while it was being played.
+    if isinstance(window.current_view, GameView) and window.current_view.recorder is not None:
+        window.current_view.recorder.close()
+
 
 if __name__ == '__main__':
     main()